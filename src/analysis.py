@@ -0,0 +1,132 @@
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from dfa import DFA
+
+
+class DFAAnalysis:
+
+    def __init__(self, dead: frozenset, accept_forever: frozenset, min_length: Optional[int],
+                 max_length: Optional[int], alphabet: frozenset):
+        # States from which no accepting state can be reached
+        self.dead = dead
+        # Accepting states every string over the alphabet keeps accepting from
+        self.accept_forever = accept_forever
+        # Shortest accepted length, None when nothing is accepted
+        self.min_length = min_length
+        # Longest accepted length, None when it is unbounded
+        self.max_length = max_length
+        self.alphabet = alphabet
+        # States where reading can stop early
+        self.stop_states = dead | accept_forever
+
+    def rejects_length(self, length: int) -> bool:
+        if self.min_length is None or length < self.min_length:
+            return True
+        return self.max_length is not None and length > self.max_length
+
+    def __repr__(self) -> str:
+        return (f"DFAAnalysis(dead={sorted(self.dead)}, accept_forever={sorted(self.accept_forever)}, "
+                f"min_length={self.min_length}, max_length={self.max_length})")
+
+
+def live_states(dfa: "DFA") -> set[int]:
+    # States that can still reach an accepting state
+    reverse: dict[int, list[int]] = {}
+    for state, transitions in dfa.table.items():
+        for next_state in transitions.values():
+            reverse.setdefault(next_state, []).append(state)
+    live = set(dfa.accepts)
+    stack = list(dfa.accepts)
+    while stack:
+        for previous in reverse.get(stack.pop(), ()):
+            if previous not in live:
+                live.add(previous)
+                stack.append(previous)
+    return live
+
+
+def longest_match_length(dfa: "DFA", live: Optional[set[int]] = None) -> Optional[int]:
+    # Length of the longest accepted string, None when it is unbounded
+    table = dfa.table
+    accepts = dfa.accepts
+    if live is None:
+        live = live_states(dfa)
+    if dfa.initial_state not in live:
+        return 0
+
+    longest: dict[int, int] = {}
+    on_path = set()
+    # Iterative DFS over live states, a cycle among them makes the language infinite
+    stack = [(dfa.initial_state, iter(table.get(dfa.initial_state, {}).values()))]
+    on_path.add(dfa.initial_state)
+    while stack:
+        state, children = stack[-1]
+        for child in children:
+            if child not in live:
+                continue
+            if child in on_path:
+                return None
+            if child not in longest:
+                on_path.add(child)
+                stack.append((child, iter(table.get(child, {}).values())))
+                break
+        else:
+            stack.pop()
+            on_path.discard(state)
+            best = 0 if state in accepts else -1
+            for child in table.get(state, {}).values():
+                if child in live and longest[child] >= 0:
+                    best = max(best, longest[child] + 1)
+            longest[state] = best
+    return longest[dfa.initial_state]
+
+
+def shortest_match_length(dfa: "DFA") -> Optional[int]:
+    # BFS from the initial state, None when no accepting state is reachable
+    distance = {dfa.initial_state: 0}
+    queue = deque([dfa.initial_state])
+    while queue:
+        state = queue.popleft()
+        if state in dfa.accepts:
+            return distance[state]
+        for next_state in dfa.table.get(state, {}).values():
+            if next_state not in distance:
+                distance[next_state] = distance[state] + 1
+                queue.append(next_state)
+    return None
+
+
+def accept_forever_states(dfa: "DFA", alphabet: frozenset) -> set[int]:
+    # Greatest fixpoint: accepting states with a transition on every symbol, all staying inside the set
+    candidates = {
+        state for state in dfa.accepts
+        if len(dfa.table.get(state, {})) == len(alphabet)
+    }
+    changed = True
+    while changed:
+        changed = False
+        for state in list(candidates):
+            if any(next_state not in candidates for next_state in dfa.table.get(state, {}).values()):
+                candidates.discard(state)
+                changed = True
+    return candidates
+
+
+def analyze(dfa: "DFA") -> DFAAnalysis:
+    states = set(dfa.table)
+    alphabet = set()
+    for transitions in dfa.table.values():
+        states.update(transitions.values())
+        alphabet.update(transitions)
+    alphabet = frozenset(alphabet)
+
+    live = live_states(dfa)
+    return DFAAnalysis(
+        dead=frozenset(states - live),
+        accept_forever=frozenset(accept_forever_states(dfa, alphabet)),
+        min_length=shortest_match_length(dfa),
+        max_length=longest_match_length(dfa, live),
+        alphabet=alphabet,
+    )
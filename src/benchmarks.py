@@ -0,0 +1,468 @@
+import argparse
+import array
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from compressed import CompressedDFA
+from compressed import dict_table_bytes
+from complexity import estimate
+from converter import ALPHABET
+from converter import RegexToNFAConverter
+from dfa import DFA
+from engines import TieredMatcher
+from events import EventMatcher
+from layout import DenseDFA
+from layout import TransitionProfile
+from layout import relayout
+from nfa import nfa_to_dfa
+from nfa_reduction import nfa_size
+from nfa_reduction import reduce_nfa
+from parallel_dfa import nfa_to_dfa_parallel
+from pattern_set import PatternSet
+from result_cache import CachedMatcher
+from search import Searcher
+from sharing import CompilationSession
+from utf8 import ByteDFA
+
+from shunting_yard import infix_to_postfix
+from word_dfa import build_word_dfa
+
+
+def _keyword(i: int) -> str:
+    return "kw" + "".join(chr(ord("a") + int(d)) for d in str(i))
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_parse(sizes: list[int]):
+    print(f"{'keywords':>10} {'chars':>10} {'seconds':>10} {'chars/s':>12}")
+    for size in sizes:
+        regex = "|".join(_keyword(i) for i in range(size))
+        _, elapsed = _timed(infix_to_postfix, regex)
+        print(f"{size:>10} {len(regex):>10} {elapsed:>10.4f} {len(regex) / elapsed:>12.0f}")
+
+
+def bench_words(sizes: list[int]):
+    print(f"{'words':>10} {'chars':>10} {'states':>10} {'seconds':>10} {'chars/s':>12}")
+    for size in sizes:
+        rng = random.Random(size)
+        words = sorted(
+            "".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 12))) for _ in range(size)
+        )
+        chars = sum(len(word) for word in words)
+        dfa, elapsed = _timed(build_word_dfa, words)
+        print(f"{size:>10} {chars:>10} {len(dfa.table):>10} {elapsed:>10.4f} {chars / elapsed:>12.0f}")
+
+
+def bench_search(lines_count: int, regex: str):
+    rng = random.Random(lines_count)
+    lines = []
+    for i in range(lines_count):
+        words = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(2, 8))) for _ in range(8)]
+        if i % 100 == 0:
+            words.insert(rng.randint(0, len(words)), "abaerrorcc")
+        lines.append(" ".join(words).encode() + b"\n")
+
+    print(f"{'prefilter':>10} {'matched':>10} {'seconds':>10} {'lines/s':>12} {'hit rate':>10}")
+    for use_prefilter in (False, True):
+        searcher = Searcher(regex, use_prefilter=use_prefilter)
+        matched, elapsed = _timed(lambda: sum(1 for _ in searcher.filter_lines(lines)))
+        hit_rate = f"{searcher.stats.hit_rate:.3f}" if searcher.prefilter else "-"
+        print(f"{str(use_prefilter):>10} {matched:>10} {elapsed:>10.4f} {lines_count / elapsed:>12.0f} {hit_rate:>10}")
+
+
+def bench_tables(sizes: list[int]):
+    print(f"{'words':>10} {'states':>8} {'rows':>8} {'dict B/st':>10} {'dense B/st':>11} {'comb B/st':>10} "
+          f"{'comb B/tr':>10} {'dict s':>8} {'comb s':>8}")
+    for size in sizes:
+        rng = random.Random(size)
+        words = sorted({"".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 12))) for _ in range(size)})
+        dfa = build_word_dfa(words)
+        compressed = CompressedDFA.from_dfa(dfa)
+        report = compressed.memory_report()
+        probes = words[::max(1, len(words) // 5000)] + ["".join(rng.choice(ALPHABET) for _ in range(8))
+                                                        for _ in range(5000)]
+        _, dict_seconds = _timed(lambda: sum(dfa.test(word) for word in probes))
+        _, comb_seconds = _timed(lambda: sum(compressed.test(word) for word in probes))
+        print(f"{size:>10} {report['states']:>8} {report['distinct_rows']:>8} "
+              f"{dict_table_bytes(dfa) / report['states']:>10.1f} {report['dense_bytes_per_state']:>11.1f} "
+              f"{report['compressed_bytes_per_state']:>10.1f} {report['compressed_bytes_per_transition']:>10.1f} "
+              f"{dict_seconds:>8.4f} {comb_seconds:>8.4f}")
+
+
+def bench_sharing(rules_count: int):
+    date = "(a|b|c|d)(a|b|c|d)(a|b|c|d)(a|b|c|d)x(a|b|c)(a|b|c)x(a|b|c)(a|b|c)"
+    address = "(a|b|c)+x(a|b|c)+x(a|b|c)+x(a|b|c)+"
+    rng = random.Random(rules_count)
+    rules = [
+        f"{_keyword(i)}{rng.choice('mnop')}({date}|{address})" + rng.choice(["", "y", f"y{date}"])
+        for i in range(rules_count)
+    ]
+
+    _, plain_seconds = _timed(lambda: [DFA.from_regex(rule) for rule in rules])
+    session = CompilationSession()
+    _, shared_seconds = _timed(session.compile_many, rules)
+    stats = session.stats
+    print(f"{'rules':>8} {'plain s':>10} {'shared s':>10} {'sharing':>8} {'fragments':>10} {'hits':>8} "
+          f"{'states saved':>13}")
+    print(f"{rules_count:>8} {plain_seconds:>10.3f} {shared_seconds:>10.3f} {stats.sharing_ratio:>8.3f} "
+          f"{stats.fragments_built:>10} {stats.fragment_hits:>8} {stats.states_saved:>13}")
+
+
+def bench_bytes(lines_count: int, regex: str):
+    dfa = DFA.from_regex(regex)
+    byte_dfa = ByteDFA(dfa)
+    rng = random.Random(lines_count)
+    lines = [
+        (rng.choice(["", "kw"]) + "".join(rng.choice("abcd") for _ in range(rng.randint(8, 64)))).encode()
+        for _ in range(lines_count)
+    ]
+    size = sum(len(line) for line in lines)
+
+    print(f"{'matcher':<20} {'matched':>10} {'seconds':>10} {'MB/s':>10}")
+    cases = [
+        ("decode + DFA.test", lambda: sum(dfa.test(line.decode()) for line in lines)),
+        ("ByteDFA.test", lambda: sum(byte_dfa.test(line) for line in lines)),
+        ("ByteDFA memoryview", lambda: sum(byte_dfa.test(memoryview(line)) for line in lines)),
+    ]
+    for name, run in cases:
+        matched, elapsed = _timed(run)
+        print(f"{name:<20} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f}")
+
+
+def bench_events(sequences_count: int, regex: str):
+    dfa = DFA.from_regex(regex)
+    matcher = EventMatcher(dfa)
+    rng = random.Random(sequences_count)
+    sequences = [[rng.choice([1, 2, 3, 4, 5]) for _ in range(rng.randint(8, 64))] for _ in range(sequences_count)]
+    size = sum(len(events) for events in sequences)
+    arrays = [array.array("i", events) for events in sequences]
+
+    print(f"{'matcher':<22} {'matched':>10} {'seconds':>10} {'Mev/s':>10}")
+    cases = [
+        ("DFA.test", lambda: sum(dfa.test(events) for events in sequences)),
+        ("EventMatcher list", lambda: sum(matcher.test(events) for events in sequences)),
+        ("EventMatcher array", lambda: sum(matcher.test(events) for events in arrays)),
+    ]
+    for name, run in cases:
+        matched, elapsed = _timed(run)
+        print(f"{name:<22} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f}")
+
+
+def bench_prefixes(strings_count: int, regex: str):
+    # Path-like inputs: a few long shared prefixes with short distinct tails, the DFA stays alive throughout
+    dfa = DFA.from_regex(regex)
+    rng = random.Random(strings_count)
+    segments = ["".join(rng.choice("abcde") for _ in range(rng.randint(4, 10))) for _ in range(30)]
+    bases = ["".join(rng.choice(segments) for _ in range(6)) for _ in range(20)]
+    strings = [rng.choice(bases) + "".join(rng.choice(segments) for _ in range(2)) + rng.choice(["ace", "bd"])
+               for _ in range(strings_count)]
+    size = sum(len(string) for string in strings)
+    edges = len({string[:end] for string in strings for end in range(1, len(string) + 1)})
+
+    print(f"symbols={size} trie edges={edges} ({size / edges:.1f}x fewer)")
+    print(f"{'matcher':<20} {'matched':>10} {'seconds':>10} {'Msym/s':>10}")
+    cases = [
+        ("test_batch", lambda: sum(dfa.test_batch(strings))),
+        ("test_prefix_batch", lambda: sum(dfa.test_prefix_batch(strings))),
+    ]
+    for name, run in cases:
+        matched, elapsed = _timed(run)
+        print(f"{name:<20} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f}")
+
+
+def bench_layout(words_count: int, lines_count: int):
+    # Large minimal DFA over a word list, traffic skewed towards a few words (Zipf) plus near misses
+    rng = random.Random(words_count)
+    words = sorted({"".join(rng.choice(ALPHABET) for _ in range(rng.randint(6, 16))) for _ in range(words_count)})
+    dfa = build_word_dfa(words)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    lines = [word if rng.random() < 0.8 else word[:-1] + rng.choice(ALPHABET)
+             for word in rng.choices(words, weights, k=lines_count)]
+    size = sum(len(line) for line in lines)
+
+    profile = TransitionProfile(dfa)
+    _, profile_elapsed = _timed(profile.test_batch, lines[:lines_count // 10])
+    relaid, relayout_elapsed = _timed(relayout, dfa, profile)
+    hot = sum(1 for state in profile.state_hits)
+    print(f"states={len(dfa.table)} columns={len(ALPHABET)} visited by the sample={hot} "
+          f"profile={profile_elapsed:.3f}s relayout={relayout_elapsed:.3f}s")
+
+    print(f"{'matcher':<24} {'matched':>10} {'seconds':>10} {'Msym/s':>10}")
+    dense = DenseDFA(dfa)
+    dense_relaid = DenseDFA.from_profile(dfa, profile)
+    cases = [
+        ("DFA.test_batch", lambda: sum(dfa.test_batch(lines))),
+        ("DFA.test_batch relaid", lambda: sum(relaid.test_batch(lines))),
+        ("DenseDFA", lambda: sum(dense.test_batch(lines))),
+        ("DenseDFA relaid", lambda: sum(dense_relaid.test_batch(lines))),
+    ]
+    for name, run in cases:
+        matched, elapsed = _timed(run)
+        print(f"{name:<24} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f}")
+
+
+def bench_tiered(regexes: list[str]):
+    # Time to the first answer of a tiered matcher against compiling the minimal DFA up front
+    print(f"{'regex':<32} {'upfront':>9} {'first':>9} {'dfa':>9} {'min_dfa':>9}")
+    for regex in regexes:
+        start = time.perf_counter()
+        DFA.from_regex(regex).test("a")
+        upfront = time.perf_counter() - start
+
+        matcher = TieredMatcher(regex)
+        matcher.test("a")
+        first = time.perf_counter() - start - upfront
+        matcher.wait()
+        timings = [f"{matcher.timings[tier]:>9.4f}" if tier in matcher.timings else f"{'-':>9}"
+                   for tier in ("dfa", "min_dfa")]
+        print(f"{regex[:32]:<32} {upfront:>9.4f} {first:>9.4f} {' '.join(timings)}")
+
+
+def bench_reduce(window_sizes: list[int], keyword_counts: list[int]):
+    # NFA size and subset construction time with and without the reduction pass
+    regexes = [("(a|b)*a" + "(a|b)" * size, f"window {size}") for size in window_sizes]
+    regexes += [("|".join(_keyword(i) for i in range(count)), f"{count} keywords") for count in keyword_counts]
+    print(f"{'regex':<14} {'states':>14} {'transitions':>14} {'epsilons':>14} {'reduce':>8} "
+          f"{'determinize':>18} {'subsets':>14}")
+    for regex, name in regexes:
+        nfa = RegexToNFAConverter(regex).parse()
+        reduced, reduce_elapsed = _timed(reduce_nfa, nfa)
+        before, after = nfa_size(nfa), nfa_size(reduced)
+        (table, _), elapsed = _timed(nfa_to_dfa, nfa)
+        (reduced_table, _), reduced_elapsed = _timed(nfa_to_dfa, reduced)
+        sizes = " ".join(f"{f'{old} -> {new}':>14}" for old, new in zip(before, after))
+        print(f"{name:<14} {sizes} {reduce_elapsed:>8.4f} {f'{elapsed:.4f} -> {reduced_elapsed:.4f}':>18} "
+              f"{f'{len(table)} -> {len(reduced_table)}':>14}")
+
+
+def bench_pattern_set(rules_count: int, changes: int, lines_count: int):
+    # Rule changes on a live set against rebuilding it, and matching with warm shard caches
+    rng = random.Random(rules_count)
+    rules = [f"{_keyword(i)}(a|b|c)*{rng.choice('abc')}(a|b)?" for i in range(rules_count)]
+    lines = [_keyword(rng.randrange(rules_count)) + "".join(rng.choice("abc") for _ in range(rng.randint(0, 24)))
+             for _ in range(lines_count)]
+    size = sum(len(line) for line in lines)
+
+    patterns, build_elapsed = _timed(PatternSet, rules)
+    start = time.perf_counter()
+    for i in range(changes):
+        patterns.remove(patterns.add(f"{_keyword(rules_count + i)}(a|c)*b"))
+    incremental = (time.perf_counter() - start) / changes
+    _, rebuild = _timed(PatternSet, rules + [f"{_keyword(rules_count)}(a|c)*b"])
+    print(f"rules={rules_count} shards={patterns.shards} build={build_elapsed:.3f}s "
+          f"change={incremental * 1000:.2f}ms rebuild={rebuild * 1000:.1f}ms")
+
+    print(f"{'matcher':<24} {'matches':>10} {'seconds':>10} {'Msym/s':>10}")
+    dfas = [DFA.from_regex(rule) for rule in rules]
+    cases = [
+        ("every DFA", lambda: sum(dfa.test(line) for line in lines for dfa in dfas)),
+        ("PatternSet cold", lambda: sum(len(matched) for matched in PatternSet(rules).match_batch(lines))),
+        ("PatternSet warm", lambda: sum(len(matched) for matched in patterns.match_batch(lines))),
+    ]
+    patterns.match_batch(lines)
+    for name, run in cases:
+        matched, elapsed = _timed(run)
+        print(f"{name:<24} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f}")
+
+
+def bench_cache(lines_count: int, distinct: int, regex: str):
+    # Traffic that repeats user-agent-like strings with a Zipf skew, plus a share of one-off inputs
+    dfa = DFA.from_regex(regex)
+    rng = random.Random(lines_count)
+    agents = ["".join(rng.choice("abcdef") for _ in range(rng.randint(40, 120))) for _ in range(distinct)]
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    lines = [agent if rng.random() < 0.9 else agent + rng.choice("abcdef")
+             for agent in rng.choices(agents, weights, k=lines_count)]
+    size = sum(len(line) for line in lines)
+
+    print(f"{'matcher':<32} {'matched':>10} {'seconds':>10} {'Msym/s':>10} {'hit rate':>9}")
+    for name, matcher in [("DFA", dfa), ("CachedMatcher 64KiB", CachedMatcher(dfa, 1 << 16)),
+                          ("CachedMatcher 1MiB", CachedMatcher(dfa))]:
+        for method in ("test", "test_batch"):
+            run = (lambda: sum(matcher.test_batch(lines))) if method == "test_batch" \
+                else (lambda: sum(matcher.test(line) for line in lines))
+            if isinstance(matcher, CachedMatcher):
+                matcher.clear()
+                matcher.hits = matcher.misses = matcher.bypassed = 0
+            matched, elapsed = _timed(run)
+            hit_rate = f"{matcher.hit_rate:>9.3f}" if isinstance(matcher, CachedMatcher) else f"{'-':>9}"
+            print(f"{name + ' ' + method:<32} {matched:>10} {elapsed:>10.4f} {size / elapsed / 1e6:>10.2f} {hit_rate}")
+
+
+def bench_complexity(sizes: list[int]):
+    # Estimated against actual subset construction states, per benchmark family; sizes whose estimate
+    # is past the lazy limit are not built
+    families = [
+        ("(a|b)*a(a|b)^k", lambda k: "(a|b)*a" + "(a|b)" * k),
+        ("(a|b)*a(c|d)^k", lambda k: "(a|b)*a" + "(c|d)" * k),
+        ("(a|b)*(ab)^k", lambda k: "(a|b)*" + "ab" * k),
+        ("keywords x16", lambda k: "|".join(_keyword(i) for i in range(16 * k))),
+    ]
+    print(f"{'family':<16} {'k':>3} {'nfa':>7} {'estimate':>10} {'actual':>8} {'bound':>10} {'engine':>9} "
+          f"{'estimate s':>11} {'build s':>9}")
+    for name, family in families:
+        for size in sizes:
+            regex = family(size)
+            result, estimate_elapsed = _timed(estimate, regex)
+            actual, build_elapsed = "-", 0.0
+            if result.engine != "nfa":
+                (table, _), build_elapsed = _timed(nfa_to_dfa, RegexToNFAConverter(regex).parse())
+                actual = len(table)
+            bound = result.dfa_upper_bound
+            bound = str(bound) if bound < 10 ** 9 else f"2^{bound.bit_length() - 1}"
+            print(f"{name:<16} {size:>3} {result.nfa_states:>7} {result.dfa_estimate:>10} {actual:>8} {bound:>10} "
+                  f"{result.engine:>9} {estimate_elapsed:>11.5f} {build_elapsed:>9.3f}")
+
+
+def bench_determinize(sizes: list[int], workers: list[int]):
+    # (a|b)*a(a|b)^k needs 2^(k+1) DFA states
+    print(f"{'k':>4} {'states':>8} {'sequential':>11} " + " ".join(f"{f'{count} workers':>11}" for count in workers))
+    for size in sizes:
+        regex = "(a|b)*a" + "(a|b)" * size
+        (table, _), sequential = _timed(nfa_to_dfa, RegexToNFAConverter(regex).parse())
+        timings = []
+        for count in workers:
+            _, elapsed = _timed(nfa_to_dfa_parallel, RegexToNFAConverter(regex).parse(), count)
+            timings.append(f"{elapsed:.3f} {sequential / elapsed:.1f}x")
+        print(f"{size:>4} {len(table):>8} {sequential:>11.3f} " + " ".join(f"{timing:>11}" for timing in timings))
+    print(f"cpu count: {os.cpu_count()}")
+
+
+def _import_seconds(code: str, runs: int) -> float:
+    # Module import time measured inside a fresh interpreter, so nothing is cached between runs
+    timer = f"import time; _start = time.perf_counter(); {code}; print(time.perf_counter() - _start)"
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", timer], capture_output=True, text=True, cwd=cwd, check=True)
+        samples.append(float(result.stdout))
+    return statistics.median(samples)
+
+
+def bench_import(runs: int):
+    cases = [
+        ("dfa (graphviz blocked)", "import sys; sys.modules['graphviz'] = None; import dfa"),
+        ("cli (graphviz blocked)", "import sys; sys.modules['graphviz'] = None; import cli"),
+        ("dfa", "import dfa"),
+        ("dfa + graphviz", "import dfa, graphviz"),
+    ]
+    print(f"{'imports':<26} {'median ms':>10}")
+    for name, code in cases:
+        try:
+            seconds = _import_seconds(code, runs)
+        except subprocess.CalledProcessError:
+            print(f"{name:<26} {'n/a':>10}")
+            continue
+        print(f"{name:<26} {seconds * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matcher benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parse_parser = subparsers.add_parser("parse", help="tokenizer and shunting-yard on large alternations")
+    parse_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    words_parser = subparsers.add_parser("words", help="minimal acyclic DFA from sorted word lists")
+    words_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+
+    search_parser = subparsers.add_parser("search", help="line filtering with and without literal prefilter")
+    search_parser.add_argument("--lines", type=int, default=20000)
+    search_parser.add_argument("--regex", default="(a|b)*errorc+")
+
+    tables_parser = subparsers.add_parser("tables", help="memory of dict, dense and compressed transition tables")
+    tables_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+
+    sharing_parser = subparsers.add_parser("sharing", help="rule sets compiled with and without subtree sharing")
+    sharing_parser.add_argument("--rules", type=int, default=50)
+
+    bytes_parser = subparsers.add_parser("bytes", help="UTF-8 byte DFA against decode-then-match")
+    bytes_parser.add_argument("--lines", type=int, default=100000)
+    bytes_parser.add_argument("--regex", default="(kw)?(a|b|c|d)*abc(a|b|c|d)*")
+
+    events_parser = subparsers.add_parser("events", help="integer event sequences against the dict DFA")
+    events_parser.add_argument("--sequences", type=int, default=100000)
+    events_parser.add_argument("--regex", default="(<1>|<2>|<3>|<4>|<5>)*<5>")
+
+    prefixes_parser = subparsers.add_parser("prefixes", help="batches with shared prefixes, trie walk against replay")
+    prefixes_parser.add_argument("--strings", type=int, default=100000)
+    prefixes_parser.add_argument("--regex", default="(a|b|c|d|e)*(ace|bd)")
+
+    layout_parser = subparsers.add_parser("layout", help="dense tables before and after profile-guided relayout")
+    layout_parser.add_argument("--words", type=int, default=200000)
+    layout_parser.add_argument("--lines", type=int, default=200000)
+
+    tiered_parser = subparsers.add_parser("tiered", help="first answer of tiered compilation against a full compile")
+    tiered_parser.add_argument("--regexes", nargs="+",
+                               default=["(a|b)*abb", "(a|b)*a(a|b)(a|b)(a|b)(a|b)(a|b)", "(a|b|c|d)*abcd(a|b)*"])
+
+    reduce_parser = subparsers.add_parser("reduce", help="NFA size and determinization time before and after reduction")
+    reduce_parser.add_argument("--windows", type=int, nargs="+", default=[6, 9, 12])
+    reduce_parser.add_argument("--keywords", type=int, nargs="+", default=[100, 300])
+
+    patterns_parser = subparsers.add_parser("patternset", help="incremental rule changes against full rebuilds")
+    patterns_parser.add_argument("--rules", type=int, default=200)
+    patterns_parser.add_argument("--changes", type=int, default=50)
+    patterns_parser.add_argument("--lines", type=int, default=20000)
+
+    cache_parser = subparsers.add_parser("cache", help="LRU verdict cache on repetitive traffic")
+    cache_parser.add_argument("--lines", type=int, default=200000)
+    cache_parser.add_argument("--distinct", type=int, default=20000)
+    cache_parser.add_argument("--regex", default="(a|b|c|d|e|f)*(abc|fed)(a|b|c|d|e|f)")
+
+    complexity_parser = subparsers.add_parser("complexity", help="estimated against actual DFA sizes")
+    complexity_parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 12, 16, 24])
+
+    determinize_parser = subparsers.add_parser("determinize", help="sequential and parallel subset construction")
+    determinize_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 12, 14])
+    determinize_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+
+    import_parser = subparsers.add_parser("import", help="import time of the matching modules")
+    import_parser.add_argument("--runs", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.benchmark == "parse":
+        bench_parse(args.sizes)
+    elif args.benchmark == "words":
+        bench_words(args.sizes)
+    elif args.benchmark == "search":
+        bench_search(args.lines, args.regex)
+    elif args.benchmark == "tables":
+        bench_tables(args.sizes)
+    elif args.benchmark == "sharing":
+        bench_sharing(args.rules)
+    elif args.benchmark == "bytes":
+        bench_bytes(args.lines, args.regex)
+    elif args.benchmark == "events":
+        bench_events(args.sequences, args.regex)
+    elif args.benchmark == "prefixes":
+        bench_prefixes(args.strings, args.regex)
+    elif args.benchmark == "layout":
+        bench_layout(args.words, args.lines)
+    elif args.benchmark == "tiered":
+        bench_tiered(args.regexes)
+    elif args.benchmark == "reduce":
+        bench_reduce(args.windows, args.keywords)
+    elif args.benchmark == "patternset":
+        bench_pattern_set(args.rules, args.changes, args.lines)
+    elif args.benchmark == "cache":
+        bench_cache(args.lines, args.distinct, args.regex)
+    elif args.benchmark == "complexity":
+        bench_complexity(args.sizes)
+    elif args.benchmark == "determinize":
+        bench_determinize(args.sizes, args.workers)
+    elif args.benchmark == "import":
+        bench_import(args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+# Units of work between two looks at the clock, the cancellation flag and the progress callback
+CHECK_INTERVAL = 64
+
+
+class CompilationCancelled(Exception):
+    pass
+
+
+class CompilationBudget:
+    # Cooperative limit for subset construction and minimization: the loops report their units of work
+    # ("subsets" explored, reverse "transitions" built, "pairs" scanned, "refinements" of the partition,
+    # "components" assigned) and every check_interval units the budget raises CompilationCancelled once
+    # cancelled or past the deadline. Everything built so far is only referenced from the aborted frames,
+    # so it is freed with the exception
+
+    def __init__(self, timeout: Optional[float] = None, progress: Optional[Callable[[str, int], None]] = None,
+                 check_interval: int = CHECK_INTERVAL):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.progress = progress
+        self.check_interval = check_interval
+        self.counts: Counter = Counter()
+        self._cancelled = threading.Event()
+        self._until_check = check_interval
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        # Safe to call from any thread, the compiling thread stops at its next check
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise CompilationCancelled("compilation cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise CompilationCancelled("compilation deadline exceeded")
+
+    def step(self, stage: str, count: int = 1):
+        self.counts[stage] += count
+        self._until_check -= count
+        if self._until_check <= 0:
+            self._until_check = self.check_interval
+            self.check()
+            if self.progress is not None:
+                self.progress(stage, self.counts[stage])
@@ -0,0 +1,311 @@
+import itertools
+from collections import deque
+from typing import Optional
+
+from converter import RegexToNFAConverter
+from converter import check_symbol
+from nfa import EPSILON
+from nfa import NFA
+from nfa import Tag
+from nfa import char
+from nfa import concat
+from nfa import epsilon
+from nfa import group
+from nfa import plus
+from nfa import rep
+from nfa import union
+from search import Searcher
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS, GROUP
+
+# Span of every group, group 0 is the whole match and None marks a group that did not participate
+Spans = tuple[Optional[tuple[int, int]], ...]
+
+# Cached transitions of the lazily built tagged DFA, the cache is dropped when it grows past this
+CACHE_LIMIT = 10000
+
+_UNSET = -1
+
+
+def _subpattern_nfa(converter: RegexToNFAConverter) -> NFA:
+    # converter.parse() with every subpattern (element of a concatenation, alternative, repeated or
+    # optional operand) wrapped in a pair of tags numbered after the capture groups. The tags give
+    # every position in the NFA a nesting height, which the POSIX comparison of threads runs on
+    slots = itertools.count(converter.groups + 1)
+    # Entries are (fragment, whether it is a concatenation whose elements are wrapped already)
+    stack: list[tuple[NFA, bool]] = []
+
+    def wrapped(entry: tuple[NFA, bool]) -> NFA:
+        return group(entry[0], next(slots))
+
+    for token_id, (kind, value) in enumerate(converter.tokens):
+        if kind == CONCAT:
+            second = stack.pop()
+            first = stack.pop()
+            # Concatenations are flattened: a(b)c has three subpatterns, not ab and c
+            stack.append((concat(first[0] if first[1] else wrapped(first),
+                                 second[0] if second[1] else wrapped(second)), True))
+        elif kind == UNION:
+            second = stack.pop()
+            first = stack.pop()
+            # The left alternative gets the lower slot, which is how ties between alternatives are broken
+            stack.append((union(wrapped(first), wrapped(second)), False))
+        elif kind == OPT:
+            operand = wrapped(stack.pop())
+            stack.append((union(operand, wrapped((epsilon(), False))), False))
+        elif kind == STAR:
+            stack.append((rep(wrapped(stack.pop())), False))
+        elif kind == PLUS:
+            stack.append((plus(wrapped(stack.pop())), False))
+        elif kind == GROUP:
+            stack.append((group(stack.pop()[0], int(value)), False))
+        elif kind == SYMBOL:
+            stack.append((char(check_symbol(value, converter.tokens, token_id)), False))
+    return stack.pop()[0]
+
+
+def _height(slot: int) -> int:
+    # Even slots open a subpattern, odd slots close it
+    return -1 if slot % 2 else 1
+
+
+def _lowest(path: tuple[int, ...], start: int, height: int) -> int:
+    lowest = height
+    for slot in path[start:]:
+        height += _height(slot)
+        lowest = min(lowest, height)
+    return lowest
+
+
+def _fork(first: tuple[int, ...], second: tuple[int, ...], height: int) -> tuple[int, int, bool]:
+    # Okui and Suzuki's POSIX order of two paths that leave one state and reach one state. After the first
+    # tag where they differ, the path that closes a lower (outer) subpattern ends that subpattern sooner
+    # and loses. At equal heights: the path with fewer tags wins, a closing tag beats an opening one (no
+    # empty iteration), and of two opening tags the lower slot is the left alternative.
+    # Returns the lowest height each path reaches after the fork and whether the first one wins
+    common = 0
+    while common < len(first) and common < len(second) and first[common] == second[common]:
+        height += _height(first[common])
+        common += 1
+    lowest_first = _lowest(first, common, height)
+    lowest_second = _lowest(second, common, height)
+    if lowest_first != lowest_second:
+        return lowest_first, lowest_second, lowest_first > lowest_second
+    if common == len(first) or common == len(second):
+        return lowest_first, lowest_second, common == len(first)
+    if first[common] % 2 != second[common] % 2:
+        return lowest_first, lowest_second, first[common] % 2 == 1
+    return lowest_first, lowest_second, first[common] < second[common]
+
+
+class TaggedNFA:
+    # Thompson NFA of the regex with tag transitions around every capture group and every subpattern,
+    # flattened to arrays
+
+    def __init__(self, nfa: NFA, groups: int):
+        self.groups = groups
+        index = {nfa.in_state: 0}
+        order = [nfa.in_state]
+        queue = deque(order)
+        while queue:
+            state = queue.popleft()
+            for targets in state.transition_map.values():
+                for target in targets:
+                    if target not in index:
+                        index[target] = len(order)
+                        order.append(target)
+                        queue.append(target)
+
+        self.start = 0
+        self.accept = index[nfa.out_state]
+        # Per state: ε-edges as (target, tag slot or _UNSET) and symbol edges as symbol -> targets
+        self.epsilons: list[list[tuple[int, int]]] = []
+        self.moves: list[dict[str, list[int]]] = []
+        for state in order:
+            epsilons = []
+            moves = {}
+            for symbol, targets in state.transition_map.items():
+                if isinstance(symbol, Tag):
+                    epsilons.extend((index[target], symbol.slot) for target in targets)
+                elif symbol == EPSILON:
+                    epsilons.extend((index[target], _UNSET) for target in targets)
+                elif targets:
+                    moves[symbol] = [index[target] for target in targets]
+            self.epsilons.append(epsilons)
+            self.moves.append(moves)
+
+        # Nesting height of every state: the number of subpatterns open there
+        self.heights = [0] * len(order)
+        queue = deque([self.start])
+        reached = {self.start}
+        while queue:
+            state = queue.popleft()
+            targets = [(target, 0) for targets in self.moves[state].values() for target in targets]
+            targets += [(target, 0 if tag == _UNSET else _height(tag)) for target, tag in self.epsilons[state]]
+            for target, change in targets:
+                if target not in reached:
+                    reached.add(target)
+                    self.heights[target] = self.heights[state] + change
+                    queue.append(target)
+        self._closures: dict[int, tuple[tuple[int, tuple[int, ...]], ...]] = {}
+
+    def closure(self, state: int) -> tuple[tuple[int, tuple[int, ...]], ...]:
+        # States with symbol edges (or the accepting one) reachable over ε-edges, each with the tags of the
+        # best path there. A path that goes around an ε-cycle never beats the same path without the cycle
+        cached = self._closures.get(state)
+        if cached is not None:
+            return cached
+        height = self.heights[state]
+        best = {state: ()}
+        stack = [state]
+        while stack:
+            current = stack.pop()
+            path = best[current]
+            for target, tag in self.epsilons[current]:
+                extended = path if tag == _UNSET else path + (tag,)
+                known = best.get(target)
+                if known is None or (extended != known and _fork(extended, known, height)[2]):
+                    best[target] = extended
+                    stack.append(target)
+        self._closures[state] = tuple((current, path) for current, path in best.items()
+                                      if self.moves[current] or current == self.accept)
+        return self._closures[state]
+
+
+class _Step:
+    # One transition of the lazily built tagged DFA: for every reached NFA state, the (source thread, tags)
+    # options that lead to it. Which option wins depends on how the source threads compare, known only
+    # while matching
+
+    def __init__(self, nfa: TaggedNFA, sources: list[tuple[int, list[int]]]):
+        # sources: (height, targets of the symbol edges) of every thread
+        candidates: dict[int, list[tuple[int, tuple[int, ...]]]] = {}
+        self.heights = []
+        for source, (height, targets) in enumerate(sources):
+            self.heights.append(height)
+            for target in targets:
+                for state, path in nfa.closure(target):
+                    options = candidates.setdefault(state, [])
+                    if (source, path) not in options:
+                        options.append((source, path))
+        self.key = tuple(sorted(candidates))
+        self.options = tuple(tuple(candidates[state]) for state in self.key)
+        width = 2 * nfa.groups + 2
+        # Per option: the capture tags it sets and the lowest height on its path
+        self.tags = {option: tuple(slot for slot in option[1] if slot < width)
+                     for options in self.options for option in options}
+        self.lowest = {option: _lowest(option[1], 0, self.heights[option[0]])
+                       for options in self.options for option in options}
+        self._forks: dict[tuple, tuple[int, int, bool]] = {}
+
+    def compare(self, first: tuple, second: tuple, order: list[list[tuple[int, int, bool]]]) -> tuple[int, int, bool]:
+        # Lowest heights since the two threads forked, and whether the first one is preferred
+        if first[0] == second[0]:
+            fork = self._forks.get((first, second))
+            if fork is None:
+                fork = self._forks[(first, second)] = _fork(first[1], second[1], self.heights[first[0]])
+            return fork
+        lowest_first, lowest_second, first_wins = order[first[0]][second[0]]
+        lowest_first = min(lowest_first, self.lowest[first])
+        lowest_second = min(lowest_second, self.lowest[second])
+        if lowest_first != lowest_second:
+            first_wins = lowest_first > lowest_second
+        return lowest_first, lowest_second, first_wins
+
+    def apply(self, vectors: list[list[int]], order: list[list[tuple[int, int, bool]]],
+              position: int) -> tuple[list[list[int]], list[list[tuple[int, int, bool]]]]:
+        chosen = []
+        for options in self.options:
+            best = options[0]
+            for option in options[1:]:
+                if self.compare(option, best, order)[2]:
+                    best = option
+            chosen.append(best)
+
+        result = []
+        for option in chosen:
+            vector = vectors[option[0]]
+            tags = self.tags[option]
+            if tags:
+                # Copy on write, threads without new tags share their source vector
+                vector = vector.copy()
+                for tag in tags:
+                    vector[tag] = position
+            result.append(vector)
+
+        # Pairwise state of the new threads, Okui and Suzuki's matrices
+        count = len(chosen)
+        new_order = [[None] * count for _ in range(count)]
+        for i in range(count):
+            for j in range(i + 1, count):
+                lowest_i, lowest_j, i_wins = self.compare(chosen[i], chosen[j], order)
+                new_order[i][j] = (lowest_i, lowest_j, i_wins)
+                new_order[j][i] = (lowest_j, lowest_i, not i_wins)
+        return result, new_order
+
+
+class CaptureMatcher:
+    # Submatch extraction without backtracking. The minimal DFA decides whether and where the regex matches
+    # (leftmost-longest), then a tagged DFA over that span recovers the group offsets. The tagged DFA is
+    # built lazily from the tagged NFA: its states are sets of NFA states, its transitions carry which
+    # thread each NFA state comes from and which tags it sets, so matching stays linear in the input.
+    # Groups follow POSIX: every subpattern from left to right, and every iteration of a repeat in turn,
+    # matches the longest string it can. A group in a repeat reports its last iteration, as in re
+
+    def __init__(self, regex: str):
+        self.regex = regex
+        self.searcher = Searcher(regex)
+        converter = RegexToNFAConverter(regex, captures=True)
+        self.groups = converter.groups
+        self.nfa = TaggedNFA(_subpattern_nfa(converter), self.groups)
+        self._initial = _Step(self.nfa, [(self.nfa.heights[self.nfa.start], [self.nfa.start])])
+        self._cache: dict[tuple[tuple[int, ...], str], _Step] = {}
+
+    def _step(self, key: tuple[int, ...], symbol: str) -> _Step:
+        step = self._cache.get((key, symbol))
+        if step is None:
+            nfa = self.nfa
+            step = _Step(nfa, [(nfa.heights[state], nfa.moves[state].get(symbol, ())) for state in key])
+            if len(self._cache) >= CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[(key, symbol)] = step
+        return step
+
+    def _spans(self, text: str, start: int, end: int) -> Optional[Spans]:
+        initial = [_UNSET] * (2 * self.groups + 2)
+        initial[0] = start
+        step = self._initial
+        vectors, order = step.apply([initial], [[None]], start)
+        for position in range(start, end):
+            step = self._step(step.key, text[position])
+            if not step.key:
+                return None
+            vectors, order = step.apply(vectors, order, position + 1)
+
+        key = step.key
+        if self.nfa.accept not in key:
+            return None
+        vector = vectors[key.index(self.nfa.accept)].copy()
+        vector[1] = end
+        return tuple(
+            None if vector[2 * number] == _UNSET or vector[2 * number + 1] == _UNSET
+            else (vector[2 * number], vector[2 * number + 1])
+            for number in range(self.groups + 1)
+        )
+
+    def fullmatch(self, text: str) -> Optional[Spans]:
+        if not self.searcher.dfa.test(text):
+            return None
+        return self._spans(text, 0, len(text))
+
+    def search(self, text: str) -> Optional[Spans]:
+        span = self.searcher.search(text)
+        if span is None:
+            return None
+        return self._spans(text, *span)
+
+    def groups_of(self, text: str, search: bool = False) -> Optional[tuple[Optional[str], ...]]:
+        # Matched substrings of groups 1..n, like re.Match.groups()
+        spans = self.search(text) if search else self.fullmatch(text)
+        if spans is None:
+            return None
+        return tuple(None if span is None else text[span[0]:span[1]] for span in spans[1:])
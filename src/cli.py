@@ -0,0 +1,214 @@
+import argparse
+import mmap
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Optional
+
+from search import Searcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+class LineMatcher:
+
+    def __init__(self, regex: str, search: bool = False, invert: bool = False):
+        self.searcher = Searcher(regex)
+        self.search = search
+        self.invert = invert
+
+    def __call__(self, line: bytes) -> bool:
+        line = line.rstrip(b"\r\n")
+        if self.search:
+            matched = self.searcher.search(line) is not None
+        else:
+            matched = self.searcher.fullmatch(line)
+        return matched != self.invert
+
+
+class ScanResult:
+
+    def __init__(self):
+        self.lines = 0
+        self.matched = 0
+        self.size = 0
+        self.prefilter_checked = 0
+        self.prefilter_candidates = 0
+        # Output collected by worker processes, written by the parent in shard order
+        self.output = b""
+
+    def merge(self, other: "ScanResult"):
+        self.lines += other.lines
+        self.matched += other.matched
+        self.size += other.size
+        self.prefilter_checked += other.prefilter_checked
+        self.prefilter_candidates += other.prefilter_candidates
+
+
+def load_patterns(path: str) -> str:
+    with open(path, encoding="utf-8") as file:
+        patterns = [line.rstrip("\r\n") for line in file]
+    patterns = [pattern for pattern in patterns if pattern]
+    if not patterns:
+        raise ValueError(f"no patterns in {path}")
+    return "|".join(f"({pattern})" for pattern in patterns)
+
+
+def scan_lines(lines: Iterable[bytes], matcher: LineMatcher, mode: str, out: Optional[BinaryIO] = None) -> ScanResult:
+    result = ScanResult()
+    stats = matcher.searcher.stats
+    checked, candidates = stats.checked, stats.candidates
+    output = []
+    for line in lines:
+        result.lines += 1
+        result.size += len(line)
+        matched = matcher(line)
+        if matched:
+            result.matched += 1
+        if mode == "lines":
+            if matched:
+                output.append(line if line.endswith(b"\n") else line + b"\n")
+        elif mode == "verdicts":
+            output.append(b"1\n" if matched else b"0\n")
+        if out is not None and len(output) >= 1024:
+            out.writelines(output)
+            output.clear()
+
+    if out is not None:
+        out.writelines(output)
+    else:
+        result.output = b"".join(output)
+    result.prefilter_checked = stats.checked - checked
+    result.prefilter_candidates = stats.candidates - candidates
+    return result
+
+
+def _mmap_lines(buffer: mmap.mmap, start: int, end: int) -> Iterable[bytes]:
+    find = buffer.find
+    position = start
+    while position < end:
+        newline = find(b"\n", position, end)
+        stop = end if newline == -1 else newline + 1
+        yield buffer[position:stop]
+        position = stop
+
+
+def _shard_bounds(buffer: mmap.mmap, size: int, shards: int) -> list[tuple[int, int]]:
+    # Split points are moved forward to the next line start so no line is cut in two
+    bounds = [0]
+    for shard in range(1, shards):
+        point = max(bounds[-1], size * shard // shards)
+        if point > 0 and buffer[point - 1:point] != b"\n":
+            newline = buffer.find(b"\n", point)
+            point = size if newline == -1 else newline + 1
+        bounds.append(point)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+_worker_matcher: Optional[LineMatcher] = None
+
+
+def _init_worker(matcher: LineMatcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+
+
+def _scan_shard(path: str, start: int, end: int, mode: str) -> ScanResult:
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return scan_lines(_mmap_lines(buffer, start, end), _worker_matcher, mode)
+
+
+def scan_file(path: str, matcher: LineMatcher, mode: str, out: BinaryIO,
+              executor: Optional["ProcessPoolExecutor"] = None, shards: int = 1) -> ScanResult:
+    size = os.path.getsize(path)
+    if size == 0:
+        return ScanResult()
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if executor is None or shards <= 1:
+            return scan_lines(_mmap_lines(buffer, 0, size), matcher, mode, out)
+        bounds = _shard_bounds(buffer, size, shards)
+
+    total = ScanResult()
+    futures = [executor.submit(_scan_shard, path, start, end, mode) for start, end in bounds]
+    for future in futures:
+        result = future.result()
+        out.write(result.output)
+        total.merge(result)
+    return total
+
+
+def run(args: argparse.Namespace, stdin: BinaryIO, out: BinaryIO, err) -> int:
+    try:
+        regex = load_patterns(args.pattern_file) if args.pattern_file else args.regex
+        matcher = LineMatcher(regex, search=args.search, invert=args.invert)
+    except (ValueError, OSError) as error:
+        err.write(f"error: {error}\n")
+        return 2
+    except RecursionError:
+        # The NFA is walked recursively, very long patterns run out of stack
+        err.write("error: pattern too long or too deeply nested to compile\n")
+        return 2
+
+    start = time.perf_counter()
+    total = ScanResult()
+    executor = None
+    if args.jobs > 1:
+        # Imported here, the process pool machinery is not needed for single-process runs
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(matcher,))
+    try:
+        for path in args.files or ["-"]:
+            if path == "-":
+                total.merge(scan_lines(stdin, matcher, args.mode, out))
+            else:
+                total.merge(scan_file(path, matcher, args.mode, out, executor, args.jobs))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if args.mode == "count":
+        out.write(f"{total.matched}\n".encode())
+    out.flush()
+
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        lines_rate = total.lines / elapsed if elapsed else 0.0
+        megabytes_rate = total.size / elapsed / 1e6 if elapsed else 0.0
+        err.write(f"{total.lines} lines, {total.matched} matched, {total.size} bytes in {elapsed:.3f}s "
+                  f"({lines_rate:.0f} lines/s, {megabytes_rate:.2f} MB/s)\n")
+        if total.prefilter_checked:
+            hit_rate = total.prefilter_candidates / total.prefilter_checked
+            err.write(f"prefilter {list(matcher.searcher.prefilter.literals)}: hit rate {hit_rate:.3f}\n")
+    return 0 if total.matched else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Filter lines with a regular expression")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-e", "--regex", help="regular expression")
+    source.add_argument("-f", "--pattern-file", help="file with one regular expression per line")
+    parser.add_argument("files", nargs="*", help="input files, '-' or nothing for stdin")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-c", "--count", dest="mode", action="store_const", const="count",
+                        help="print only the number of matching lines")
+    output.add_argument("--verdicts", dest="mode", action="store_const", const="verdicts",
+                        help="print 1 or 0 for every input line")
+    parser.set_defaults(mode="lines")
+    parser.add_argument("-s", "--search", action="store_true",
+                        help="match anywhere in the line instead of the whole line")
+    parser.add_argument("-v", "--invert", action="store_true", help="select non-matching lines")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for file shards")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report throughput on exit")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return run(args, sys.stdin.buffer, sys.stdout.buffer, sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
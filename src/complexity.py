@@ -0,0 +1,182 @@
+from collections import Counter
+from typing import Optional
+
+from shunting_yard import parse_symbol
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS
+
+# Full DFAs are built and minimized up to this many estimated states, table filling is quadratic in them
+DFA_STATE_LIMIT = 2000
+# Up to this many a lazy DFA caches the states the input visits, beyond it the cache would only thrash
+LAZY_STATE_LIMIT = 100000
+
+# Finite languages up to this many strings are tracked exactly, their DFA is about their prefix trie
+STRINGS_LIMIT = 4096
+
+# A loop followed by loopless items: (symbols of the loop, literal positions and class positions that
+# overlap them, positions that do not)
+_Tail = tuple[frozenset, int, int, int]
+
+
+class _Node:
+    __slots__ = ("nfa_states", "symbols", "length", "literals", "classes", "tail", "window",
+                 "strings", "_linear")
+
+    def __init__(self, nfa_states: int, symbols: frozenset, length: Optional[int],
+                 literals: int = 0, classes: int = 0, tail: Optional[_Tail] = None, window: int = 0,
+                 strings: Optional[set] = None, linear: int = 0):
+        self.nfa_states = nfa_states
+        self.symbols = symbols
+        # Longest string of a loopless subexpression, None once it contains a loop
+        self.length = length
+        # Loopless positions that match one symbol and positions that match several (classes, optionals)
+        self.literals = literals
+        self.classes = classes
+        self.tail = tail
+        # States the sliding windows inside need
+        self.window = window
+        # The language as tuples of symbols while it is small and finite. Every node is used once, so
+        # a union takes over the set of its first operand instead of copying it
+        self.strings = strings
+        self._linear = linear
+
+    @property
+    def linear(self) -> int:
+        # States without ambiguity: one per position, or the prefix trie of a finite language
+        if self.strings is not None:
+            return len({string[:end] for string in self.strings for end in range(1, len(string) + 1)})
+        return self._linear
+
+
+def _window_states(tail: _Tail) -> int:
+    # After a loop over S, a DFA state records which of the following positions are alive. A literal
+    # tail only has its prefixes (KMP), every class position doubles the combinations to remember
+    _, literals, classes, plain = tail
+    return (literals + 1) * 2 ** classes + plain
+
+
+def _extend(tail: _Tail, node: _Node) -> _Tail:
+    loop, literals, classes, plain = tail
+    if node.symbols & loop:
+        return loop, literals + node.literals, classes + node.classes, plain
+    return loop, literals, classes, plain + node.length
+
+
+def _concat(first: _Node, second: _Node) -> _Node:
+    tail = None
+    if second.tail is not None:
+        tail = second.tail
+    elif first.tail is not None and second.length is not None:
+        tail = _extend(first.tail, second)
+    length = None if first.length is None or second.length is None else first.length + second.length
+    strings = None
+    if first.strings is not None and second.strings is not None \
+            and len(first.strings) * len(second.strings) <= STRINGS_LIMIT:
+        strings = {left + right for left in first.strings for right in second.strings}
+    return _Node(
+        first.nfa_states + second.nfa_states, first.symbols | second.symbols,
+        length, first.literals + second.literals, first.classes + second.classes, tail,
+        max(first.window, second.window, _window_states(tail) if tail is not None else 0),
+        strings, 0 if strings is not None else first.linear + second.linear,
+    )
+
+
+def _union(first: _Node, second: _Node) -> _Node:
+    symbols = first.symbols | second.symbols
+    # Both branches run side by side, their windows add up
+    strings, linear = None, 0
+    if first.strings is not None and second.strings is not None \
+            and len(first.strings) + len(second.strings) <= STRINGS_LIMIT:
+        first.strings |= second.strings
+        strings = first.strings
+    else:
+        linear = first.linear + second.linear
+    node = _Node(first.nfa_states + second.nfa_states + 2, symbols, None,
+                 window=first.window + second.window, strings=strings, linear=linear)
+    if first.length is not None and second.length is not None:
+        node.length = max(first.length, second.length)
+        if first.length == second.length == 1:
+            node.classes = 1 if len(symbols) > 1 else 0
+        else:
+            node.classes = min(node.length, max(first.classes, second.classes) + 1)
+        node.literals = node.length - node.classes
+    return node
+
+
+def _repeat(fragment: _Node, kind: int) -> _Node:
+    if kind == OPT:
+        # Thompson: a union with an ε fragment of two states
+        strings = fragment.strings
+        if strings is not None:
+            strings.add(())
+        node = _Node(fragment.nfa_states + 4, fragment.symbols, fragment.length,
+                     window=fragment.window, strings=strings, linear=fragment.linear)
+        if fragment.length is not None:
+            node.classes = min(fragment.length, fragment.classes + 1)
+            node.literals = fragment.length - node.classes
+        return node
+    tail = (fragment.symbols, 0, 0, 0)
+    return _Node(fragment.nfa_states + 2, fragment.symbols, None, tail=tail,
+                 window=max(fragment.window, _window_states(tail)), linear=fragment.linear)
+
+
+class ComplexityEstimate:
+
+    def __init__(self, regex: str, nfa_states: int, positions: Counter, dfa_estimate: int):
+        self.regex = regex
+        # Exact state count of the Thompson NFA the converter builds
+        self.nfa_states = nfa_states
+        # Symbol transitions of the NFA per symbol
+        self.positions = positions
+        self.dfa_estimate = dfa_estimate
+
+    @property
+    def dfa_upper_bound(self) -> int:
+        # Every subset construction state but the initial one is the closure of the targets of one
+        # symbol, so it is a subset of that symbol's positions
+        return 1 + sum(2 ** count - 1 for count in self.positions.values())
+
+    @property
+    def engine(self) -> str:
+        # Fastest engine that is safe to build: full DFA, a lazy DFA or NFA simulation
+        states = min(self.dfa_estimate, self.dfa_upper_bound)
+        if states <= DFA_STATE_LIMIT:
+            return "dfa"
+        if states <= LAZY_STATE_LIMIT:
+            return "lazy_dfa"
+        return "nfa"
+
+    def __repr__(self) -> str:
+        return (f"ComplexityEstimate(nfa_states={self.nfa_states}, positions={sum(self.positions.values())}, "
+                f"dfa_estimate={self.dfa_estimate}, engine={self.engine!r})")
+
+
+def estimate(regex: str) -> ComplexityEstimate:
+    # One pass over the postfix form, linear in the regex, nothing is built
+    stack: list[_Node] = []
+    positions = Counter()
+    for kind, value in tokens_to_postfix(tokenize(regex)):
+        if kind == SYMBOL:
+            symbol = parse_symbol(value)
+            positions[symbol] += 1
+            stack.append(_Node(2, frozenset([symbol]), 1, literals=1, strings={(symbol,)}))
+        elif kind == CONCAT:
+            second = stack.pop()
+            stack.append(_concat(stack.pop(), second))
+        elif kind == UNION:
+            second = stack.pop()
+            stack.append(_union(stack.pop(), second))
+        elif kind in (STAR, PLUS, OPT):
+            stack.append(_repeat(stack.pop(), kind))
+    root = stack.pop()
+    return ComplexityEstimate(regex, root.nfa_states, positions, max(root.linear + 1, root.window))
+
+
+def check_complexity(regex: str, max_dfa_states: int = DFA_STATE_LIMIT) -> ComplexityEstimate:
+    # Refuses patterns whose DFA would likely explode before anything is built
+    result = estimate(regex)
+    if min(result.dfa_estimate, result.dfa_upper_bound) > max_dfa_states:
+        raise ValueError(f"pattern too complex: about {result.dfa_estimate} DFA states, "
+                         f"the limit is {max_dfa_states}")
+    return result
@@ -0,0 +1,143 @@
+import sys
+from array import array
+from typing import Iterable
+
+from dfa import DFA
+
+# Marks a free slot in the packed arrays and the dead state
+NO_STATE = -1
+
+
+class CompressedDFA:
+    # Row displacement (comb vector) storage: identical rows are stored once, and the distinct rows
+    # are overlapped in one packed array. Entry (state, symbol) lives at base[state] + column(symbol)
+    # and is valid only if check[] at that slot holds the row of the state, so lookup stays O(1).
+
+    def __init__(self, columns: dict, state_base: array, state_row: array, next_states: array, check: array,
+                 accepting: bytearray, initial_state: int, rows: int):
+        self.columns = columns
+        self.state_base = state_base
+        self.state_row = state_row
+        self.next_states = next_states
+        self.check = check
+        self.accepting = accepting
+        self.initial_state = initial_state
+        self.rows = rows
+
+    @classmethod
+    def from_dfa(cls, dfa: DFA) -> "CompressedDFA":
+        states = sorted(set(dfa.table) | {next_state for row in dfa.table.values() for next_state in row.values()})
+        index = {state: i for i, state in enumerate(states)}
+        symbols = sorted({symbol for row in dfa.table.values() for symbol in row}, key=str)
+        columns = {symbol: column for column, symbol in enumerate(symbols)}
+
+        # Identical rows share one entry in the packed arrays
+        row_ids: dict[tuple, int] = {}
+        state_row = array("i", [0] * len(states))
+        for state in states:
+            row = tuple(sorted((columns[symbol], index[next_state])
+                               for symbol, next_state in dfa.table.get(state, {}).items()))
+            state_row[index[state]] = row_ids.setdefault(row, len(row_ids))
+
+        bases, next_states, check = _pack(list(row_ids), len(symbols))
+        state_base = array("i", (bases[row] for row in state_row))
+        accepting = bytearray(len(states))
+        for state in dfa.accepts:
+            accepting[index[state]] = 1
+
+        return cls(columns, state_base, state_row, next_states, check, accepting,
+                   index[dfa.initial_state], len(row_ids))
+
+    def step(self, state: int, symbol) -> int:
+        column = self.columns.get(symbol)
+        if column is None:
+            return NO_STATE
+        slot = self.state_base[state] + column
+        if self.check[slot] != self.state_row[state]:
+            return NO_STATE
+        return self.next_states[slot]
+
+    def test(self, string: Iterable) -> bool:
+        columns = self.columns
+        state_base = self.state_base
+        state_row = self.state_row
+        next_states = self.next_states
+        check = self.check
+
+        state = self.initial_state
+        for symbol in string:
+            column = columns.get(symbol)
+            if column is None:
+                return False
+            slot = state_base[state] + column
+            if check[slot] != state_row[state]:
+                return False
+            state = next_states[slot]
+        return self.accepting[state] == 1
+
+    @property
+    def state_count(self) -> int:
+        return len(self.state_base)
+
+    @property
+    def transition_count(self) -> int:
+        return sum(1 for slot in self.check if slot != NO_STATE)
+
+    def memory_report(self) -> dict[str, float]:
+        arrays = (self.state_base, self.state_row, self.next_states, self.check)
+        # Both layouts need the symbol to column map and the accepting flags
+        shared = sys.getsizeof(self.columns) + len(self.accepting)
+        compressed = sum(len(values) * values.itemsize for values in arrays) + shared
+        dense = self.state_count * len(self.columns) * self.next_states.itemsize + shared
+        states = max(self.state_count, 1)
+        transitions = max(self.transition_count, 1)
+        return {
+            "states": self.state_count,
+            "distinct_rows": self.rows,
+            "symbols": len(self.columns),
+            "slots": len(self.next_states),
+            "compressed_bytes": compressed,
+            "dense_bytes": dense,
+            "compressed_bytes_per_state": compressed / states,
+            "dense_bytes_per_state": dense / states,
+            "compressed_bytes_per_transition": compressed / transitions,
+            "dense_bytes_per_transition": dense / transitions,
+        }
+
+
+def _pack(rows: list[tuple], width: int) -> tuple[list[int], array, array]:
+    # First-fit placement of the rows, densest first, into the shared next/check arrays
+    bases = [0] * len(rows)
+    next_states = array("i")
+    check = array("i")
+    first_free = 0
+
+    def grow(size: int):
+        missing = size - len(check)
+        if missing > 0:
+            next_states.extend([NO_STATE] * missing)
+            check.extend([NO_STATE] * missing)
+
+    for row_id in sorted(range(len(rows)), key=lambda row_id: -len(rows[row_id])):
+        row = rows[row_id]
+        if not row:
+            continue
+        while first_free < len(check) and check[first_free] != NO_STATE:
+            first_free += 1
+        base = max(0, first_free - row[0][0])
+        while any(base + column < len(check) and check[base + column] != NO_STATE for column, _ in row):
+            base += 1
+        grow(base + row[-1][0] + 1)
+        for column, next_state in row:
+            next_states[base + column] = next_state
+            check[base + column] = row_id
+        bases[row_id] = base
+
+    # Padding so base + column never runs past the end for rows placed near it
+    grow(max(bases, default=0) + width + 1)
+    return bases, next_states, check
+
+
+def dict_table_bytes(dfa: DFA) -> int:
+    # Approximate footprint of the dict-of-dicts table, keys and small ints are shared objects
+    return sys.getsizeof(dfa.table) + sum(sys.getsizeof(row) for row in dfa.table.values())
@@ -4,44 +4,64 @@ from nfa import plus
 from nfa import opt
 from nfa import union
 from nfa import concat
+from nfa import group
 
-from shunting_yard import infix_to_postfix
+from shunting_yard import RegexSyntaxError
+from shunting_yard import parse_symbol
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS, GROUP
 
 ALPHABET = "abcdefghijklmnopqrstuvwxyz"
 
 
+def check_symbol(value: str, tokens, token_id: int):
+    # Letters of ALPHABET, or integer event codes written <123>
+    symbol = parse_symbol(value)
+    if not isinstance(symbol, int) and symbol not in ALPHABET:
+        raise RegexSyntaxError(f"unsupported symbol '{value}'", tokens.position(token_id))
+    return symbol
+
+
 class RegexToNFAConverter:
-    def __init__(self, regex: str):
-        self.regex = infix_to_postfix(regex)
+    def __init__(self, regex: str, captures: bool = False):
+        # With captures every parenthesized group is wrapped in tag transitions (see nfa.group)
+        self.tokens = tokens_to_postfix(tokenize(regex), captures)
+        self.regex = self.tokens.text()
+        self.groups = self.tokens.kinds.count(GROUP)
 
     def parse(self):
         stack = []
 
-        for ch in self.regex:
-            if ch == ".":  # concatenation
+        for token_id, (kind, value) in enumerate(self.tokens):
+            if kind == CONCAT:
                 e2 = stack.pop()
                 e1 = stack.pop()
                 result = concat(e1, e2)
                 stack.append(result)
-            elif ch == "|":  # union
+            elif kind == UNION:
                 e2 = stack.pop()
                 e1 = stack.pop()
                 result = union(e1, e2)
                 stack.append(result)
-            elif ch == "?":  # zero or none - optional
+            elif kind == OPT:  # zero or none - optional
                 e = stack.pop()
                 result = opt(e)
                 stack.append(result)
-            elif ch == "*":
+            elif kind == STAR:
                 e = stack.pop()
                 result = rep(e)
                 stack.append(result)
-            elif ch == "+":
+            elif kind == PLUS:
                 e = stack.pop()
                 result = plus(e)
                 stack.append(result)
-            elif ch in ALPHABET:
-                e = char(ch)
+            elif kind == GROUP:
+                e = stack.pop()
+                result = group(e, int(value))
+                stack.append(result)
+            elif kind == SYMBOL:
+                e = char(check_symbol(value, self.tokens, token_id))
                 stack.append(e)
 
         return stack.pop() if stack else None
@@ -1,12 +1,20 @@
 from collections import defaultdict, deque
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence
 
-from graphviz import Digraph
-from typing_extensions import Self
+try:
+    from typing import Self
+except ImportError:  # Python < 3.11
+    from typing_extensions import Self
 
+from analysis import DFAAnalysis
+from analysis import analyze
 from nfa import NFA
 from nfa import nfa_to_dfa
-from src.converter import ALPHABET
+from converter import ALPHABET
+from converter import RegexToNFAConverter
+
+if TYPE_CHECKING:
+    from budget import CompilationBudget
 
 RawDFATable = dict[tuple[int, ...], dict[str, tuple[int, ...]]]
 RawAcceptingStates = set[tuple[int, ...]]
@@ -23,6 +31,8 @@ class DFA:
         self.table = table
         self.accepts = accepts
         self.initial_state = initial_state
+        # Filled in by build_min_dfa, lets matching reject by length and stop reading early
+        self.analysis: Optional[DFAAnalysis] = None
 
     @property
     def terms(self) -> list[str]:
@@ -34,16 +44,41 @@ class DFA:
         return terms
 
     @classmethod
-    def from_nfa(cls, nfa: NFA) -> Self:
+    def from_nfa(cls, nfa: NFA, workers: int = 1, budget: Optional["CompilationBudget"] = None) -> Self:
         dfa = DFA()
-        raw_dfa_table, raw_dfa_accepts = nfa_to_dfa(nfa)
+        if workers > 1:
+            from parallel_dfa import nfa_to_dfa_parallel
+
+            raw_dfa_table, raw_dfa_accepts = nfa_to_dfa_parallel(nfa, workers, budget)
+        else:
+            raw_dfa_table, raw_dfa_accepts = nfa_to_dfa(nfa, budget)
 
         dfa.table, dfa.accepts = relabel_dfa_states(raw_dfa_table, raw_dfa_accepts)
         dfa.initial_state = 0
         return dfa
 
+    @classmethod
+    def from_regex(cls, regex: str, minimize: bool = True, workers: int = 1,
+                   budget: Optional["CompilationBudget"] = None, reduce: bool = False) -> Self:
+        # A budget makes the compilation raise CompilationCancelled when cancelled or out of time,
+        # reduce shrinks the NFA before the subset construction
+        nfa = RegexToNFAConverter(regex).parse()
+        if reduce:
+            from nfa_reduction import reduce_nfa
+
+            nfa = reduce_nfa(nfa)
+        dfa = cls.from_nfa(nfa, workers, budget)
+        return dfa.build_min_dfa(budget) if minimize else dfa
+
     def test(self, string: str) -> bool:
-        current_state = 0
+        analysis = self.analysis
+        if analysis is not None:
+            if analysis.rejects_length(len(string)):
+                return False
+            if analysis.stop_states:
+                return self._test_until_stop(string, analysis)
+
+        current_state = self.initial_state
         for symbol in string:
             if symbol in self.table[current_state]:
                 current_state = self.table[current_state][symbol]
@@ -51,41 +86,95 @@ class DFA:
                 return False
         return current_state in self.accepts
 
-    def draw_graph(self, minimized: bool = False):
-        dot = Digraph()
-        dot.attr(rankdir='LR')
-
-        for state in self.table:
-            if state in self.accepts:
-                dot.node(str(state), str(state), shape='doublecircle')
+    def _test_until_stop(self, string: str, analysis: DFAAnalysis) -> bool:
+        table = self.table
+        stop_states = analysis.stop_states
+        current_state = self.initial_state
+        position = 0
+        if current_state not in stop_states:
+            for position, symbol in enumerate(string, 1):
+                transitions = table[current_state]
+                if symbol not in transitions:
+                    return False
+                current_state = transitions[symbol]
+                if current_state in stop_states:
+                    break
+            else:
+                return current_state in self.accepts
+
+        # Dead states never accept, from accept-forever states only symbols outside the alphabet can reject
+        if current_state in analysis.dead:
+            return False
+        return analysis.alphabet.issuperset(string[position:])
+
+    def test_batch(self, strings: Iterable[str]) -> list[bool]:
+        table = self.table
+        accepts = self.accepts
+        analysis = self.analysis
+        results = []
+        append = results.append
+        for string in strings:
+            if analysis is not None:
+                if analysis.rejects_length(len(string)):
+                    append(False)
+                    continue
+                if analysis.stop_states:
+                    append(self._test_until_stop(string, analysis))
+                    continue
+            current_state = self.initial_state
+            for symbol in string:
+                transitions = table[current_state]
+                if symbol in transitions:
+                    current_state = transitions[symbol]
+                else:
+                    append(False)
+                    break
             else:
-                dot.node(str(state), str(state), shape='circle')
+                append(current_state in accepts)
+        return results
 
-        dot.node('start', '', shape='none')  # invisible node
-        dot.edge('start', '0', '')
+    def test_prefix_batch(self, strings: Sequence[str]) -> list[bool]:
+        # test_batch for inputs with long common prefixes (URLs, paths): each shared prefix is read once
+        from prefix_batch import match_shared_prefixes
 
-        for state, paths in self.table.items():
-            for symbol, next_state in paths.items():
-                label = str(symbol)
-                dot.edge(str(state), str(next_state), label=label)
+        return match_shared_prefixes(self, strings)
 
-        if minimized:
-            dot.render("min_dfa_output", format="png", view=True)
-        else:
-            dot.render("dfa_output", format="png", view=True)
+    def cached(self, **options):
+        # test and test_batch behind a bounded LRU cache of verdicts, for traffic that repeats inputs
+        from result_cache import CachedMatcher
+
+        return CachedMatcher(self, **options)
 
-    def _build_reverse_transitions(self):
+    def generate(self, length: int, count: Optional[int] = None, accepted: bool = True,
+                 seed: Optional[int] = None) -> Iterator[str]:
+        # Uniformly sampled accepted strings, or near-miss rejected ones, produced lazily
+        from generate import StringGenerator
+
+        generator = StringGenerator(self, seed)
+        return generator.accepted(length, count) if accepted else generator.rejected(length, count)
+
+    def draw_graph(self, minimized: bool = False, view: bool = True):
+        from visualize import draw_dfa
+
+        draw_dfa(self, minimized=minimized, view=view)
+
+    def _build_reverse_transitions(self, budget=None):
         reverse_transitions = defaultdict(lambda: defaultdict(set))
+        terms = self.terms
         for state, transitions in self.table.items():
+            if budget is not None:
+                budget.step("transitions", len(terms))
             for symbol, next_state in transitions.items():
                 reverse_transitions[next_state][symbol].add(state)
         max_state = max(self.table.keys())
         aux_state_id = max_state + 1
         for state, transitions in self.table.items():
-            for key in self.terms:
+            if budget is not None:
+                budget.step("transitions", len(terms))
+            for key in terms:
                 if key not in transitions:
                     reverse_transitions[aux_state_id][key].add(state)
-        for key in self.terms:
+        for key in terms:
             reverse_transitions[aux_state_id][key].add(aux_state_id)
         return reverse_transitions
 
@@ -104,17 +193,22 @@ class DFA:
                     queue.append(next_state)
         return reachable
 
-    def _build_table(self, n, is_terminal, reverse_transitions):
+    def _build_table(self, n, is_terminal, reverse_transitions, budget=None):
         marked = [[False] * n for _ in range(n)]
         queue = deque()
 
         for i in range(n):
+            if budget is not None:
+                budget.step("pairs", n)
             for j in range(n):
                 if not marked[i][j] and is_terminal[i] != is_terminal[j]:
                     marked[i][j] = marked[j][i] = True
                     queue.append((i, j))
 
         while queue:
+            # Every distinguished pair splits the partition once and is propagated once
+            if budget is not None:
+                budget.step("refinements")
             u, v = queue.popleft()
             for symbol in self.terms:
                 for r in reverse_transitions[u][symbol]:
@@ -125,14 +219,14 @@ class DFA:
 
         return marked
 
-    def build_min_dfa(self) -> Self:
+    def build_min_dfa(self, budget: Optional["CompilationBudget"] = None) -> Self:
         n = len(self.table) + 1
         states = list(self.table.keys()) + [max(self.table.keys()) + 1]
         is_terminal = [self._is_terminal(state) for state in states]
-        reverse_transitions = self._build_reverse_transitions()
+        reverse_transitions = self._build_reverse_transitions(budget)
         reachable = self._reachable()
 
-        marked = self._build_table(n, is_terminal, reverse_transitions)
+        marked = self._build_table(n, is_terminal, reverse_transitions, budget)
 
         component = [-1] * n
         for i in range(n):
@@ -145,6 +239,8 @@ class DFA:
             if not reachable[i]:
                 continue
             if component[i] == -1:
+                if budget is not None:
+                    budget.step("components", n - i)
                 components_count += 1
                 component[i] = components_count
                 for j in range(i+1, n):
@@ -170,9 +266,61 @@ class DFA:
                 min_table[accept] = {}
 
         minimized_dfa = DFA(table=min_table, accepts=min_accepts, initial_state=min_initial_state)
+        minimized_dfa.analysis = analyze(minimized_dfa)
         return minimized_dfa
 
 
+class StreamMatcher:
+    # Matches input that arrives in chunks. Once the verdict can no longer change the DFA is not run:
+    # a dead state or too much input rejects, an accept-forever state only checks the symbols
+
+    def __init__(self, dfa: DFA):
+        self.dfa = dfa
+        self.analysis = dfa.analysis if dfa.analysis is not None else analyze(dfa)
+        self.state = dfa.initial_state
+        self.length = 0
+        self.rejected = self.analysis.min_length is None
+
+    @property
+    def accepting_forever(self) -> bool:
+        return not self.rejected and self.state in self.analysis.accept_forever
+
+    def feed(self, chunk: str) -> bool:
+        # Returns False once the input can no longer match, the rest of the stream may then be skipped
+        if self.rejected:
+            return False
+        self.length += len(chunk)
+        analysis = self.analysis
+        if analysis.max_length is not None and self.length > analysis.max_length:
+            self.rejected = True
+            return False
+        if self.state in analysis.accept_forever:
+            self.rejected = not analysis.alphabet.issuperset(chunk)
+            return not self.rejected
+
+        table = self.dfa.table
+        stop_states = analysis.stop_states
+        state = self.state
+        for position, symbol in enumerate(chunk, 1):
+            transitions = table[state]
+            if symbol not in transitions:
+                self.rejected = True
+                return False
+            state = transitions[symbol]
+            if state in stop_states:
+                self.state = state
+                if state in analysis.dead:
+                    self.rejected = True
+                    return False
+                self.rejected = not analysis.alphabet.issuperset(chunk[position:])
+                return not self.rejected
+        self.state = state
+        return True
+
+    def finish(self) -> bool:
+        return not self.rejected and self.state in self.dfa.accepts
+
+
 def relabel_dfa_states(
     dfa_table: RawDFATable,
     accepts: RawAcceptingStates
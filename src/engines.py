@@ -0,0 +1,240 @@
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Iterable, Optional
+
+from budget import CompilationBudget
+from budget import CompilationCancelled
+from complexity import LAZY_STATE_LIMIT
+from complexity import ComplexityEstimate
+from complexity import estimate
+from converter import RegexToNFAConverter
+from dfa import DFA
+from nfa import EPSILON
+from nfa import NFA
+from nfa import epsilon_closure_of_state
+from parallel_dfa import build_step_table
+from parallel_dfa import set_bits
+
+
+class NFASimulation:
+    # Thompson simulation: the active NFA states are a bitset, one step ORs the precomputed
+    # move-then-closure masks of the active states. Linear in input × NFA states, nothing to blow up
+
+    def __init__(self, nfa: NFA):
+        transition_table = nfa.get_full_transition_table()
+        symbols = list({symbol for transitions in transition_table.values() for symbol in transitions
+                        if symbol != EPSILON})
+        self.columns = {symbol: column for column, symbol in enumerate(symbols)}
+        self.steps = build_step_table(transition_table, symbols)
+        self.initial = 0
+        for state in epsilon_closure_of_state(nfa.in_state.id, transition_table):
+            self.initial |= 1 << state
+        self.accept_bit = 1 << nfa.out_state.id
+
+    @classmethod
+    def from_regex(cls, regex: str, **kwargs):
+        return cls(RegexToNFAConverter(regex).parse(), **kwargs)
+
+    def step(self, subset: int, symbol) -> int:
+        column = self.columns.get(symbol)
+        if column is None:
+            return 0
+        steps = self.steps
+        result = 0
+        for state in set_bits(subset):
+            result |= steps[state][column]
+        return result
+
+    def test(self, string: str) -> bool:
+        subset = self.initial
+        for symbol in string:
+            subset = self.step(subset, symbol)
+            if not subset:
+                return False
+        return bool(subset & self.accept_bit)
+
+    def test_batch(self, strings: Iterable[str]) -> list[bool]:
+        return [self.test(string) for string in strings]
+
+
+class LazyDFA(NFASimulation):
+    # Subset construction on demand: only the DFA states the input reaches are built, each transition
+    # once. The cache is dropped when it holds cache_limit states, so memory stays bounded on blowups
+
+    def __init__(self, nfa: NFA, cache_limit: int = LAZY_STATE_LIMIT):
+        super().__init__(nfa)
+        self.cache_limit = cache_limit
+        self.flushes = 0
+        self._rows: dict[int, dict] = {}
+
+    @property
+    def cached_states(self) -> int:
+        return len(self._rows)
+
+    def _row(self, subset: int) -> dict:
+        if len(self._rows) >= self.cache_limit:
+            self._rows.clear()
+            self.flushes += 1
+        row = self._rows[subset] = {}
+        return row
+
+    def test(self, string: str) -> bool:
+        rows = self._rows
+        subset = self.initial
+        row = rows.get(subset)
+        if row is None:
+            row = self._row(subset)
+        for symbol in string:
+            next_subset = row.get(symbol)
+            if next_subset is None:
+                next_subset = row[symbol] = self.step(subset, symbol)
+            if not next_subset:
+                return False
+            subset = next_subset
+            row = rows.get(subset)
+            if row is None:
+                row = self._row(subset)
+        return bool(subset & self.accept_bit)
+
+
+class AutoMatcher:
+    # Compiles a regex with the fastest engine the complexity estimate deems safe: a minimal DFA,
+    # a lazy DFA when the DFA would be too large to build up front, NFA simulation beyond that
+
+    def __init__(self, regex: str, engine: Optional[str] = None):
+        self.regex = regex
+        self.estimate: ComplexityEstimate = estimate(regex)
+        self.engine = self.estimate.engine if engine is None else engine
+        if self.engine == "dfa":
+            self.matcher = DFA.from_regex(regex)
+        elif self.engine == "lazy_dfa":
+            self.matcher = LazyDFA.from_regex(regex)
+        elif self.engine == "nfa":
+            self.matcher = NFASimulation.from_regex(regex)
+        else:
+            raise ValueError(f"unknown engine {self.engine!r}")
+
+    def test(self, string: str) -> bool:
+        return self.matcher.test(string)
+
+    def test_batch(self, strings: Iterable[str]) -> list[bool]:
+        return self.matcher.test_batch(strings)
+
+    def __repr__(self) -> str:
+        return f"AutoMatcher({self.regex!r}, engine={self.engine!r})"
+
+
+# Engines a TieredMatcher serves with, in the order they become available
+TIERS = ("lazy_dfa", "dfa", "min_dfa")
+
+
+def _determinize(regex: str, timeout: Optional[float]) -> DFA:
+    return DFA.from_regex(regex, minimize=False, budget=CompilationBudget(timeout))
+
+
+def _minimize(dfa: DFA, timeout: Optional[float]) -> DFA:
+    return dfa.build_min_dfa(CompilationBudget(timeout))
+
+
+class TieredMatcher:
+    # Serves at once with a lazy DFA while the DFA and then the minimal DFA are built in the background,
+    # each swapped in when ready. Readers take (tier, matcher) in one attribute read, so they always see
+    # a whole tier. Without an executor a thread compiles and cancel() stops it at the next budget check,
+    # with one (a process pool) cancel() only drops the results. The timeout covers both stages, when it
+    # runs out the last finished tier keeps serving and error records why
+
+    def __init__(self, regex: str, executor: Optional[Executor] = None, timeout: Optional[float] = None):
+        self.regex = regex
+        self.error: Optional[BaseException] = None
+        self._started = time.monotonic()
+        self._deadline = None if timeout is None else self._started + timeout
+        nfa = RegexToNFAConverter(regex).parse()
+        self._serving = ("lazy_dfa", LazyDFA(nfa))
+        # Seconds from creation until each tier started serving
+        self.timings = {"lazy_dfa": time.monotonic() - self._started}
+        self._ready = threading.Event()
+        self._cancelled = False
+        self._executor = executor
+        self._future: Optional[Future] = None
+        if executor is None:
+            self._budget = CompilationBudget(timeout)
+            threading.Thread(target=self._compile_in_thread, args=(nfa,), daemon=True).start()
+        else:
+            self._future = executor.submit(_determinize, regex, self._remaining())
+            self._future.add_done_callback(self._determinized)
+
+    @property
+    def tier(self) -> str:
+        return self._serving[0]
+
+    @property
+    def ready(self) -> bool:
+        # The minimal DFA serves or the background compilation gave up
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def cancel(self):
+        self._cancelled = True
+        if self._future is not None:
+            self._future.cancel()
+        else:
+            self._budget.cancel()
+
+    def test(self, string: str) -> bool:
+        return self._serving[1].test(string)
+
+    def test_batch(self, strings: Iterable[str]) -> list[bool]:
+        return self._serving[1].test_batch(strings)
+
+    def _remaining(self) -> Optional[float]:
+        return None if self._deadline is None else max(self._deadline - time.monotonic(), 0)
+
+    def _serve(self, tier: str, matcher):
+        self._serving = (tier, matcher)
+        self.timings[tier] = time.monotonic() - self._started
+
+    def _fail(self, error: BaseException):
+        self.error = error
+        self._ready.set()
+
+    def _compile_in_thread(self, nfa: NFA):
+        try:
+            dfa = DFA.from_nfa(nfa, budget=self._budget)
+            self._serve("dfa", dfa)
+            self._serve("min_dfa", dfa.build_min_dfa(self._budget))
+        except Exception as error:
+            # As on the executor path: any failure leaves the lower tier serving and is kept in error
+            self._fail(error)
+            return
+        self._ready.set()
+
+    def _finished(self, future: Future) -> Optional[DFA]:
+        if self._cancelled or future.cancelled():
+            self._fail(CompilationCancelled("compilation cancelled"))
+            return None
+        error = future.exception()
+        if error is not None:
+            self._fail(error)
+            return None
+        return future.result()
+
+    def _determinized(self, future: Future):
+        dfa = self._finished(future)
+        if dfa is None:
+            return
+        self._serve("dfa", dfa)
+        self._future = self._executor.submit(_minimize, dfa, self._remaining())
+        self._future.add_done_callback(self._minimized)
+
+    def _minimized(self, future: Future):
+        dfa = self._finished(future)
+        if dfa is None:
+            return
+        self._serve("min_dfa", dfa)
+        self._ready.set()
+
+    def __repr__(self) -> str:
+        return f"TieredMatcher({self.regex!r}, tier={self.tier!r})"
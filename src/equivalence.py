@@ -0,0 +1,162 @@
+import hashlib
+from collections import deque
+from typing import Callable, Hashable, Iterable, Mapping, Optional
+
+from dfa import DFA
+
+_NO_TRANSITIONS: dict = {}
+
+
+def _symbol_key(symbol) -> tuple[str, object]:
+    return type(symbol).__name__, symbol
+
+
+def _alphabet(*dfas: DFA) -> list:
+    symbols = set()
+    for dfa in dfas:
+        for transitions in dfa.table.values():
+            symbols.update(transitions)
+    return sorted(symbols, key=_symbol_key)
+
+
+def _step(dfa: DFA, state: Optional[int], symbol) -> Optional[int]:
+    # None is the implicit dead state behind every missing transition
+    if state is None:
+        return None
+    return dfa.table.get(state, _NO_TRANSITIONS).get(symbol)
+
+
+class _UnionFind:
+
+    def __init__(self):
+        self.parent: dict = {}
+        self.size: dict = {}
+
+    def find(self, item):
+        parent = self.parent
+        root = item
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while item != root:
+            item, parent[item] = parent[item], root
+        return root
+
+    def union(self, first, second) -> bool:
+        first_root = self.find(first)
+        second_root = self.find(second)
+        if first_root == second_root:
+            return False
+        first_size = self.size.get(first_root, 1)
+        second_size = self.size.get(second_root, 1)
+        if first_size > second_size:
+            first_root, second_root = second_root, first_root
+        self.parent[first_root] = second_root
+        self.size[second_root] = first_size + second_size
+        return True
+
+
+def _hopcroft_karp(
+    first_start: Hashable,
+    second_start: Hashable,
+    first_step: Callable,
+    second_step: Callable,
+    first_accepts: Callable,
+    second_accepts: Callable,
+    alphabet: list,
+) -> bool:
+    # Hopcroft-Karp: merge the classes of paired states and only follow pairs that were not equated yet.
+    # States of the two automata are tagged with 0 and 1 so they never collide in the union-find.
+    classes = _UnionFind()
+    classes.union((0, first_start), (1, second_start))
+    stack = [(first_start, second_start)]
+
+    while stack:
+        first, second = stack.pop()
+        if first_accepts(first) != second_accepts(second):
+            return False
+        for symbol in alphabet:
+            first_next = first_step(first, symbol)
+            second_next = second_step(second, symbol)
+            if classes.union((0, first_next), (1, second_next)):
+                stack.append((first_next, second_next))
+
+    return True
+
+
+def are_equivalent(first: DFA, second: DFA) -> bool:
+    return _hopcroft_karp(
+        first.initial_state,
+        second.initial_state,
+        lambda state, symbol: _step(first, state, symbol),
+        lambda state, symbol: _step(second, state, symbol),
+        lambda state: state in first.accepts,
+        lambda state: state in second.accepts,
+        _alphabet(first, second),
+    )
+
+
+def is_subset(first: DFA, second: DFA) -> bool:
+    # L(first) is included in L(second) exactly when L(first) | L(second) equals L(second).
+    # The union automaton is explored on the fly as pairs of states.
+    return _hopcroft_karp(
+        (first.initial_state, second.initial_state),
+        second.initial_state,
+        lambda pair, symbol: (_step(first, pair[0], symbol), _step(second, pair[1], symbol)),
+        lambda state, symbol: _step(second, state, symbol),
+        lambda pair: pair[0] in first.accepts or pair[1] in second.accepts,
+        lambda state: state in second.accepts,
+        _alphabet(first, second),
+    )
+
+
+def canonical_form(dfa: DFA) -> tuple:
+    # Minimal DFAs of the same language are isomorphic, numbering the live states in BFS order
+    # with sorted symbols makes the isomorphic ones identical
+    table = dfa.table
+    reverse: dict[int, list[int]] = {}
+    for state, transitions in table.items():
+        for next_state in transitions.values():
+            reverse.setdefault(next_state, []).append(state)
+    live = set(dfa.accepts)
+    stack = list(dfa.accepts)
+    while stack:
+        for previous in reverse.get(stack.pop(), ()):
+            if previous not in live:
+                live.add(previous)
+                stack.append(previous)
+
+    if dfa.initial_state not in live:
+        return ()
+
+    numbering = {dfa.initial_state: 0}
+    queue = deque([dfa.initial_state])
+    rows = []
+    while queue:
+        state = queue.popleft()
+        row = []
+        transitions = table.get(state, _NO_TRANSITIONS)
+        for symbol in sorted(transitions, key=_symbol_key):
+            next_state = transitions[symbol]
+            if next_state not in live:
+                continue
+            if next_state not in numbering:
+                numbering[next_state] = len(numbering)
+                queue.append(next_state)
+            row.append((symbol, numbering[next_state]))
+        rows.append((state in dfa.accepts, tuple(row)))
+    return tuple(rows)
+
+
+def fingerprint(dfa: DFA, minimize: bool = True) -> str:
+    if minimize:
+        dfa = dfa.build_min_dfa()
+    return hashlib.sha256(repr(canonical_form(dfa)).encode()).hexdigest()
+
+
+def group_equivalent(dfas: Mapping[Hashable, DFA] | Iterable[tuple[Hashable, DFA]]) -> list[list[Hashable]]:
+    # Groups of keys with the same language, found by hashing instead of pairwise comparison
+    items = dfas.items() if isinstance(dfas, Mapping) else dfas
+    groups: dict[str, list[Hashable]] = {}
+    for key, dfa in items:
+        groups.setdefault(fingerprint(dfa), []).append(key)
+    return list(groups.values())
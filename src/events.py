@@ -0,0 +1,104 @@
+from typing import Iterable, Sequence
+
+from dfa import DFA
+
+# Largest code for which rows are indexed by the code itself, sparser alphabets go through a column map
+DENSE_LIMIT = 4096
+
+# Inputs are read in short chunks: event sequences tend to be short, and a dead state should stop
+# the scan soon without a check per event
+_CHUNK = 32
+
+
+class EventMatcher:
+    # Matches sequences of integer event codes, written <123> in the regex, without converting them to
+    # strings. Accepts lists, array.array and NumPy integer arrays. The last row is a dead state that every
+    # missing transition leads to
+
+    def __init__(self, dfa: DFA):
+        codes = sorted(set(dfa.terms))
+        if not all(isinstance(code, int) and code >= 0 for code in codes):
+            raise ValueError("event matchers need a DFA over non-negative integer codes")
+        self.dfa = dfa
+        self.codes = codes
+        self.max_code = codes[-1] if codes else -1
+        # None when rows are indexed by code, otherwise code -> column
+        self.columns = None if self.max_code < DENSE_LIMIT else {code: column for column, code in enumerate(codes)}
+        width = self.max_code + 1 if self.columns is None else len(codes)
+
+        states = sorted(set(dfa.table) | {s for row in dfa.table.values() for s in row.values()})
+        index = {state: i for i, state in enumerate(states)}
+        self.dead = len(states)
+        self.rows = [[self.dead] * width for _ in range(len(states) + 1)]
+        for state, transitions in dfa.table.items():
+            row = self.rows[index[state]]
+            for code, next_state in transitions.items():
+                row[code if self.columns is None else self.columns[code]] = index[next_state]
+        self.accepting = [state in dfa.accepts for state in states] + [False]
+        self.initial_state = index[dfa.initial_state]
+        self._numpy_tables = None
+
+    @classmethod
+    def from_regex(cls, regex: str) -> "EventMatcher":
+        return cls(DFA.from_regex(regex))
+
+    def test(self, events: Sequence[int]) -> bool:
+        if hasattr(events, "tolist"):
+            # array.array and NumPy arrays, iterating a NumPy array would box every element
+            events = events.tolist()
+        if not events:
+            return self.accepting[self.initial_state]
+        # A code outside the alphabet has no transition anywhere
+        if min(events) < 0 or max(events) > self.max_code:
+            return False
+
+        rows = self.rows
+        dead = self.dead
+        columns = self.columns
+        state = self.initial_state
+        for start in range(0, len(events), _CHUNK):
+            chunk = events[start:start + _CHUNK]
+            if columns is None:
+                for code in chunk:
+                    state = rows[state][code]
+            else:
+                get = columns.get
+                for code in chunk:
+                    column = get(code)
+                    if column is None:
+                        return False
+                    state = rows[state][column]
+            if state == dead:
+                return False
+        return self.accepting[state]
+
+    def test_batch(self, items: Iterable[Sequence[int]]) -> list[bool]:
+        return [self.test(events) for events in items]
+
+    def _tables(self, np):
+        if self._numpy_tables is None:
+            # One extra column for codes outside the alphabet, it leads to the dead state
+            table = np.full((len(self.rows), len(self.codes) + 1), self.dead, dtype=np.intp)
+            for state, row in enumerate(self.rows):
+                table[state, :len(self.codes)] = [row[code if self.columns is None else self.columns[code]]
+                                                  for code in self.codes]
+            self._numpy_tables = (np.asarray(self.codes, dtype=np.int64), table, np.asarray(self.accepting))
+        return self._numpy_tables
+
+    def test_matrix(self, matrix):
+        # Verdicts for every row of a 2D NumPy array of equal length event sequences. All rows step
+        # together, one vectorized table lookup per column
+        import numpy as np
+
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2:
+            raise ValueError(f"expected a 2D array of event codes, got {matrix.ndim} dimensions")
+        codes, table, accepting = self._tables(np)
+        missing = len(codes)
+        states = np.full(matrix.shape[0], self.initial_state, dtype=np.intp)
+        for events in matrix.T:
+            columns = np.searchsorted(codes, events)
+            found = columns < missing
+            found[found] = codes[columns[found]] == events[found]
+            states = table[states, np.where(found, columns, missing)]
+        return accepting[states]
@@ -0,0 +1,121 @@
+import json
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional, TextIO, Union
+
+from dfa import DFA
+from nfa import NFA
+
+Target = Union[str, TextIO]
+
+
+class _Graph:
+
+    def __init__(self, kind: str, initial: int, accepting: set[int], edges):
+        self.kind = kind
+        self.initial = initial
+        self.accepting = accepting
+        # state -> list of (symbol, next state)
+        self.edges = edges
+
+
+def _as_graph(automaton: Union[DFA, NFA]) -> _Graph:
+    if isinstance(automaton, DFA):
+        edges = {state: list(transitions.items()) for state, transitions in automaton.table.items()}
+        return _Graph("dfa", automaton.initial_state, set(automaton.accepts), edges)
+
+    graph = automaton.build_graph()
+    edges = {
+        state: [(symbol, next_state) for symbol, next_states in paths.items() for next_state in next_states]
+        for state, paths in graph.items()
+    }
+    return _Graph("nfa", automaton.in_state.id, {automaton.out_state.id}, edges)
+
+
+def _kept_states(graph: _Graph, max_states: Optional[int]) -> list[int]:
+    # BFS order from the initial state, huge graphs are cut after max_states states
+    order = [graph.initial]
+    seen = {graph.initial}
+    queue = deque(order)
+    while queue and (max_states is None or len(order) < max_states):
+        state = queue.popleft()
+        for _, next_state in graph.edges.get(state, ()):
+            if next_state not in seen:
+                if max_states is not None and len(order) >= max_states:
+                    break
+                seen.add(next_state)
+                order.append(next_state)
+                queue.append(next_state)
+    return order
+
+
+def _dropped_states(graph: _Graph, kept: set[int]) -> int:
+    # Reachable states cut off by max_states, states unreachable from the initial one do not count
+    if all(next_state in kept for state in kept for _, next_state in graph.edges.get(state, ())):
+        return 0
+    return len(_kept_states(graph, None)) - len(kept)
+
+
+@contextmanager
+def _open_target(target: Target) -> Iterator[TextIO]:
+    if isinstance(target, str):
+        with open(target, "w", encoding="utf-8") as stream:
+            yield stream
+    else:
+        yield target
+
+
+def _dot_id(value) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def write_dot(automaton: Union[DFA, NFA], target: Target, max_states: Optional[int] = None) -> bool:
+    # Returns True when the graph was truncated
+    graph = _as_graph(automaton)
+    kept = _kept_states(graph, max_states)
+    kept_set = set(kept)
+    dropped = _dropped_states(graph, kept_set)
+    truncated = dropped > 0
+
+    with _open_target(target) as stream:
+        write = stream.write
+        write(f"digraph {graph.kind} {{\n  rankdir=LR;\n  start [label=\"\", shape=none];\n")
+        for state in kept:
+            shape = "doublecircle" if state in graph.accepting else "circle"
+            write(f"  {state} [shape={shape}];\n")
+        write(f"  start -> {graph.initial};\n")
+        for state in kept:
+            for symbol, next_state in graph.edges.get(state, ()):
+                if next_state in kept_set:
+                    write(f"  {state} -> {next_state} [label={_dot_id(symbol)}];\n")
+                else:
+                    write(f"  {state} -> truncated [label={_dot_id(symbol)}, style=dashed];\n")
+        if truncated:
+            write(f"  truncated [label=\"{dropped} more states\", shape=box, style=dashed];\n")
+        write("}\n")
+    return truncated
+
+
+def write_json(automaton: Union[DFA, NFA], target: Target, max_states: Optional[int] = None) -> bool:
+    # Transitions are written one by one, the document is never built in memory
+    graph = _as_graph(automaton)
+    kept = _kept_states(graph, max_states)
+    kept_set = set(kept)
+    dropped = _dropped_states(graph, kept_set)
+    truncated = dropped > 0
+
+    with _open_target(target) as stream:
+        write = stream.write
+        write(f'{{"type": "{graph.kind}", "initial": {graph.initial}, '
+              f'"states": {json.dumps(kept)}, '
+              f'"accepting": {json.dumps([state for state in kept if state in graph.accepting])}, '
+              f'"transitions": [')
+        separator = ""
+        for state in kept:
+            for symbol, next_state in graph.edges.get(state, ()):
+                if next_state in kept_set:
+                    write(f"{separator}{json.dumps([state, symbol, next_state], ensure_ascii=False)}")
+                    separator = ", "
+        write(f'], "truncated": {json.dumps(truncated)}, "total_states": {len(graph.edges)}}}\n')
+    return truncated
@@ -0,0 +1,395 @@
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Callable, Optional
+
+from captures import CaptureMatcher
+from compressed import CompressedDFA
+from converter import RegexToNFAConverter
+from dfa import DFA
+from dfa import StreamMatcher
+from dfa import relabel_dfa_states
+from engines import LazyDFA
+from engines import NFASimulation
+from events import EventMatcher
+from generate import StringGenerator
+from layout import DenseDFA
+from layout import TransitionProfile
+from layout import relayout
+from nfa_reduction import reduce_nfa
+from parallel_dfa import nfa_to_dfa_parallel
+from pattern_set import PatternSet
+from result_cache import CachedMatcher
+from search import Searcher
+from sharing import CompilationSession
+from utf8 import ByteDFA
+
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS
+
+# Engine factory: compiles a regex into a function from input text to a result all engines must agree on
+EngineFactory = Callable[[str], Callable[[str], object]]
+# Regex syntax tree: (SYMBOL, letter), (CONCAT | UNION, left, right) or (STAR | PLUS | OPT, child)
+Node = tuple
+
+FUZZ_ALPHABET = "abc"
+# Letters of input strings, one of them never appears in a regex
+INPUT_ALPHABET = FUZZ_ALPHABET + "d"
+# Candidate regexes tried while shrinking one failure
+SHRINK_ATTEMPTS = 2000
+# NFA.test and Python's re backtrack, exponentially on nested repeats, so longer inputs and deeper
+# nesting are only compared between the automata
+BACKTRACKING_MAX_LENGTH = 8
+BACKTRACKING_MAX_NESTING = 2
+
+# Result of an engine that does not handle this input, left out of the comparison
+SKIPPED = "skipped"
+
+_POSTFIX = {STAR: "*", PLUS: "+", OPT: "?"}
+_LEVELS = {UNION: 0, CONCAT: 1, STAR: 2, PLUS: 2, OPT: 2, SYMBOL: 3}
+
+
+def random_regex(rng: random.Random, depth: int = 4, alphabet: str = FUZZ_ALPHABET) -> Node:
+    if depth == 0 or rng.random() < 0.25:
+        return SYMBOL, rng.choice(alphabet)
+    kind = rng.choice([CONCAT, CONCAT, UNION, UNION, STAR, PLUS, OPT])
+    if kind in _POSTFIX:
+        return kind, random_regex(rng, depth - 1, alphabet)
+    return kind, random_regex(rng, depth - 1, alphabet), random_regex(rng, depth - 1, alphabet)
+
+
+def render(node: Node, context: int = UNION) -> str:
+    kind = node[0]
+    if kind == SYMBOL:
+        return node[1]
+    if kind in _POSTFIX:
+        text = render(node[1], STAR) + _POSTFIX[kind]
+    elif kind == CONCAT:
+        text = render(node[1], CONCAT) + render(node[2], CONCAT)
+    else:
+        text = render(node[1], UNION) + "|" + render(node[2], UNION)
+    # Postfix operators on postfix operators need parentheses too, Python's re rejects a** as a repeat of a repeat
+    if _LEVELS[kind] < _LEVELS[context] or (kind in _POSTFIX and context in _POSTFIX):
+        return f"({text})"
+    return text
+
+
+def _smaller(node: Node) -> list[Node]:
+    # Every tree one step simpler than node: a subtree replaced by one of its children or by a letter
+    kind = node[0]
+    if kind == SYMBOL:
+        return [(SYMBOL, letter) for letter in FUZZ_ALPHABET if letter < node[1]]
+    candidates = list(node[1:])
+    candidates += [(SYMBOL, letter) for letter in FUZZ_ALPHABET]
+    for position, child in enumerate(node[1:], 1):
+        for smaller in _smaller(child):
+            candidates.append(node[:position] + (smaller,) + node[position + 1:])
+    return candidates
+
+
+def _events_regex(regex: str) -> str:
+    return re.sub(f"[{FUZZ_ALPHABET}]", lambda letter: f"<{ord(letter.group())}>", regex)
+
+
+def repeat_nesting(regex: str) -> int:
+    # Star height: how deeply *, + and ? are nested in the regex
+    stack = []
+    for kind, _ in tokens_to_postfix(tokenize(regex)):
+        if kind == SYMBOL:
+            stack.append(0)
+        elif kind in _POSTFIX:
+            stack.append(stack.pop() + 1)
+        else:
+            stack.append(max(stack.pop(), stack.pop()))
+    return stack[0]
+
+
+def _backtracking(regex: str, build: Callable[[str], Callable[[str], object]]) -> Callable[[str], object]:
+    if repeat_nesting(regex) > BACKTRACKING_MAX_NESTING:
+        return lambda text: SKIPPED
+    test = build(regex)
+    return lambda text: test(text) if len(text) <= BACKTRACKING_MAX_LENGTH else SKIPPED
+
+
+def _fullmatch(regex: str) -> Callable[[str], bool]:
+    pattern = re.compile(regex)
+    return lambda text: pattern.fullmatch(text) is not None
+
+
+def _stream(dfa: DFA) -> Callable[[str], bool]:
+    def test(text: str) -> bool:
+        matcher = StreamMatcher(dfa)
+        middle = len(text) // 2
+        matcher.feed(text[:middle])
+        matcher.feed(text[middle:])
+        return matcher.finish()
+    return test
+
+
+def _prefix_batch(dfa: DFA) -> Callable[[str], bool]:
+    # Batched with a longer and a shorter string sharing its prefix, in an order the sort has to change
+    def test(text: str) -> bool:
+        return dfa.test_prefix_batch([text + FUZZ_ALPHABET[0], text, text[:len(text) // 2]])[1]
+    return test
+
+
+def _profiled(regex: str) -> tuple[DFA, TransitionProfile]:
+    # Profile from a few accepted samples and every single letter, so hot and cold states both exist
+    dfa = DFA.from_regex(regex)
+    profile = TransitionProfile(dfa)
+    generator = StringGenerator(dfa, 0, FUZZ_ALPHABET)
+    profile.test_batch([generator.sample(length) for length in range(6) if generator.count(length)])
+    profile.test_batch(INPUT_ALPHABET)
+    return dfa, profile
+
+
+def _pattern_set(regex: str) -> Callable[[str], bool]:
+    # Unrelated rules added and removed around the one under test, so shards get rebuilt and merged
+    patterns = PatternSet(FUZZ_ALPHABET, shard_size=2)
+    pattern_id = patterns.add(regex)
+    for other_id, letter in enumerate(FUZZ_ALPHABET):
+        patterns.remove(other_id)
+        patterns.add(letter * 2)
+    return lambda text: pattern_id in patterns.match(text)
+
+
+def _cached(regex: str) -> Callable[[str], bool]:
+    # Room for about two short entries, so most stores evict. Every text is tested twice to hit as well
+    cache = CachedMatcher(DFA.from_regex(regex), max_bytes=400)
+
+    def test(text: str) -> bool:
+        cache.test(text)
+        return cache.test(text)
+    return test
+
+
+def _bitset_dfa(regex: str) -> DFA:
+    table, accepts = relabel_dfa_states(*nfa_to_dfa_parallel(RegexToNFAConverter(regex).parse(), workers=1))
+    return DFA(table, accepts)
+
+
+def default_engines() -> dict[str, EngineFactory]:
+    # Whole-string matchers, every one has to give the same verdict
+    session = CompilationSession(min_shared_states=1)
+    return {
+        "re": lambda regex: _backtracking(regex, _fullmatch),
+        "nfa": lambda regex: _backtracking(regex, lambda regex: RegexToNFAConverter(regex).parse().test),
+        "dfa": lambda regex: DFA.from_regex(regex, minimize=False).test,
+        "min_dfa": lambda regex: DFA.from_regex(regex).test,
+        "min_dfa_batch": lambda regex: lambda text, dfa=DFA.from_regex(regex): dfa.test_batch([text])[0],
+        "prefix_batch": lambda regex: _prefix_batch(DFA.from_regex(regex)),
+        "relayout": lambda regex: relayout(*_profiled(regex)).test,
+        "dense": lambda regex: DenseDFA.from_profile(*_profiled(regex)).test,
+        "bitset_subsets": lambda regex: _bitset_dfa(regex).test,
+        "nfa_simulation": lambda regex: NFASimulation.from_regex(regex).test,
+        "reduced_dfa": lambda regex: DFA.from_regex(regex, minimize=False, reduce=True).test,
+        "reduced_nfa_simulation": lambda regex: NFASimulation(reduce_nfa(RegexToNFAConverter(regex).parse())).test,
+        # A tiny cache so flushes in the middle of an input are exercised
+        "lazy_dfa": lambda regex: LazyDFA.from_regex(regex, cache_limit=3).test,
+        "shared_subtrees": lambda regex: session.compile(regex).test,
+        "stream": lambda regex: _stream(DFA.from_regex(regex)),
+        "compressed": lambda regex: CompressedDFA.from_dfa(DFA.from_regex(regex)).test,
+        "bytes": lambda regex: lambda text, dfa=ByteDFA.from_regex(regex): dfa.test(text.encode()),
+        "events": lambda regex: lambda text, matcher=EventMatcher.from_regex(_events_regex(regex)):
+            matcher.test([ord(letter) for letter in text]),
+        "searcher": lambda regex: Searcher(regex).fullmatch,
+        "captures": lambda regex: lambda text, matcher=CaptureMatcher(regex): matcher.fullmatch(text) is not None,
+        "pattern_set": _pattern_set,
+        "cached": _cached,
+    }
+
+
+def longest_leftmost(regex: str) -> Callable[[str], Optional[tuple[int, int]]]:
+    # Reference search: the first start with a match, and its longest end, found by brute force
+    pattern = re.compile(regex)
+
+    def search(text: str) -> Optional[tuple[int, int]]:
+        for start in range(len(text) + 1):
+            for end in range(len(text), start - 1, -1):
+                if pattern.fullmatch(text, start, end):
+                    return start, end
+        return None
+    return search
+
+
+def _capture_span(regex: str) -> Callable[[str], Optional[tuple[int, int]]]:
+    matcher = CaptureMatcher(regex)
+
+    def search(text: str) -> Optional[tuple[int, int]]:
+        spans = matcher.search(text)
+        return None if spans is None else spans[0]
+    return search
+
+
+def default_search_engines() -> dict[str, EngineFactory]:
+    return {
+        "re_longest": lambda regex: _backtracking(regex, longest_leftmost),
+        "searcher": lambda regex: Searcher(regex).search,
+        "searcher_no_prefilter": lambda regex: Searcher(regex, use_prefilter=False).search,
+        "captures": _capture_span,
+    }
+
+
+class Failure:
+
+    def __init__(self, regex: str, text: str, results: dict[str, object], node: Optional[Node] = None):
+        self.regex = regex
+        self.text = text
+        self.results = results
+        self.node = node
+
+    def __str__(self) -> str:
+        results = ", ".join(f"{name}={result!r}" for name, result in self.results.items())
+        return f"regex {self.regex!r} on {self.text!r}: {results}"
+
+
+class FuzzReport:
+
+    def __init__(self):
+        self.regexes = 0
+        self.checks = 0
+        self.elapsed = 0.0
+        self.failures: list[Failure] = []
+
+    def __str__(self) -> str:
+        lines = [f"regexes={self.regexes} checks={self.checks} failures={len(self.failures)} "
+                 f"elapsed={self.elapsed:.1f}s"]
+        lines += [f"  {failure}" for failure in self.failures]
+        return "\n".join(lines)
+
+
+def _build(factories: dict[str, EngineFactory], regex: str) -> dict[str, Callable[[str], object]]:
+    engines = {}
+    for name, factory in factories.items():
+        try:
+            engines[name] = factory(regex)
+        except Exception as error:
+            engines[name] = lambda text, error=error: f"error: {type(error).__name__}: {error}"
+    return engines
+
+
+def _run(engine: Callable[[str], object], text: str) -> object:
+    try:
+        return engine(text)
+    except Exception as error:
+        return f"error: {type(error).__name__}: {error}"
+
+
+class Fuzzer:
+    # Differential testing: random regexes over the supported grammar, inputs sampled from their
+    # languages plus near misses and random strings, every engine must give the same answer. A failure
+    # is shrunk to a smallest regex and input that still make the engines disagree
+
+    def __init__(self, seed: Optional[int] = None, depth: int = 4, max_length: int = 8, inputs: int = 12,
+                 engines: Optional[dict[str, EngineFactory]] = None,
+                 search_engines: Optional[dict[str, EngineFactory]] = None):
+        self.rng = random.Random(seed)
+        self.depth = depth
+        self.max_length = max_length
+        self.inputs = inputs
+        self.engines = default_engines() if engines is None else engines
+        self.search_engines = default_search_engines() if search_engines is None else search_engines
+
+    def _inputs(self, regex: str) -> list[str]:
+        rng = self.rng
+        texts = {"", "".join(rng.choice(INPUT_ALPHABET) for _ in range(rng.randint(1, self.max_length)))}
+        try:
+            generator = StringGenerator(DFA.from_regex(regex), rng.getrandbits(32), FUZZ_ALPHABET)
+        except Exception:
+            # The engines fail on this regex as well and report it
+            return sorted(texts)
+        for _ in range(self.inputs):
+            length = rng.randint(0, self.max_length)
+            if rng.random() < 0.5 and generator.count(length):
+                texts.add(generator.sample(length))
+            elif len(FUZZ_ALPHABET) ** length != generator.count(length):
+                texts.add(generator.near_miss(length))
+        return sorted(texts)
+
+    def _disagreement(self, engines: dict[str, Callable], regex: str, text: str,
+                      node: Optional[Node] = None) -> Optional[Failure]:
+        results = {name: _run(engine, text) for name, engine in engines.items()}
+        if len({repr(result) for result in results.values() if result != SKIPPED}) > 1:
+            return Failure(regex, text, results, node)
+        return None
+
+    def check(self, regex: str, texts: list[str], node: Optional[Node] = None) -> tuple[int, Optional[Failure]]:
+        # Number of comparisons made, and the first disagreement
+        checks = 0
+        for factories in (self.engines, self.search_engines):
+            if not factories:
+                continue
+            engines = _build(factories, regex)
+            for text in texts:
+                checks += 1
+                failure = self._disagreement(engines, regex, text, node)
+                if failure is not None:
+                    return checks, failure
+        return checks, None
+
+    def shrink(self, failure: Failure) -> Failure:
+        # Greedy: take the first smaller regex or shorter input that still fails, until none does
+        attempts = 0
+        improved = True
+        while improved and attempts < SHRINK_ATTEMPTS:
+            improved = False
+            if failure.node is not None:
+                for node in _smaller(failure.node):
+                    attempts += 1
+                    _, smaller = self.check(render(node), [failure.text], node)
+                    if smaller is not None:
+                        failure, improved = smaller, True
+                        break
+                    if attempts >= SHRINK_ATTEMPTS:
+                        break
+            text = failure.text
+            candidates = [text[:i] + text[i + 1:] for i in range(len(text))]
+            candidates += [text[:i] + letter + text[i + 1:] for i in range(len(text))
+                           for letter in INPUT_ALPHABET if letter < text[i]]
+            for candidate in candidates:
+                attempts += 1
+                _, smaller = self.check(failure.regex, [candidate], failure.node)
+                if smaller is not None:
+                    failure, improved = smaller, True
+                    break
+        return failure
+
+    def run(self, seconds: float, max_regexes: Optional[int] = None, stop_on_failure: bool = True) -> FuzzReport:
+        report = FuzzReport()
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline and (max_regexes is None or report.regexes < max_regexes):
+            node = random_regex(self.rng, self.depth)
+            regex = render(node)
+            checks, failure = self.check(regex, self._inputs(regex), node)
+            report.regexes += 1
+            report.checks += checks
+            if failure is not None:
+                report.failures.append(self.shrink(failure))
+                if stop_on_failure:
+                    break
+        report.elapsed = time.perf_counter() - start
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the matching engines")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--max-length", type=int, default=8)
+    parser.add_argument("--keep-going", action="store_true", help="collect every failure instead of stopping")
+    args = parser.parse_args()
+
+    seed = random.randrange(2 ** 32) if args.seed is None else args.seed
+    fuzzer = Fuzzer(seed, depth=args.depth, max_length=args.max_length)
+    report = fuzzer.run(args.seconds, stop_on_failure=not args.keep_going)
+    print(f"seed={seed} {report}")
+    sys.exit(1 if report.failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    from dfa import DFA
+
+# Attempts at mutating an accepted string into a rejected one before falling back to random strings
+NEAR_MISS_ATTEMPTS = 32
+
+# Strings over characters, tuples over int alphabets such as event codes
+Sample = Union[str, tuple[int, ...]]
+
+
+class StringGenerator:
+    # Uniform sampling of accepted strings of a fixed length. paths[k][state] is the number of strings of
+    # length k accepted from state; the next symbol is drawn with weight equal to the paths behind it.
+    # Counts are exact integers and built lazily up to the longest length asked for.
+
+    def __init__(self, dfa: "DFA", seed: Optional[int] = None, alphabet: Optional[str] = None):
+        self.dfa = dfa
+        self.rng = random.Random(seed)
+        states = sorted(set(dfa.table) | {state for row in dfa.table.values() for state in row.values()})
+        self._index = {state: i for i, state in enumerate(states)}
+        # Rows sorted by symbol so a seed gives the same strings whatever the table order is
+        self._rows = [
+            [(symbol, self._index[next_state]) for symbol, next_state in sorted(dfa.table.get(state, {}).items())]
+            for state in states
+        ]
+        symbols = {symbol for row in self._rows for symbol, _ in row}
+        symbols = symbols if alphabet is None else set(alphabet) | symbols
+        if all(isinstance(symbol, int) for symbol in symbols):
+            self._join = tuple
+        elif all(isinstance(symbol, str) for symbol in symbols):
+            self._join = "".join
+        else:
+            raise ValueError("alphabet mixes characters and int symbols")
+        self.alphabet = sorted(symbols)
+        self._paths = [[1 if state in dfa.accepts else 0 for state in states]]
+        # (remaining, state) -> running totals of the paths behind each transition, for bisection
+        self._weights: dict[tuple[int, int], list[int]] = {}
+
+    def _extend(self, length: int):
+        paths = self._paths
+        while len(paths) <= length:
+            previous = paths[-1]
+            paths.append([sum(previous[next_state] for _, next_state in row) for row in self._rows])
+
+    def count(self, length: int) -> int:
+        # Number of accepted strings of exactly this length
+        self._extend(length)
+        return self._paths[length][self._index[self.dfa.initial_state]]
+
+    def sample(self, length: int) -> Sample:
+        if self.count(length) == 0:
+            raise ValueError(f"no accepted string of length {length}")
+        paths = self._paths
+        rows = self._rows
+        weights = self._weights
+        randrange = self.rng.randrange
+        state = self._index[self.dfa.initial_state]
+        symbols = []
+        for remaining in range(length, 0, -1):
+            totals = weights.get((remaining, state))
+            if totals is None:
+                behind = paths[remaining - 1]
+                totals = weights[remaining, state] = list(accumulate(behind[next_state]
+                                                                     for _, next_state in rows[state]))
+            symbol, state = rows[state][bisect_right(totals, randrange(totals[-1]))]
+            symbols.append(symbol)
+        return self._join(symbols)
+
+    def near_miss(self, length: int) -> Sample:
+        # A rejected string one substitution away from an accepted one when possible
+        if len(self.alphabet) ** length == self.count(length):
+            raise ValueError(f"every string of length {length} is accepted")
+        rng = self.rng
+        if length and self.count(length):
+            for _ in range(NEAR_MISS_ATTEMPTS):
+                symbols = list(self.sample(length))
+                position = rng.randrange(length)
+                symbols[position] = rng.choice([symbol for symbol in self.alphabet if symbol != symbols[position]]
+                                               or self.alphabet)
+                candidate = self._join(symbols)
+                if not self.dfa.test(candidate):
+                    return candidate
+        while True:
+            candidate = self._join(rng.choice(self.alphabet) for _ in range(length))
+            if not self.dfa.test(candidate):
+                return candidate
+
+    def accepted(self, length: int, count: Optional[int] = None) -> Iterator[Sample]:
+        # Lazily yields count samples, or forever when count is None
+        produced = 0
+        while count is None or produced < count:
+            yield self.sample(length)
+            produced += 1
+
+    def rejected(self, length: int, count: Optional[int] = None) -> Iterator[Sample]:
+        produced = 0
+        while count is None or produced < count:
+            yield self.near_miss(length)
+            produced += 1
+
+    def mixed(self, length: int, accept_ratio: float, count: Optional[int] = None) -> Iterator[tuple[Sample, bool]]:
+        # (string, expected verdict) pairs with about accept_ratio of them accepted
+        produced = 0
+        while count is None or produced < count:
+            if self.rng.random() < accept_ratio:
+                yield self.sample(length), True
+            else:
+                yield self.near_miss(length), False
+            produced += 1
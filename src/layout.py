@@ -0,0 +1,114 @@
+from array import array
+from collections import Counter
+from typing import Iterable, Optional, Sequence
+
+from analysis import analyze
+from dfa import DFA
+
+# Input is checked for the dead state once per chunk instead of after every symbol
+_CHUNK = 64
+
+
+class TransitionProfile:
+    # Hit counters of a DFA over sample traffic: how often each state is entered and each symbol is
+    # read. Matches like DFA.test without the early stops, so the counts cover the whole walk
+
+    def __init__(self, dfa: DFA):
+        self.dfa = dfa
+        self.state_hits: Counter = Counter()
+        self.symbol_hits: Counter = Counter()
+        self.samples = 0
+
+    def test(self, string: Iterable) -> bool:
+        table = self.dfa.table
+        state_hits = self.state_hits
+        symbol_hits = self.symbol_hits
+        self.samples += 1
+
+        state = self.dfa.initial_state
+        state_hits[state] += 1
+        for symbol in string:
+            next_state = table[state].get(symbol)
+            if next_state is None:
+                return False
+            symbol_hits[symbol] += 1
+            state_hits[next_state] += 1
+            state = next_state
+        return state in self.dfa.accepts
+
+    def test_batch(self, strings: Iterable[Iterable]) -> list[bool]:
+        return [self.test(string) for string in strings]
+
+    def state_order(self) -> list[int]:
+        # Hottest first, states the samples never reached keep their relative order at the end
+        states = set(self.dfa.table) | {s for row in self.dfa.table.values() for s in row.values()}
+        return sorted(states, key=lambda state: (-self.state_hits[state], state))
+
+    def symbol_order(self) -> list:
+        symbols = {symbol for row in self.dfa.table.values() for symbol in row}
+        return sorted(symbols, key=lambda symbol: (-self.symbol_hits[symbol], str(symbol)))
+
+
+def relayout(dfa: DFA, profile: TransitionProfile) -> DFA:
+    # Same automaton with the hot states numbered first and every row keyed in symbol frequency order,
+    # so a table indexed by state keeps the rows the traffic needs next to each other
+    numbering = {state: new for new, state in enumerate(profile.state_order())}
+    symbols = profile.symbol_order()
+    table = {}
+    for state in numbering:
+        row = dfa.table.get(state, {})
+        table[numbering[state]] = {symbol: numbering[row[symbol]] for symbol in symbols if symbol in row}
+
+    result = DFA(table=table, accepts={numbering[state] for state in dfa.accepts},
+                 initial_state=numbering[dfa.initial_state])
+    if dfa.analysis is not None:
+        result.analysis = analyze(result)
+    return result
+
+
+class DenseDFA:
+    # One flat array of rows, a column per symbol. Entries hold the offset of the next row, so a step
+    # is one lookup. The last row is a dead state that every missing transition leads to
+
+    def __init__(self, dfa: DFA, symbols: Optional[Sequence] = None):
+        states = sorted(set(dfa.table) | {s for row in dfa.table.values() for s in row.values()})
+        index = {state: i for i, state in enumerate(states)}
+        if symbols is None:
+            symbols = sorted({symbol for row in dfa.table.values() for symbol in row}, key=str)
+        self.columns = {symbol: column for column, symbol in enumerate(symbols)}
+        self.width = width = max(len(self.columns), 1)
+
+        self.dead = len(states) * width
+        self.table = array("i", [self.dead]) * ((len(states) + 1) * width)
+        for state, transitions in dfa.table.items():
+            offset = index[state] * width
+            for symbol, next_state in transitions.items():
+                self.table[offset + self.columns[symbol]] = index[next_state] * width
+        self.accepting = [state in dfa.accepts for state in states] + [False]
+        self.initial_state = index[dfa.initial_state] * width
+
+    @classmethod
+    def from_profile(cls, dfa: DFA, profile: TransitionProfile) -> "DenseDFA":
+        return cls(relayout(dfa, profile), profile.symbol_order())
+
+    @property
+    def state_count(self) -> int:
+        return len(self.accepting)
+
+    def test(self, string: Sequence) -> bool:
+        columns = self.columns
+        table = self.table
+        dead = self.dead
+        state = self.initial_state
+        for start in range(0, len(string), _CHUNK):
+            for symbol in string[start:start + _CHUNK]:
+                column = columns.get(symbol)
+                if column is None:
+                    return False
+                state = table[state + column]
+            if state == dead:
+                return False
+        return self.accepting[state // self.width]
+
+    def test_batch(self, strings: Iterable[Sequence]) -> list[bool]:
+        return [self.test(string) for string in strings]
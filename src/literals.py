@@ -0,0 +1,178 @@
+from typing import Optional, Union
+
+from shunting_yard import RegexSyntaxError
+from shunting_yard import TokenArray
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import CODE_OPEN
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS
+
+# Largest literal set kept per subexpression, bigger sets are shortened or dropped
+LITERAL_SET_LIMIT = 16
+
+# Set meaning "no information": every string trivially contains the empty string
+_ANY = frozenset({""})
+
+
+class _LiteralInfo:
+    __slots__ = ("exact", "prefixes", "suffixes", "required")
+
+    def __init__(self, exact, prefixes, suffixes, required):
+        # Whole (finite) language of the subexpression or None
+        self.exact: Optional[frozenset[str]] = exact
+        # Every string of the language starts with / ends with / contains one of these
+        self.prefixes: frozenset[str] = prefixes
+        self.suffixes: frozenset[str] = suffixes
+        self.required: frozenset[str] = required
+
+
+def _shrink(literals: frozenset[str], keep_end: bool = False) -> frozenset[str]:
+    # Shortening literals keeps them valid, a prefix/suffix/substring of a required string is still required
+    while len(literals) > LITERAL_SET_LIMIT:
+        longest = max(len(literal) for literal in literals)
+        if longest <= 1:
+            return _ANY
+        if keep_end:
+            literals = frozenset(literal[1:] if len(literal) == longest else literal for literal in literals)
+        else:
+            literals = frozenset(literal[:-1] if len(literal) == longest else literal for literal in literals)
+    if "" in literals:
+        return _ANY
+    return literals
+
+
+def _cross(first: Optional[frozenset[str]], second: Optional[frozenset[str]]) -> Optional[frozenset[str]]:
+    if first is None or second is None or len(first) * len(second) > LITERAL_SET_LIMIT:
+        return None
+    return frozenset(a + b for a in first for b in second)
+
+
+def _score(literals: frozenset[str]) -> tuple[int, int]:
+    # A set is as selective as its shortest literal, fewer alternatives break ties
+    return min(len(literal) for literal in literals), -len(literals)
+
+
+def _best(*candidates: Optional[frozenset[str]]) -> frozenset[str]:
+    best = _ANY
+    for candidate in candidates:
+        if candidate is not None and candidate != _ANY and _score(candidate) > _score(best):
+            best = candidate
+    return best
+
+
+def _from_exact(exact: Optional[frozenset[str]], info: _LiteralInfo) -> _LiteralInfo:
+    if exact is not None and "" not in exact:
+        return _LiteralInfo(exact, exact, exact, exact)
+    return info
+
+
+def _symbol(value: str) -> _LiteralInfo:
+    literal = frozenset({value})
+    return _LiteralInfo(literal, literal, literal, literal)
+
+
+def _concat(first: _LiteralInfo, second: _LiteralInfo) -> _LiteralInfo:
+    exact = _cross(first.exact, second.exact)
+
+    prefixes = _cross(first.exact, second.prefixes) if first.exact is not None else None
+    if prefixes is None:
+        prefixes = first.prefixes
+    suffixes = _cross(first.suffixes, second.exact) if second.exact is not None else None
+    if suffixes is None:
+        suffixes = second.suffixes
+
+    required = _best(first.required, second.required, _cross(first.suffixes, second.prefixes))
+    info = _LiteralInfo(exact, _shrink(prefixes), _shrink(suffixes, keep_end=True), required)
+    return _from_exact(exact, info)
+
+
+def _union(first: _LiteralInfo, second: _LiteralInfo) -> _LiteralInfo:
+    exact = None
+    if first.exact is not None and second.exact is not None:
+        exact = first.exact | second.exact
+        if len(exact) > LITERAL_SET_LIMIT:
+            exact = None
+
+    info = _LiteralInfo(
+        exact,
+        _shrink(first.prefixes | second.prefixes),
+        _shrink(first.suffixes | second.suffixes, keep_end=True),
+        _shrink(first.required | second.required),
+    )
+    return _from_exact(exact, info)
+
+
+def _opt(fragment: _LiteralInfo) -> _LiteralInfo:
+    exact = fragment.exact | _ANY if fragment.exact is not None else None
+    return _LiteralInfo(exact, _ANY, _ANY, _ANY)
+
+
+def _rep(fragment: _LiteralInfo) -> _LiteralInfo:
+    return _LiteralInfo(None, _ANY, _ANY, _ANY)
+
+
+def _plus(fragment: _LiteralInfo) -> _LiteralInfo:
+    return _LiteralInfo(None, fragment.prefixes, fragment.suffixes, fragment.required)
+
+
+def required_literals(regex: Union[str, TokenArray]) -> Optional[frozenset[str]]:
+    # Set of literals such that every string of the language contains at least one of them
+    postfix = tokens_to_postfix(tokenize(regex)) if isinstance(regex, str) else regex
+    stack = []
+
+    for token_id, (kind, value) in enumerate(postfix):
+        if kind == SYMBOL:
+            # Event codes are not text, nothing about them can be searched for
+            stack.append(_symbol(value) if value[0] != CODE_OPEN else _LiteralInfo(None, _ANY, _ANY, _ANY))
+        elif kind == CONCAT:
+            e2 = stack.pop()
+            e1 = stack.pop()
+            stack.append(_concat(e1, e2))
+        elif kind == UNION:
+            e2 = stack.pop()
+            e1 = stack.pop()
+            stack.append(_union(e1, e2))
+        elif kind == OPT:
+            stack.append(_opt(stack.pop()))
+        elif kind == STAR:
+            stack.append(_rep(stack.pop()))
+        elif kind == PLUS:
+            stack.append(_plus(stack.pop()))
+        else:
+            raise RegexSyntaxError("unexpected token in postfix", postfix.position(token_id))
+
+    required = stack.pop().required
+    return None if required == _ANY else required
+
+
+class Prefilter:
+
+    def __init__(self, literals: frozenset[str]):
+        self.literals = tuple(sorted(literals))
+        self.byte_literals = tuple(literal.encode() for literal in self.literals)
+        self.min_length = min(len(literal) for literal in self.literals)
+        self.max_length = max(len(literal) for literal in self.literals)
+
+    def _literals_for(self, text):
+        return self.literals if isinstance(text, str) else self.byte_literals
+
+    def may_match(self, text) -> bool:
+        for literal in self._literals_for(text):
+            if literal in text:
+                return True
+        return False
+
+    def find(self, text, start: int = 0) -> int:
+        # Leftmost occurrence of any literal at or after start, -1 if there is none
+        found = -1
+        end = len(text)
+        for literal in self._literals_for(text):
+            position = text.find(literal, start, end)
+            if position != -1 and (found == -1 or position < found):
+                found = position
+                # Only an occurrence starting before this one can still be leftmost
+                end = position + self.max_length - 1
+        return found
+
+    def __repr__(self) -> str:
+        return f"Prefilter(literals={list(self.literals)})"
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from converter import ALPHABET
+from dfa import DFA
+from generate import StringGenerator
+from server import MatchServer
+from server import PatternRegistry
+
+
+class LoadReport:
+
+    def __init__(self, latencies: list[float], elapsed: float, errors: int):
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.errors = errors
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1, int(fraction * len(self.latencies)))
+        return self.latencies[index]
+
+    def __str__(self) -> str:
+        return (f"requests={self.requests} errors={self.errors} elapsed={self.elapsed:.3f}s "
+                f"throughput={self.throughput:.0f} req/s "
+                f"p50={self.percentile(0.5) * 1000:.3f}ms p99={self.percentile(0.99) * 1000:.3f}ms")
+
+
+async def _open(host: str, port: int, unix: Optional[str]):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+async def _run_connection(address: tuple, regex: str, strings: list[str], depth: int,
+                          latencies: list[float]) -> int:
+    reader, writer = await _open(*address)
+    writer.write(f"COMPILE {regex}\n".encode())
+    await writer.drain()
+    response = (await reader.readline()).decode().split()
+    if response[0] != "OK":
+        raise RuntimeError(f"compilation failed: {' '.join(response)}")
+    pattern_id = response[1]
+
+    # Up to depth requests are pipelined, responses come back in request order
+    sent = deque()
+    window = asyncio.Semaphore(depth)
+    errors = 0
+
+    async def send():
+        for string in strings:
+            await window.acquire()
+            sent.append(time.perf_counter())
+            writer.write(f"MATCH {pattern_id} {string}\n".encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in strings:
+        line = await reader.readline()
+        latencies.append(time.perf_counter() - sent.popleft())
+        window.release()
+        if line.startswith(b"ERR"):
+            errors += 1
+    await sender
+
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def run_load(regex: str, connections: int, requests: int, depth: int = 16,
+                   host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None,
+                   seed: int = 0, length: Optional[int] = None, accept_ratio: float = 0.5) -> LoadReport:
+    if length is None:
+        rng = random.Random(seed)
+        alphabet = ALPHABET[:4]
+        workloads = [
+            ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 32))) for _ in range(requests)]
+            for _ in range(connections)
+        ]
+    else:
+        # Strings of a fixed length, uniformly accepted ones mixed with near misses
+        generator = StringGenerator(DFA.from_regex(regex), seed)
+        workloads = [
+            [string for string, _ in generator.mixed(length, accept_ratio, requests)]
+            for _ in range(connections)
+        ]
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(
+        _run_connection((host, port, unix), regex, workload, depth, latencies) for workload in workloads
+    ))
+    return LoadReport(latencies, time.perf_counter() - start, sum(errors))
+
+
+async def _main(args):
+    server = None
+    host, port = args.host, args.port
+    if args.spawn:
+        server = MatchServer(PatternRegistry())
+        host, port = await server.start_tcp(args.host, 0)
+    try:
+        report = await run_load(args.regex, args.connections, args.requests, args.depth, host, port, args.unix,
+                                length=args.length, accept_ratio=args.accept_ratio)
+        print(report)
+    finally:
+        if server is not None:
+            print(f"server batches={server.stats.batches} requests={server.stats.requests}")
+            await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the matching server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to a Unix socket path instead of TCP")
+    parser.add_argument("--spawn", action="store_true", help="start a server in this process")
+    parser.add_argument("--regex", default="(a|b)*abb(c|d)*")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per connection")
+    parser.add_argument("--depth", type=int, default=16, help="pipelined requests per connection")
+    parser.add_argument("--length", type=int, help="generate inputs of this length from the pattern")
+    parser.add_argument("--accept-ratio", type=float, default=0.5,
+                        help="share of accepted inputs when --length is given")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,35 @@
+import sys
+
+import cli
 from converter import RegexToNFAConverter
 from dfa import DFA
+from export import write_dot
+
+
+def _draw(automaton, filename: str, **kwargs):
+    try:
+        automaton.draw_graph(**kwargs)
+    except ImportError:
+        write_dot(automaton, f"{filename}.dot")
+        print(f"graphviz is not installed, {filename}.dot is written instead")
 
 
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(cli.main(sys.argv[1:]))
+
     regex = input("Input regex: ")
 
     converter = RegexToNFAConverter(regex)
 
     nfa = converter.parse()
-    nfa.draw_graph()
+    _draw(nfa, "nfa_output")
 
     dfa = DFA.from_nfa(nfa)
-    dfa.draw_graph()
+    _draw(dfa, "dfa_output")
 
     min_dfa = dfa.build_min_dfa()
-    min_dfa.draw_graph(minimized=True)
+    _draw(min_dfa, "min_dfa_output", minimized=True)
 
     while True:
         string = input("Input string: ")
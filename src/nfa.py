@@ -1,11 +1,39 @@
 from collections import defaultdict, deque
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from graphviz import Digraph
-from typing_extensions import Self
+try:
+    from typing import Self
+except ImportError:  # Python < 3.11
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from budget import CompilationBudget
 
 EPSILON = "ε"
 
+
+class Tag:
+    # Label of an ε-transition that records the current input position in tag slot `slot`.
+    # Capture group n opens with tag 2n and closes with tag 2n + 1. Not an int, so it never
+    # collides with integer event code symbols in a transition map
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: int):
+        self.slot = slot
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Tag) and other.slot == self.slot
+
+    def __hash__(self) -> int:
+        return hash((Tag, self.slot))
+
+    def __repr__(self) -> str:
+        return f"Tag({self.slot})"
+
+    def __str__(self) -> str:
+        return f"t{self.slot}"
+
+
 RawDFATable = dict[tuple[int, ...], dict[str, tuple[int, ...]]]
 RawAcceptingStates = set[tuple[int, ...]]
 
@@ -134,28 +162,10 @@ class NFA:
 
         return graph
 
-    def draw_graph(self):
-        dot = Digraph()
-        dot.attr(rankdir='LR')
-
-        graph = self.build_graph()
+    def draw_graph(self, view: bool = True):
+        from visualize import draw_nfa
 
-        for state in graph:
-            if not graph[state] or self.out_state.id == state:
-                dot.node(str(state), str(state), shape='doublecircle')
-            else:
-                dot.node(str(state), str(state), shape='circle')
-
-        dot.node('start', '', shape='none')  # invisible node
-        dot.edge('start', '1', '')
-
-        for state, paths in graph.items():
-            for symbol, next_states in paths.items():
-                for next_state in next_states:
-                    label = str(symbol)
-                    dot.edge(str(state), str(next_state), label=label)
-
-        dot.render("nfa_output", format="png", view=True)
+        draw_nfa(self, view=view)
 
 
 def char(symbol: str) -> NFA:
@@ -225,6 +235,17 @@ def rep(fragment: NFA) -> NFA:
     return NFA(in_state, out_state)
 
 
+def group(fragment: NFA, number: int) -> NFA:
+    in_state = State()
+    out_state = State(accepting=True)
+
+    fragment.out_state.accepting = False
+
+    in_state.add_transition_for_symbol(Tag(2 * number), fragment.in_state)
+    fragment.out_state.add_transition_for_symbol(Tag(2 * number + 1), out_state)
+    return NFA(in_state, out_state)
+
+
 def plus(fragment: NFA) -> NFA:
     return concat(fragment, rep(fragment))
 
@@ -263,7 +284,7 @@ def move(state_ids: set[int], symbol: str, transition_table: dict[int, dict[str,
     return next_states
 
 
-def nfa_to_dfa(nfa: NFA) -> tuple[RawDFATable, RawAcceptingStates]:
+def nfa_to_dfa(nfa: NFA, budget: Optional["CompilationBudget"] = None) -> tuple[RawDFATable, RawAcceptingStates]:
     transition_table = nfa.get_full_transition_table()
 
     initial_closure = epsilon_closure_of_set({nfa.in_state.id}, transition_table)
@@ -277,6 +298,8 @@ def nfa_to_dfa(nfa: NFA) -> tuple[RawDFATable, RawAcceptingStates]:
     state_id_counter = 1
 
     while queue:
+        if budget is not None:
+            budget.step("subsets")
         current = queue.popleft()
         current_tuple = tuple(sorted(current))
         if current_tuple not in dfa_transition_table:
@@ -0,0 +1,184 @@
+from nfa import EPSILON
+from nfa import NFA
+from nfa import State
+
+# State id -> label -> target ids, the labels are symbols, tags and ε
+Graph = dict[int, dict[object, set[int]]]
+
+
+def _graph(nfa: NFA) -> Graph:
+    return {state: {label: set(targets) for label, targets in row.items()}
+            for state, row in nfa.build_graph().items()}
+
+
+def _merge(graph: Graph, representative: dict[int, int]) -> Graph:
+    # Every state takes over the transitions of the states it represents, ε self-loops mean nothing
+    merged: Graph = {}
+    for state, row in graph.items():
+        merged_row = merged.setdefault(representative[state], {})
+        for label, targets in row.items():
+            merged_row.setdefault(label, set()).update(representative[target] for target in targets)
+    for state, row in merged.items():
+        loops = row.get(EPSILON)
+        if loops is not None:
+            loops.discard(state)
+            if not loops:
+                del row[EPSILON]
+    return merged
+
+
+def _resolve(aliases: dict[int, int], graph: Graph) -> dict[int, int]:
+    # Follows chains of aliases to the state that stays. A chain closing on itself is an ε-cycle,
+    # all of it goes to one state
+    representative: dict[int, int] = {}
+    for state in graph:
+        path = []
+        on_path = set()
+        current = state
+        while current not in representative and current in aliases and current not in on_path:
+            path.append(current)
+            on_path.add(current)
+            current = aliases[current]
+        end = representative.get(current, current)
+        for member in path:
+            representative[member] = end
+        representative.setdefault(state, end)
+    return representative
+
+
+def epsilon_components(graph: Graph, initial: int, final: int) -> dict[int, int]:
+    # Tarjan's SCCs over the ε-transitions, iterative: all states of a component have the same closure
+    index: dict[int, int] = {}
+    low: dict[int, int] = {}
+    stack: list[int] = []
+    on_stack: set[int] = set()
+    representative: dict[int, int] = {}
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root].get(EPSILON, ())))]
+        while work:
+            state, successors = work[-1]
+            for next_state in successors:
+                if next_state not in index:
+                    index[next_state] = low[next_state] = len(index)
+                    stack.append(next_state)
+                    on_stack.add(next_state)
+                    work.append((next_state, iter(graph[next_state].get(EPSILON, ()))))
+                    break
+                if next_state in on_stack:
+                    low[state] = min(low[state], index[next_state])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[state])
+                if low[state] == index[state]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        representative[member] = state
+                        if member == state:
+                            break
+    return representative
+
+
+def pass_through_aliases(graph: Graph, initial: int, final: int) -> dict[int, int]:
+    # A state whose only transition is ε to t behaves as t. Not the final state, it would make t accept
+    aliases = {}
+    for state, row in graph.items():
+        if state != final and len(row) == 1:
+            targets = row.get(EPSILON)
+            if targets is not None and len(targets) == 1:
+                aliases[state] = next(iter(targets))
+    return _resolve(aliases, graph)
+
+
+def single_entry_aliases(graph: Graph, initial: int, final: int) -> dict[int, int]:
+    # A state entered only by ε from p can be folded into p, whose closure includes it anyway
+    entries: dict[int, list] = {}
+    for state, row in graph.items():
+        for label, targets in row.items():
+            for target in targets:
+                entries.setdefault(target, []).append((label, state))
+    aliases = {}
+    for state, incoming in entries.items():
+        if state != initial and len(incoming) == 1 and incoming[0][0] == EPSILON:
+            aliases[state] = incoming[0][1]
+    return _resolve(aliases, graph)
+
+
+def _bisimulation(edges: Graph, blocks: dict[int, object]) -> dict[int, int]:
+    # Partition refinement: states stay together while their labels lead into the same blocks
+    count = len(set(blocks.values()))
+    while True:
+        signatures = {}
+        refined = {}
+        for state, row in edges.items():
+            signature = (blocks[state], frozenset((label, blocks[target])
+                                                  for label, targets in row.items() for target in targets))
+            refined[state] = signatures.setdefault(signature, len(signatures))
+        blocks = refined
+        if len(signatures) == count:
+            break
+        count = len(signatures)
+    first = {}
+    return {state: first.setdefault(block, state) for state, block in blocks.items()}
+
+
+def forward_classes(graph: Graph, initial: int, final: int) -> dict[int, int]:
+    # Forward bisimilar states accept the same continuations
+    return _bisimulation(graph, {state: state == final for state in graph})
+
+
+def backward_classes(graph: Graph, initial: int, final: int) -> dict[int, int]:
+    # Backward bisimilar states are reached by the same prefixes. The initial and the final state are
+    # kept apart: merging would let the others start or accept
+    reverse: Graph = {state: {} for state in graph}
+    for state, row in graph.items():
+        for label, targets in row.items():
+            for target in targets:
+                reverse[target].setdefault(label, set()).add(state)
+    return _bisimulation(reverse, {state: (state == initial, state == final) for state in graph})
+
+
+# Applied in this order until the NFA stops shrinking
+_PASSES = (epsilon_components, pass_through_aliases, single_entry_aliases, forward_classes, backward_classes)
+
+
+def graph_size(graph: Graph) -> tuple[int, int, int]:
+    transitions = sum(len(targets) for row in graph.values() for targets in row.values())
+    epsilons = sum(len(row.get(EPSILON, ())) for row in graph.values())
+    return len(graph), transitions, epsilons
+
+
+def nfa_size(nfa: NFA) -> tuple[int, int, int]:
+    # States, transitions and ε-transitions among them
+    return graph_size(_graph(nfa))
+
+
+def reduce_graph(graph: Graph, initial: int, final: int) -> tuple[Graph, int, int]:
+    graph = _merge(graph, {state: state for state in graph})
+    size = None
+    while size != graph_size(graph):
+        size = graph_size(graph)
+        for reduction in _PASSES:
+            representative = reduction(graph, initial, final)
+            graph = _merge(graph, representative)
+            initial, final = representative[initial], representative[final]
+    return graph, initial, final
+
+
+def reduce_nfa(nfa: NFA) -> NFA:
+    # Same language with fewer states and ε-transitions: ε-cycles collapsed, ε-only pass-through
+    # states removed, forward and backward bisimilar states merged. The input NFA is left as it is
+    graph, initial, final = reduce_graph(_graph(nfa), nfa.in_state.id, nfa.out_state.id)
+    states = {state: State(accepting=state == final) for state in graph}
+    for state, row in graph.items():
+        for label, targets in row.items():
+            for target in sorted(targets):
+                states[state].add_transition_for_symbol(label, states[target])
+    return NFA(states[initial], states[final])
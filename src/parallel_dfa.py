@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from nfa import EPSILON
+from nfa import NFA
+from nfa import RawAcceptingStates
+from nfa import RawDFATable
+from nfa import epsilon_closure_of_state
+
+if TYPE_CHECKING:
+    from budget import CompilationBudget
+
+# Frontiers smaller than this are expanded by the coordinator, shipping them costs more than it saves
+MIN_PARALLEL_FRONTIER = 64
+# Batches per worker and level, more batches even out the work at the cost of messages
+BATCHES_PER_WORKER = 4
+
+# Per NFA state, per symbol index: bitset of the ε-closure of every state reached on that symbol
+StepTable = list[list[int]]
+
+_worker_steps: Optional[StepTable] = None
+
+
+def set_bits(mask: int) -> list[int]:
+    states = []
+    while mask:
+        low = mask & -mask
+        states.append(low.bit_length() - 1)
+        mask ^= low
+    return states
+
+
+def build_step_table(transition_table: dict[int, dict[str, list[int]]], symbols: list[str]) -> StepTable:
+    closures = {state: 0 for state in transition_table}
+    for state in transition_table:
+        for closed in epsilon_closure_of_state(state, transition_table):
+            closures[state] |= 1 << closed
+
+    steps = [[0] * len(symbols) for _ in range(max(transition_table) + 1)]
+    for state, transitions in transition_table.items():
+        row = steps[state]
+        for column, symbol in enumerate(symbols):
+            for next_state in transitions.get(symbol, ()):
+                row[column] |= closures[next_state]
+    return steps
+
+
+def expand(steps: StepTable, subsets: list[int]) -> list[list[int]]:
+    # Successor bitset of every subset on every symbol, move and ε-closure in one step
+    results = []
+    width = len(steps[0]) if steps else 0
+    for subset in subsets:
+        successors = [0] * width
+        for state in set_bits(subset):
+            for column, mask in enumerate(steps[state]):
+                if mask:
+                    successors[column] |= mask
+        results.append(successors)
+    return results
+
+
+def _init_worker(steps: StepTable):
+    global _worker_steps
+    _worker_steps = steps
+
+
+def _expand_batch(subsets: list[int]) -> list[list[int]]:
+    return expand(_worker_steps, subsets)
+
+
+def _key(subset: int) -> tuple[int, ...]:
+    return tuple(set_bits(subset))
+
+
+def nfa_to_dfa_parallel(nfa: NFA, workers: int = 2, budget: Optional["CompilationBudget"] = None
+                        ) -> tuple[RawDFATable, RawAcceptingStates]:
+    # Same result as nfa.nfa_to_dfa, built level by level: the frontier of new subsets is split into
+    # batches that workers expand, the coordinator interns the returned bitsets into the next frontier
+    transition_table = nfa.get_full_transition_table()
+    symbols = sorted({symbol for transitions in transition_table.values() for symbol in transitions
+                      if symbol != EPSILON})
+    steps = build_step_table(transition_table, symbols)
+
+    initial = 0
+    for state in epsilon_closure_of_state(nfa.in_state.id, transition_table):
+        initial |= 1 << state
+    accept_bit = 1 << nfa.out_state.id
+
+    # Workers receive the step table once, afterwards only bitsets travel
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(steps,))
+
+    table: RawDFATable = {}
+    accepts: RawAcceptingStates = set()
+    keys = {initial: _key(initial)}
+    frontier = [initial]
+    try:
+        while frontier:
+            if executor is None or len(frontier) < MIN_PARALLEL_FRONTIER:
+                expanded = expand(steps, frontier)
+            else:
+                size = max(1, len(frontier) // (workers * BATCHES_PER_WORKER))
+                batches = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                expanded = [row for rows in executor.map(_expand_batch, batches) for row in rows]
+
+            next_frontier = []
+            for subset, successors in zip(frontier, expanded):
+                if budget is not None:
+                    budget.step("subsets")
+                key = keys[subset]
+                if subset & accept_bit:
+                    accepts.add(key)
+                row = table[key] = {}
+                for symbol, successor in zip(symbols, successors):
+                    if not successor:
+                        continue
+                    successor_key = keys.get(successor)
+                    if successor_key is None:
+                        successor_key = keys[successor] = _key(successor)
+                        next_frontier.append(successor)
+                    row[symbol] = successor_key
+            frontier = next_frontier
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return table, accepts
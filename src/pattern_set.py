@@ -0,0 +1,158 @@
+import threading
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from dfa import DFA
+
+if TYPE_CHECKING:
+    from budget import CompilationBudget
+
+# Patterns per shard: a change rebuilds one shard, matching walks every shard
+SHARD_SIZE = 16
+# Product states cached per shard before the cache is dropped
+SHARD_CACHE_LIMIT = 10000
+
+
+class _Shard:
+    # Lazy product of a few minimal DFAs: a product state holds the state of every DFA, None once that
+    # DFA has no transition. Rows and accepted ids are built on first use and cached
+
+    def __init__(self, patterns: tuple[tuple[int, DFA], ...], cache_limit: int):
+        self.patterns = patterns
+        self.tables = tuple(dfa.table for _, dfa in patterns)
+        self.initial = tuple(dfa.initial_state for _, dfa in patterns)
+        self.cache_limit = cache_limit
+        self.flushes = 0
+        self._rows: dict[tuple, dict] = {}
+        self._accepted: dict[tuple, frozenset] = {}
+
+    @property
+    def ids(self) -> tuple[int, ...]:
+        return tuple(pattern_id for pattern_id, _ in self.patterns)
+
+    @property
+    def cached_states(self) -> int:
+        return len(self._rows)
+
+    def _step(self, state: tuple, symbol) -> Optional[tuple]:
+        next_state = tuple(None if current is None else table[current].get(symbol)
+                           for current, table in zip(state, self.tables))
+        return next_state if any(current is not None for current in next_state) else None
+
+    def _accepted_ids(self, state: tuple) -> frozenset:
+        accepted = self._accepted.get(state)
+        if accepted is None:
+            accepted = self._accepted[state] = frozenset(
+                pattern_id for (pattern_id, dfa), current in zip(self.patterns, state) if current in dfa.accepts)
+        return accepted
+
+    def _row(self, state: tuple) -> dict:
+        # Checked whenever a row is added, so one long input cannot grow the cache past the limit
+        if len(self._rows) >= self.cache_limit:
+            self._rows.clear()
+            self._accepted.clear()
+            self.flushes += 1
+        row = self._rows[state] = {}
+        return row
+
+    def match(self, string: Iterable) -> frozenset:
+        rows = self._rows
+        state = self.initial
+        for symbol in string:
+            row = rows.get(state)
+            if row is None:
+                row = self._row(state)
+            if symbol in row:
+                state = row[symbol]
+            else:
+                state = row[symbol] = self._step(state, symbol)
+            if state is None:
+                return frozenset()
+        return self._accepted_ids(state)
+
+
+class PatternSet:
+    # Multi-pattern matcher that takes rule changes without recompiling the rest: every pattern keeps
+    # its own minimal DFA, the patterns are grouped into shards matched as lazy products. add() and
+    # remove() compile at most one pattern and replace one shard (two when an underfilled shard is
+    # merged), the other shards keep their warm caches. Readers take the tuple of shards in one
+    # attribute read, writers swap in a new tuple
+
+    def __init__(self, regexes: Iterable[str] = (), shard_size: int = SHARD_SIZE,
+                 cache_limit: int = SHARD_CACHE_LIMIT):
+        self.shard_size = shard_size
+        self.cache_limit = cache_limit
+        self.regexes: dict[int, str] = {}
+        self._shards: tuple[_Shard, ...] = ()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        for regex in regexes:
+            self.add(regex)
+
+    def __len__(self) -> int:
+        return len(self.regexes)
+
+    def __contains__(self, pattern_id: int) -> bool:
+        return pattern_id in self.regexes
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def add(self, regex: str, budget: Optional["CompilationBudget"] = None) -> int:
+        # Compiled before the lock is taken, so a slow pattern does not hold up other changes
+        dfa = DFA.from_regex(regex, budget=budget)
+        with self._lock:
+            pattern_id = self._next_id
+            self._next_id += 1
+            shards = list(self._shards)
+            # The emptiest shard takes the pattern, so removals elsewhere leave no holes behind
+            open_shards = [index for index, shard in enumerate(shards) if len(shard.patterns) < self.shard_size]
+            if open_shards:
+                index = min(open_shards, key=lambda index: len(shards[index].patterns))
+                shards[index] = _Shard(shards[index].patterns + ((pattern_id, dfa),), self.cache_limit)
+            else:
+                shards.append(_Shard(((pattern_id, dfa),), self.cache_limit))
+            self._shards = tuple(shards)
+            self.regexes[pattern_id] = regex
+        return pattern_id
+
+    def remove(self, pattern_id: int):
+        with self._lock:
+            if pattern_id not in self.regexes:
+                raise KeyError(pattern_id)
+            shards = list(self._shards)
+            index = next(index for index, shard in enumerate(shards) if pattern_id in shard.ids)
+            patterns = tuple(pattern for pattern in shards[index].patterns if pattern[0] != pattern_id)
+            del shards[index]
+            if patterns and len(patterns) < self.shard_size // 2:
+                # An underfilled shard is merged into the smallest one that still has room for it
+                fits = [other for other, shard in enumerate(shards)
+                        if len(shard.patterns) + len(patterns) <= self.shard_size]
+                if fits:
+                    other = min(fits, key=lambda other: len(shards[other].patterns))
+                    patterns = shards[other].patterns + patterns
+                    del shards[other]
+            if patterns:
+                shards.append(_Shard(patterns, self.cache_limit))
+            self._shards = tuple(shards)
+            del self.regexes[pattern_id]
+
+    def match(self, string: str) -> set[int]:
+        # Ids of the patterns that match the whole string
+        matched = set()
+        for shard in self._shards:
+            matched.update(shard.match(string))
+        return matched
+
+    def match_batch(self, strings: Iterable[str]) -> list[set[int]]:
+        shards = self._shards
+        results = []
+        for string in strings:
+            matched = set()
+            for shard in shards:
+                matched.update(shard.match(string))
+            results.append(matched)
+        return results
+
+    def __repr__(self) -> str:
+        return f"PatternSet(patterns={len(self)}, shards={self.shards})"
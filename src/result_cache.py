@@ -0,0 +1,138 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+# Default memory cap of one pattern's cache
+DEFAULT_MAX_BYTES = 1 << 20
+# Longer inputs are matched without the cache: they are rarely repeated and would crowd out the rest
+DEFAULT_MAX_LENGTH = 256
+# Ordered dict node, hash table slot and the cached bool, on top of the key itself
+ENTRY_OVERHEAD = 100
+
+
+class CachedMatcher:
+    # Bounded LRU cache of verdicts in front of a matcher (DFA, ByteDFA, LazyDFA, ...), keyed by the
+    # input. Pays off when traffic repeats exact strings; hit_rate shows whether it does
+
+    def __init__(self, matcher, max_bytes: int = DEFAULT_MAX_BYTES, max_length: int = DEFAULT_MAX_LENGTH):
+        self.matcher = matcher
+        self.max_bytes = max_bytes
+        self.max_length = max_length
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Inputs too long (or unhashable) to be cached
+        self.bypassed = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.bypassed
+        return self.hits / lookups if lookups else 0.0
+
+    def _cacheable(self, key) -> bool:
+        # hash() is the only reliable test: a tuple holding a list passes isinstance(key, Hashable).
+        # Iterators hash but have no length, they are consumed by the matcher and must not be cached.
+        # Memoryviews are bypassed: a writable one raises ValueError on hash(), a read-only one would pin
+        # its whole buffer in the cache while sys.getsizeof counts only the view
+        if isinstance(key, memoryview):
+            return False
+        try:
+            hash(key)
+            return len(key) <= self.max_length
+        except (TypeError, ValueError):
+            return False
+
+    def _bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def _lookup(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return result
+
+    def _store(self, key, result: bool):
+        cost = sys.getsizeof(key) + ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = result
+            self.size += cost
+            while self.size > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self.size -= sys.getsizeof(evicted) + ENTRY_OVERHEAD
+                self.evictions += 1
+
+    def test(self, string) -> bool:
+        if not self._cacheable(string):
+            self._bypass()
+            return self.matcher.test(string)
+        result = self._lookup(string)
+        if result is None:
+            result = self.matcher.test(string)
+            self._store(string, result)
+        return result
+
+    def test_batch(self, strings: Iterable) -> list[bool]:
+        # Hits are answered from the cache, the distinct misses go to the matcher's own batch API in
+        # one call. Repeats of a miss within the batch count as hits
+        results = []
+        missing: dict = {}
+        bypassed = []
+        for string in strings:
+            result = None
+            if not self._cacheable(string):
+                self._bypass()
+                bypassed.append((len(results), string))
+            elif string in missing:
+                with self._lock:
+                    self.hits += 1
+                missing[string].append(len(results))
+            else:
+                result = self._lookup(string)
+                if result is None:
+                    missing[string] = [len(results)]
+            results.append(result)
+
+        if missing:
+            for string, result in zip(missing, self.matcher.test_batch(list(missing))):
+                for index in missing[string]:
+                    results[index] = result
+                self._store(string, result)
+        if bypassed:
+            for (index, _), result in zip(bypassed, self.matcher.test_batch([string for _, string in bypassed])):
+                results[index] = result
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def __repr__(self) -> str:
+        return f"CachedMatcher(entries={len(self)}, hit_rate={self.hit_rate:.3f})"
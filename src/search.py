@@ -0,0 +1,129 @@
+from typing import Iterable, Iterator, Optional, Union
+
+from dfa import DFA
+from literals import Prefilter
+from literals import required_literals
+from utf8 import ByteDFA
+
+Text = Union[str, bytes]
+
+
+class PrefilterStats:
+
+    def __init__(self):
+        self.checked = 0
+        self.skipped = 0
+        self.candidates = 0
+        self.matches = 0
+
+    @property
+    def hit_rate(self) -> float:
+        # Share of inputs the prefilter let through to the automaton
+        return self.candidates / self.checked if self.checked else 0.0
+
+    @property
+    def false_positive_rate(self) -> float:
+        return (self.candidates - self.matches) / self.candidates if self.candidates else 0.0
+
+    def __repr__(self) -> str:
+        return (f"PrefilterStats(checked={self.checked}, skipped={self.skipped}, candidates={self.candidates}, "
+                f"matches={self.matches}, hit_rate={self.hit_rate:.3f})")
+
+
+class Searcher:
+
+    def __init__(self, regex: str, use_prefilter: bool = True):
+        self.regex = regex
+        self.dfa = DFA.from_regex(regex)
+        literals = required_literals(regex) if use_prefilter else None
+        self.prefilter = Prefilter(literals) if literals else None
+        self.max_length = self.dfa.analysis.max_length
+        self.stats = PrefilterStats()
+        self._byte_dfa: Optional[ByteDFA] = None
+
+    @property
+    def byte_dfa(self) -> ByteDFA:
+        # Built on first use, bytes input is then matched without decoding
+        if self._byte_dfa is None:
+            self._byte_dfa = ByteDFA(self.dfa)
+        return self._byte_dfa
+
+    def _passes_prefilter(self, text: Text) -> bool:
+        if self.prefilter is None:
+            return True
+        stats = self.stats
+        stats.checked += 1
+        if self.prefilter.may_match(text):
+            stats.candidates += 1
+            return True
+        stats.skipped += 1
+        return False
+
+    def _longest_from(self, text: Text, start: int, dfa: DFA) -> int:
+        # End of the longest match anchored at start, -1 if there is none
+        table = dfa.table
+        accepts = dfa.accepts
+        state = dfa.initial_state
+        end = start if state in accepts else -1
+        for position in range(start, len(text)):
+            state = table[state].get(text[position])
+            if state is None:
+                break
+            if state in accepts:
+                end = position + 1
+        return end
+
+    def fullmatch(self, text: Text) -> bool:
+        if not self._passes_prefilter(text):
+            return False
+        if isinstance(text, bytes):
+            matched = self.byte_dfa.test(text)
+        else:
+            matched = self.dfa.test(text)
+        if matched and self.prefilter is not None:
+            self.stats.matches += 1
+        return matched
+
+    def search(self, text: Text) -> Optional[tuple[int, int]]:
+        # Leftmost-longest span of a substring in the language
+        if not self._passes_prefilter(text):
+            return None
+        if isinstance(text, bytes):
+            # Searched on the UTF-8 byte automaton, so the span is in bytes and invalid bytes never match.
+            # A character is at most 4 bytes
+            max_length = None if self.max_length is None else 4 * self.max_length
+            span = self._search(text, self.byte_dfa.dfa, max_length)
+        else:
+            span = self._search(text, self.dfa, self.max_length)
+        if span is not None and self.prefilter is not None:
+            self.stats.matches += 1
+        return span
+
+    def _search(self, text: Text, dfa: DFA, max_length: Optional[int]) -> Optional[tuple[int, int]]:
+        if self.prefilter is None:
+            for start in range(len(text) + 1):
+                end = self._longest_from(text, start, dfa)
+                if end != -1:
+                    return start, end
+            return None
+
+        # Every match contains a literal occurrence, so the automaton only runs from starts close enough
+        # to reach the next occurrence, and the search stops after the last one
+        prefilter = self.prefilter
+        start = 0
+        while True:
+            occurrence = prefilter.find(text, start)
+            if occurrence == -1:
+                return None
+            if max_length is not None:
+                start = max(start, occurrence + prefilter.min_length - max_length)
+            for candidate in range(start, occurrence + 1):
+                end = self._longest_from(text, candidate, dfa)
+                if end != -1:
+                    return candidate, end
+            start = occurrence + 1
+
+    def filter_lines(self, lines: Iterable[Text]) -> Iterator[Text]:
+        for line in lines:
+            if self.search(line) is not None:
+                yield line
@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Union
+
+from budget import CompilationBudget
+from budget import CompilationCancelled
+from complexity import DFA_STATE_LIMIT
+from complexity import check_complexity
+from dfa import DFA
+from result_cache import CachedMatcher
+
+# Line protocol, one request per line, responses in request order per connection:
+#   COMPILE <regex>          -> OK <pattern id> | ERR <message>
+#   MATCH <pattern id> <str> -> 1 | 0 | ERR <message>
+#   STATS                    -> OK requests=<n> batches=<n> cache_hit_rate=<f> patterns=<n>
+
+DEFAULT_BATCH_WINDOW = 0.0005
+DEFAULT_MAX_BATCH = 1024
+# Longest request line in bytes, longer ones are answered with an error and skipped
+DEFAULT_MAX_LINE = 1 << 20
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _compile_dfa(regex: str, timeout: Optional[float]) -> DFA:
+    # Runs in a worker process, the deadline is set there so queueing time is not charged to it
+    return DFA.from_regex(regex, budget=CompilationBudget(timeout) if timeout is not None else None)
+
+
+class _PatternBatcher:
+
+    def __init__(self, matcher: Union[DFA, CachedMatcher], window: float, max_batch: int, stats: "ServerStats"):
+        self.matcher = matcher
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self._strings: list[str] = []
+        self._futures: list[asyncio.Future] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, string: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._strings.append(string)
+        self._futures.append(future)
+
+        if len(self._strings) >= self.max_batch:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        strings, futures = self._strings, self._futures
+        self._strings, self._futures = [], []
+        if not strings:
+            return
+
+        # One pass of the batched matcher for every request collected within the window
+        self.stats.batches += 1
+        try:
+            results = self.matcher.test_batch(strings)
+        except Exception as error:
+            # Every request of the batch gets the error, none of them is left waiting
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class ServerStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.compilations = 0
+
+
+class PatternRegistry:
+
+    def __init__(self, executor: Optional[Executor] = None, batch_window: float = DEFAULT_BATCH_WINDOW,
+                 max_batch: int = DEFAULT_MAX_BATCH, stats: Optional[ServerStats] = None,
+                 max_dfa_states: Optional[int] = DFA_STATE_LIMIT, compile_timeout: Optional[float] = None,
+                 result_cache_bytes: Optional[int] = None):
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = stats or ServerStats()
+        # Patterns whose estimated DFA is larger are refused before any worker spends time on them
+        self.max_dfa_states = max_dfa_states
+        # Seconds a worker may spend on one compilation before it gives up
+        self.compile_timeout = compile_timeout
+        # Memory cap of the per-pattern verdict cache, None matches every request
+        self.result_cache_bytes = result_cache_bytes
+        self._ids: dict[str, int] = {}
+        self._batchers: list[_PatternBatcher] = []
+        self._pending: dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._batchers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor()
+        return self._executor
+
+    async def compile(self, regex: str) -> int:
+        if regex in self._ids:
+            return self._ids[regex]
+
+        # Concurrent requests for the same regex share one compilation
+        pending = self._pending.get(regex)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compile(regex))
+            self._pending[regex] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(regex, None))
+        return await asyncio.shield(pending)
+
+    async def _compile(self, regex: str) -> int:
+        if self.max_dfa_states is not None:
+            check_complexity(regex, self.max_dfa_states)
+        loop = asyncio.get_running_loop()
+        self.stats.compilations += 1
+        # Determinization and minimization run in the executor so they never block the event loop
+        dfa = await loop.run_in_executor(self._get_executor(), _compile_dfa, regex, self.compile_timeout)
+        matcher = dfa if self.result_cache_bytes is None else CachedMatcher(dfa, self.result_cache_bytes)
+        self._ids[regex] = len(self._batchers)
+        self._batchers.append(_PatternBatcher(matcher, self.batch_window, self.max_batch, self.stats))
+        return self._ids[regex]
+
+    @property
+    def cache_hit_rate(self) -> float:
+        caches = [batcher.matcher for batcher in self._batchers if isinstance(batcher.matcher, CachedMatcher)]
+        hits = sum(cache.hits for cache in caches)
+        lookups = sum(cache.hits + cache.misses + cache.bypassed for cache in caches)
+        return hits / lookups if lookups else 0.0
+
+    def match(self, pattern_id: int, string: str) -> asyncio.Future:
+        if not 0 <= pattern_id < len(self._batchers):
+            raise ProtocolError(f"unknown pattern {pattern_id}")
+        return self._batchers[pattern_id].submit(string)
+
+    def close(self):
+        for batcher in self._batchers:
+            batcher.flush()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class MatchServer:
+
+    def __init__(self, registry: Optional[PatternRegistry] = None, max_line: int = DEFAULT_MAX_LINE):
+        self.registry = registry if registry is not None else PatternRegistry()
+        self.max_line = max_line
+        self.stats = self.registry.stats
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=self.max_line)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> str:
+        self._server = await asyncio.start_unix_server(self._handle_connection, path, limit=self.max_line)
+        return path
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Closing the transports ends the pending reads, so every handler finishes normally
+        connections = list(self._connections.items())
+        for _, writer in connections:
+            writer.close()
+        await asyncio.gather(*(connection for connection, _ in connections), return_exceptions=True)
+        self.registry.close()
+
+    async def _respond(self, line: bytes) -> bytes:
+        try:
+            command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+            if command == "MATCH":
+                pattern_id, _, string = argument.partition(" ")
+                if not pattern_id.isdigit():
+                    raise ProtocolError(f"bad pattern id {pattern_id!r}")
+                self.stats.requests += 1
+                result = await self.registry.match(int(pattern_id), string)
+                return b"1\n" if result else b"0\n"
+            if command == "COMPILE":
+                pattern_id = await self.registry.compile(argument)
+                return f"OK {pattern_id}\n".encode()
+            if command == "STATS":
+                return (f"OK requests={self.stats.requests} batches={self.stats.batches} "
+                        f"cache_hit_rate={self.registry.cache_hit_rate:.3f} "
+                        f"patterns={len(self.registry)}\n").encode()
+            raise ProtocolError(f"unknown command {command!r}")
+        except (ProtocolError, ValueError, UnicodeDecodeError, CompilationCancelled) as error:
+            message = str(error).replace("\n", " ")
+            return f"ERR {message}\n".encode()
+        except Exception as error:
+            # Anything else (a RecursionError in a worker, a broken process pool) still answers the
+            # request, otherwise the response writer of the connection would stop
+            message = f"{type(error).__name__}: {error}".replace("\n", " ")
+            return f"ERR {message}\n".encode()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Requests of one connection are handled concurrently (so they can share batches),
+        # a writer task sends the responses back in request order
+        responses: asyncio.Queue = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                task = await responses.get()
+                if task is None:
+                    break
+                writer.write(await task)
+                if responses.empty():
+                    await writer.drain()
+
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    # The last line may come without a newline
+                    line = error.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError:
+                    too_long = asyncio.get_running_loop().create_future()
+                    too_long.set_result(b"ERR line too long\n")
+                    responses.put_nowait(too_long)
+                    await _skip_line(reader)
+                    continue
+                responses.put_nowait(asyncio.ensure_future(self._respond(line)))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(connection, None)
+            responses.put_nowait(None)
+            await asyncio.gather(writer_task, return_exceptions=True)
+            writer.close()
+
+
+async def _skip_line(reader: asyncio.StreamReader):
+    # Drops the rest of an oversized line, a chunk of at most the stream limit at a time
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+
+
+async def _serve(args):
+    server = MatchServer(PatternRegistry(batch_window=args.batch_window, max_batch=args.max_batch,
+                                         compile_timeout=args.compile_timeout,
+                                         result_cache_bytes=args.result_cache_bytes),
+                         max_line=args.max_line)
+    if args.unix:
+        print(f"Listening on {await server.start_unix(args.unix)}", flush=True)
+    else:
+        host, port = await server.start_tcp(args.host, args.port)
+        print(f"Listening on {host}:{port}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex matching server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket path instead of TCP")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW,
+                        help="seconds to collect requests for one pattern into a batch")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--compile-timeout", type=float, help="seconds one COMPILE may take")
+    parser.add_argument("--max-line", type=int, default=DEFAULT_MAX_LINE, help="longest request line in bytes")
+    parser.add_argument("--result-cache-bytes", type=int, help="memory cap of each pattern's verdict cache")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
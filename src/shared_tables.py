@@ -0,0 +1,206 @@
+import atexit
+import json
+import struct
+import sys
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+from compressed import CompressedDFA
+from dfa import DFA
+from equivalence import fingerprint
+
+# Segment layout: header, symbols as JSON, then the int32 arrays of the compressed table and the
+# accepting flags. Everything a view needs is in the segment, so any process can attach by name
+_MAGIC = b"DFA1"
+_HEADER = struct.Struct("<4sIIIII")
+_ALIGNMENT = 8
+
+NAME_PREFIX = "dfa_"
+
+# Segments created by this process, guarded by _attach_lock
+_created: set[str] = set()
+_attach_lock = threading.Lock()
+
+
+def segment_name(dfa: DFA) -> str:
+    # Content addressed: publishing the same language twice reuses one segment
+    return NAME_PREFIX + fingerprint(dfa, minimize=False)[:24]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _open_untracked(name: str) -> SharedMemory:
+    # Views only borrow the segment. On Python < 3.13 attaching registers it with the resource tracker,
+    # which would unlink it under the publisher when the attaching process exits, so it is unregistered
+    # again unless this process created the segment and the tracker has to keep it
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    memory = SharedMemory(name)
+    with _attach_lock:
+        if name not in _created:
+            resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+class SharedDFA(CompressedDFA):
+    # Read-only compressed DFA whose arrays are memoryviews into a shared memory segment, nothing is copied
+
+    def __init__(self, memory: SharedMemory):
+        self.name = memory.name
+        self._memory = memory
+        self._views: list[memoryview] = []
+        buffer = memory.buf
+        magic, states, slots, rows, initial_state, symbols_size = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError(f"shared memory segment {memory.name!r} does not hold a DFA table")
+
+        offset = _HEADER.size
+        symbols = json.loads(bytes(buffer[offset:offset + symbols_size]))
+        offset = _aligned(offset + symbols_size)
+
+        views = []
+        for length in (states, states, slots, slots):
+            views.append(buffer[offset:offset + 4 * length].toreadonly().cast("i"))
+            offset += 4 * length
+        accepting = buffer[offset:offset + states].toreadonly()
+        self._views = views + [accepting]
+
+        columns = {symbol: column for column, symbol in enumerate(symbols)}
+        super().__init__(columns, *views, accepting, initial_state, rows)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedDFA":
+        return cls(_open_untracked(name))
+
+    def close(self):
+        # Views have to be released before the mapping can be closed
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._memory.close()
+
+    def __del__(self):
+        if hasattr(self, "_memory"):
+            self.close()
+
+    def __enter__(self) -> "SharedDFA":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        # Sent to a worker process, the view attaches to the same segment instead of copying the table
+        return type(self).attach, (self.name,)
+
+
+def _write_segment(name: str, compressed: CompressedDFA) -> SharedMemory:
+    symbols = json.dumps(list(compressed.columns)).encode()
+    arrays = (compressed.state_base, compressed.state_row, compressed.next_states, compressed.check)
+    arrays_offset = _aligned(_HEADER.size + len(symbols))
+    size = arrays_offset + sum(4 * len(values) for values in arrays) + len(compressed.accepting)
+
+    with _attach_lock:
+        memory = SharedMemory(name, create=True, size=size)
+        _created.add(name)
+    buffer = memory.buf
+    _HEADER.pack_into(buffer, 0, _MAGIC, compressed.state_count, len(compressed.next_states), compressed.rows,
+                      compressed.initial_state, len(symbols))
+    buffer[_HEADER.size:_HEADER.size + len(symbols)] = symbols
+    offset = arrays_offset
+    for values in arrays:
+        data = values.tobytes()
+        buffer[offset:offset + len(data)] = data
+        offset += len(data)
+    buffer[offset:offset + len(compressed.accepting)] = compressed.accepting
+    return memory
+
+
+class SharedTableRegistry:
+    # Reference counts the segments of one process. Published segments are owned and unlinked when
+    # their last reference is released or the process exits, attached ones are only closed
+
+    def __init__(self):
+        self._owned: dict[str, SharedMemory] = {}
+        self._views: dict[str, SharedDFA] = {}
+        self._references: dict[str, int] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def publish(self, dfa: DFA) -> str:
+        name = segment_name(dfa)
+        with self._lock:
+            if name not in self._references:
+                try:
+                    self._owned[name] = _write_segment(name, CompressedDFA.from_dfa(dfa))
+                except FileExistsError:
+                    # Another process published the same table first, it stays the owner
+                    pass
+            self._references[name] = self._references.get(name, 0) + 1
+        return name
+
+    def attach(self, name: str) -> SharedDFA:
+        with self._lock:
+            view = self._views.get(name)
+            if view is None:
+                view = self._views[name] = SharedDFA.attach(name)
+            self._references[name] = self._references.get(name, 0) + 1
+        return view
+
+    def references(self, name: str) -> int:
+        return self._references.get(name, 0)
+
+    def release(self, name: str):
+        with self._lock:
+            count = self._references.get(name, 0) - 1
+            if count > 0:
+                self._references[name] = count
+                return
+            self._references.pop(name, None)
+            self._drop(name)
+
+    def _drop(self, name: str):
+        view = self._views.pop(name, None)
+        if view is not None:
+            view.close()
+        memory = self._owned.pop(name, None)
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+            with _attach_lock:
+                _created.discard(name)
+
+    def close(self):
+        with self._lock:
+            for name in list(self._references):
+                self._drop(name)
+            self._references.clear()
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+
+_default_registry: Optional[SharedTableRegistry] = None
+
+
+def default_registry() -> SharedTableRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = SharedTableRegistry()
+    return _default_registry
+
+
+def publish(dfa: DFA) -> str:
+    return default_registry().publish(dfa)
+
+
+def attach(name: str) -> SharedDFA:
+    return default_registry().attach(name)
+
+
+def release(name: str):
+    default_registry().release(name)
@@ -0,0 +1,176 @@
+from typing import Iterable
+
+from dfa import DFA
+from nfa import EPSILON
+from nfa import NFA
+from nfa import State
+from nfa import char
+from nfa import concat
+from nfa import opt
+from nfa import plus
+from nfa import rep
+from nfa import union
+
+from converter import check_symbol
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS
+
+# Subtrees with fewer Thompson states than this are cheaper to rebuild than to share
+MIN_SHARED_STATES = 8
+
+_BINARY = {CONCAT: concat, UNION: union}
+_UNARY = {OPT: opt, STAR: rep, PLUS: plus}
+
+
+class SharingStats:
+
+    def __init__(self):
+        # Subtree occurrences parsed and distinct subtrees kept
+        self.occurrences = 0
+        self.unique = 0
+        self.fragments_built = 0
+        self.fragment_hits = 0
+        # NFA states that were not created because a shared sub-DFA stood in for a Thompson fragment.
+        # A sub-DFA larger than its fragment saves nothing rather than counting against the others
+        self.states_saved = 0
+
+    @property
+    def sharing_ratio(self) -> float:
+        # Share of parsed subtrees that were already known
+        return 1 - self.unique / self.occurrences if self.occurrences else 0.0
+
+    def __repr__(self) -> str:
+        return (f"SharingStats(occurrences={self.occurrences}, unique={self.unique}, "
+                f"sharing_ratio={self.sharing_ratio:.3f}, fragments_built={self.fragments_built}, "
+                f"fragment_hits={self.fragment_hits}, states_saved={self.states_saved})")
+
+
+def _instantiate(dfa: DFA) -> NFA:
+    # Fresh NFA fragment with the language of a shared minimal DFA, the DFA itself is never modified
+    states = {state: State() for state in dfa.table}
+    for state, transitions in dfa.table.items():
+        for symbol, next_state in transitions.items():
+            if next_state not in states:
+                states[next_state] = State()
+            states[state].add_transition_for_symbol(symbol, states[next_state])
+    out_state = State(accepting=True)
+    for state in dfa.accepts:
+        states[state].add_transition_for_symbol(EPSILON, out_state)
+    return NFA(states[dfa.initial_state], out_state)
+
+
+class CompilationSession:
+    # Hash-consing of parsed subexpressions across all patterns compiled in the session. Structurally
+    # identical subtrees get one node id; subtrees seen more than once are determinized and minimized
+    # once, and every later use instantiates a fresh NFA fragment from that immutable sub-DFA.
+
+    def __init__(self, min_shared_states: int = MIN_SHARED_STATES):
+        self.min_shared_states = min_shared_states
+        self.stats = SharingStats()
+        self._ids: dict[tuple, int] = {}
+        # Per node: (kind, operands) with node ids as operands, the symbol for SYMBOL nodes
+        self._nodes: list[tuple] = []
+        self._thompson_states: list[int] = []
+        self._counts: list[int] = []
+        self._fragments: dict[int, DFA] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _node(self, key: tuple, thompson_states: int) -> int:
+        self.stats.occurrences += 1
+        node = self._ids.get(key)
+        if node is None:
+            node = len(self._nodes)
+            self._ids[key] = node
+            self._nodes.append(key)
+            self._thompson_states.append(thompson_states)
+            self._counts.append(0)
+            self.stats.unique += 1
+        self._counts[node] += 1
+        return node
+
+    def intern(self, regex: str) -> int:
+        tokens = tokens_to_postfix(tokenize(regex))
+        sizes = self._thompson_states
+        stack = []
+        for token_id, (kind, value) in enumerate(tokens):
+            if kind == SYMBOL:
+                stack.append(self._node((SYMBOL, check_symbol(value, tokens, token_id)), 2))
+            elif kind in _BINARY:
+                right = stack.pop()
+                left = stack.pop()
+                extra = 0 if kind == CONCAT else 2
+                stack.append(self._node((kind, left, right), sizes[left] + sizes[right] + extra))
+            else:
+                child = stack.pop()
+                extra = 4 if kind == OPT else 2
+                stack.append(self._node((kind, child), sizes[child] + extra))
+        return stack.pop()
+
+    def _shared(self, node: int) -> bool:
+        return self._counts[node] > 1 and self._thompson_states[node] >= self.min_shared_states
+
+    def _build(self, root: int) -> NFA:
+        # Iterative post-order walk, patterns can be far deeper than the recursion limit
+        results: list[NFA] = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            fragment = self._fragments.get(node)
+            if fragment is not None and not expanded:
+                self.stats.fragment_hits += 1
+                self.stats.states_saved += max(0, self._thompson_states[node] - len(fragment.table) - 1)
+                results.append(_instantiate(fragment))
+                continue
+
+            key = self._nodes[node]
+            kind = key[0]
+            if not expanded:
+                stack.append((node, True))
+                if kind != SYMBOL:
+                    stack.extend((child, False) for child in reversed(key[1:]))
+                continue
+
+            if kind == SYMBOL:
+                result = char(key[1])
+            elif kind in _BINARY:
+                right = results.pop()
+                left = results.pop()
+                result = _BINARY[kind](left, right)
+            else:
+                result = _UNARY[kind](results.pop())
+
+            if self._shared(node):
+                fragment = DFA.from_nfa(result).build_min_dfa()
+                self._fragments[node] = fragment
+                self.stats.fragments_built += 1
+                result = _instantiate(fragment)
+            results.append(result)
+        return results.pop()
+
+    def compile_nfa(self, regex: str) -> NFA:
+        return self._build(self.intern(regex))
+
+    def _dfa(self, root: int) -> DFA:
+        if root in self._fragments:
+            self.stats.fragment_hits += 1
+        else:
+            nfa = self._build(root)
+            if root not in self._fragments:
+                return DFA.from_nfa(nfa).build_min_dfa()
+        # A whole pattern that is itself shared is handed out as a copy, callers may modify their DFA
+        fragment = self._fragments[root]
+        dfa = DFA({state: dict(transitions) for state, transitions in fragment.table.items()},
+                  set(fragment.accepts), fragment.initial_state)
+        dfa.analysis = fragment.analysis
+        return dfa
+
+    def compile(self, regex: str) -> DFA:
+        return self._dfa(self.intern(regex))
+
+    def compile_many(self, regexes: Iterable[str]) -> list[DFA]:
+        # Interning every pattern first lets the first pattern already share subtrees that repeat later
+        roots = [self.intern(regex) for regex in regexes]
+        return [self._dfa(root) for root in roots]
@@ -1,3 +1,5 @@
+from typing import Optional
+
 precedence_map = {
     "(": 1,
     "|": 2,
@@ -7,50 +9,247 @@ precedence_map = {
     "+": 4
 }
 
+# Token kinds
+SYMBOL = 0
+LPAREN = 1
+RPAREN = 2
+UNION = 3
+CONCAT = 4
+OPT = 5
+STAR = 6
+PLUS = 7
+# Only in postfix built with captures, closes the capture group numbered by its value
+GROUP = 8
 
-def format_regex(regex: str) -> str:
-    res = ""
-    all_operators = ["|", "?", "+", "*"]
-    binary_operators = ["|"]
+OPERATOR_KINDS = {
+    "(": LPAREN,
+    ")": RPAREN,
+    "|": UNION,
+    "?": OPT,
+    "*": STAR,
+    "+": PLUS,
+}
 
-    for i in range(len(regex)):
-        c1 = regex[i]
-        if i + 1 < len(regex):
-            c2 = regex[i + 1]
-            res += c1
-            if (c1 != "(" and c2 != ")") and (c2 not in all_operators) and (c1 not in binary_operators):
-                res += "."
-    res += regex[-1]
-    return res
+# Event codes are written <123> and are one symbol
+CODE_OPEN = "<"
+CODE_CLOSE = ">"
 
+_SYMBOL_RUN = bytes([CONCAT, SYMBOL])
+_MARK = "\0"
+_MARKED = set(OPERATOR_KINDS) | {CODE_OPEN}
+_OPERATOR_MARKS = str.maketrans({operator: _MARK for operator in _MARKED})
+
+# Indexed by token kind. Kinds are numbered in precedence_map order,
+# so an operator pops every stacked kind at or above its threshold
+KIND_POP_THRESHOLD = [SYMBOL, LPAREN, RPAREN, UNION, CONCAT, OPT, OPT, OPT, OPT]
+
+
+class TokenArray:
+    __slots__ = ("kinds", "values", "_source", "_source_ids", "_widths")
+
+    def __init__(self, kinds: Optional[bytearray] = None, values: Optional[list] = None,
+                 source: Optional["TokenArray"] = None, source_ids: Optional[list[int]] = None,
+                 widths: Optional[list[tuple[int, int]]] = None):
+        self.kinds = bytearray() if kinds is None else kinds
+        self.values = [] if values is None else values
+        # Reordered arrays (postfix) keep the ids of their tokens in the source array
+        self._source = source
+        self._source_ids = source_ids
+        # (token id, extra characters) of the tokens longer than one character, i.e. event codes
+        self._widths = widths or []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __iter__(self):
+        return zip(self.kinds, self.values)
+
+    def __getitem__(self, token_id: int) -> tuple[int, str]:
+        return self.kinds[token_id], self.values[token_id]
+
+    def text(self) -> str:
+        return "".join(self.values)
+
+    def position(self, token_id: int) -> int:
+        # Positions are only needed for error reporting, so they are derived on demand instead of stored:
+        # every token except an inserted concatenation consumes exactly one character of the regex
+        if self._source is not None:
+            return self._source.position(self._source_ids[token_id])
+        kinds = self.kinds
+        while token_id < len(kinds) - 1 and kinds[token_id] == CONCAT:
+            token_id += 1
+        extra = sum(width for wide_id, width in self._widths if wide_id < token_id)
+        return token_id - kinds.count(CONCAT, 0, token_id) + extra
+
+
+class RegexSyntaxError(ValueError):
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position}")
+        self.message = message
+        self.position = position
+
+    def __reduce__(self):
+        return type(self), (self.message, self.position)
+
+
+def _code_end(regex: str, start: int) -> int:
+    end = regex.find(CODE_CLOSE, start)
+    if end == -1:
+        raise RegexSyntaxError(f"missing '{CODE_CLOSE}'", start)
+    digits = regex[start + 1:end]
+    if not (digits.isascii() and digits.isdigit()):
+        raise RegexSyntaxError("bad event code", start)
+    return end + 1
 
-def infix_to_postfix(regex: str) -> str:
-    postfix = ""
-    stack = []
 
-    formatted_regex = format_regex(regex)
+def parse_symbol(value: str):
+    # Symbol of a SYMBOL token: the character itself, or the integer of an event code
+    if value[0] == CODE_OPEN and len(value) > 1:
+        return int(value[1:-1])
+    return value
 
-    for c in formatted_regex:
-        if c == "(":
-            stack.append(c)
-        elif c == ")":
-            while stack[-1] != "(":
-                postfix += stack.pop()
-            stack.pop()
+
+def tokenize(regex: str) -> TokenArray:
+    kinds = bytearray()
+    values = []
+    widths = []
+
+    open_positions = []
+    # True when the previous token closes an operand, so a following operand needs an explicit concatenation
+    after_operand = False
+
+    # Operators are located with str.find on a copy where every operator is replaced by a marker,
+    # runs of plain symbols between them are emitted in bulk
+    marked = regex.translate(_OPERATOR_MARKS)
+    length = len(regex)
+
+    pos = 0
+    while pos < length:
+        operator_pos = marked.find(_MARK, pos)
+        while operator_pos != -1 and regex[operator_pos] not in _MARKED:
+            operator_pos = marked.find(_MARK, operator_pos + 1)
+        if operator_pos == -1:
+            operator_pos = length
+
+        if operator_pos > pos:
+            run = regex[pos:operator_pos]
+            if after_operand:
+                kinds.append(CONCAT)
+                values.append(".")
+            kinds.append(SYMBOL)
+            values.append(run[0])
+            if len(run) > 1:
+                kinds.extend(_SYMBOL_RUN * (len(run) - 1))
+                values.extend("." + ".".join(run[1:]))
+            after_operand = True
+            if operator_pos == length:
+                break
+
+        operator = regex[operator_pos]
+        if operator == CODE_OPEN:
+            end = _code_end(regex, operator_pos)
+            if after_operand:
+                kinds.append(CONCAT)
+                values.append(".")
+            widths.append((len(kinds), end - operator_pos - 1))
+            kinds.append(SYMBOL)
+            values.append(regex[operator_pos:end])
+            after_operand = True
+            pos = end
+            continue
+
+        kind = OPERATOR_KINDS[operator]
+        if kind == LPAREN:
+            if after_operand:
+                kinds.append(CONCAT)
+                values.append(".")
+            open_positions.append(operator_pos)
+            after_operand = False
+        elif kind == RPAREN:
+            if not open_positions:
+                raise RegexSyntaxError("unbalanced ')'", operator_pos)
+            if not after_operand:
+                if kinds[-1] == LPAREN:
+                    raise RegexSyntaxError("empty group", operator_pos)
+                raise RegexSyntaxError("missing operand before ')'", operator_pos)
+            open_positions.pop()
+        elif kind == UNION:
+            if not after_operand:
+                raise RegexSyntaxError("missing operand before '|'", operator_pos)
+            after_operand = False
+        elif not after_operand:
+            raise RegexSyntaxError(f"nothing to repeat with '{operator}'", operator_pos)
+
+        kinds.append(kind)
+        values.append(operator)
+
+        pos = operator_pos + 1
+
+    if open_positions:
+        raise RegexSyntaxError("missing ')'", open_positions[-1])
+    if not after_operand:
+        if not kinds:
+            raise RegexSyntaxError("empty regex", 0)
+        raise RegexSyntaxError("missing operand at the end", length)
+
+    return TokenArray(kinds, values, widths=widths)
+
+
+def tokens_to_postfix(tokens: TokenArray, captures: bool = False) -> TokenArray:
+    kinds = tokens.kinds
+    threshold = KIND_POP_THRESHOLD
+    order = []
+    push = order.append
+    # Operator stack holds token ids, i.e. indices into the token array
+    stack = []
+    pop = stack.pop
+    # Groups are numbered by their opening parenthesis, the closing one carries the number into postfix
+    groups: Optional[dict[int, int]] = {} if captures else None
+    group_count = 0
+
+    for token_id, kind in enumerate(kinds):
+        if kind == SYMBOL:
+            push(token_id)
+        elif kind == CONCAT or kind == UNION:
+            current = threshold[kind]
+            while stack and kinds[stack[-1]] >= current:
+                push(pop())
+            stack.append(token_id)
+        elif kind == LPAREN:
+            stack.append(token_id)
+            if groups is not None:
+                group_count += 1
+                groups[token_id] = group_count
+        elif kind == RPAREN:
+            while stack and kinds[stack[-1]] != LPAREN:
+                push(pop())
+            if not stack:
+                raise RegexSyntaxError("unbalanced ')'", tokens.position(token_id))
+            opening = pop()
+            if groups is not None:
+                groups[token_id] = groups[opening]
+                push(token_id)
         else:
-            while len(stack) > 0:
-                peeked_char = stack[-1]
+            # A postfix operator binds tighter than anything that can be on the stack
+            push(token_id)
 
-                peeked_char_precedence = precedence_map.get(peeked_char, 5)
-                current_char_precedence = precedence_map.get(c, 5)
+    while stack:
+        token_id = pop()
+        if kinds[token_id] == LPAREN:
+            raise RegexSyntaxError("missing ')'", tokens.position(token_id))
+        push(token_id)
 
-                if peeked_char_precedence >= current_char_precedence:
-                    postfix += stack.pop()
-                else:
-                    break
-            stack.append(c)
+    values = tokens.values
+    if groups:
+        return TokenArray(bytearray([GROUP if kinds[i] == RPAREN else kinds[i] for i in order]),
+                          [str(groups[i]) if kinds[i] == RPAREN else values[i] for i in order], tokens, order)
+    return TokenArray(bytearray([kinds[i] for i in order]), [values[i] for i in order], tokens, order)
 
-    while len(stack) > 0:
-        postfix += stack.pop()
 
-    return postfix
+def format_regex(regex: str) -> str:
+    return tokenize(regex).text()
+
+
+def infix_to_postfix(regex: str) -> str:
+    return tokens_to_postfix(tokenize(regex)).text()
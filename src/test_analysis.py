@@ -0,0 +1,103 @@
+from analysis import analyze
+
+from converter import RegexToNFAConverter
+
+from dfa import DFA
+from dfa import StreamMatcher
+
+from testing import all_strings
+
+
+def _complex_dfa():
+    # Accepting states 4 and 7 only lead to each other, see TestDFAMinimization.test_complex_example
+    table = {
+        0: {"a": 1, "b": 2},
+        1: {"a": 3, "b": 3},
+        2: {"a": 1, "b": 0},
+        3: {"a": 5, "b": 4},
+        4: {"a": 4, "b": 4},
+        5: {"a": 4, "b": 7},
+        6: {"a": 5, "b": 4},
+        7: {"a": 7, "b": 4},
+    }
+    return DFA(table, {4, 7}, initial_state=0)
+
+
+class TestAnalyze:
+    def test_accept_forever(self):
+        dfa = _complex_dfa().build_min_dfa()
+        analysis = dfa.analysis
+
+        assert analysis.accept_forever == frozenset({3})
+        assert analysis.dead == frozenset()
+        assert analysis.min_length == 3
+        assert analysis.max_length is None
+
+    def test_dead_states(self):
+        dfa = DFA({0: {"a": 1, "b": 2}, 1: {}, 2: {"b": 2}}, {1})
+        analysis = analyze(dfa)
+
+        assert analysis.dead == frozenset({2})
+        assert analysis.min_length == 1
+        assert analysis.max_length == 1
+
+    def test_lengths(self):
+        analysis = DFA.from_regex("ab(c|de)").analysis
+        assert (analysis.min_length, analysis.max_length) == (3, 4)
+        assert analysis.rejects_length(2)
+        assert analysis.rejects_length(5)
+        assert not analysis.rejects_length(4)
+
+    def test_empty_language(self):
+        analysis = analyze(DFA({0: {"a": 1}, 1: {}}, set()))
+        assert analysis.min_length is None
+        assert analysis.rejects_length(0)
+
+
+class TestEarlyExit:
+    def test_same_verdicts(self):
+        for dfa in [_complex_dfa(), DFA.from_nfa(RegexToNFAConverter("(a|b)*abb").parse())]:
+            minimized = dfa.build_min_dfa()
+            strings = list(all_strings("abc", 6))
+            expected = [dfa.test(string) for string in strings]
+            assert [minimized.test(string) for string in strings] == expected
+            assert minimized.test_batch(strings) == expected
+
+    def test_dead_state_stops_reading(self):
+        dfa = DFA({0: {"a": 1, "b": 2}, 1: {"a": 1}, 2: {"b": 2}}, {1})
+        dfa.analysis = analyze(dfa)
+        # Transitions after the dead state are missing, reading them would fail
+        del dfa.table[2]
+        assert not dfa.test("bbbb")
+        assert dfa.test("aaaa")
+
+    def test_accept_forever_checks_alphabet(self):
+        dfa = _complex_dfa().build_min_dfa()
+        assert dfa.test("aab" + "ab" * 1000)
+        assert not dfa.test("aab" + "ab" * 1000 + "c")
+
+
+class TestStreamMatcher:
+    def test_chunks(self):
+        dfa = DFA.from_regex("(a|b)*abb")
+        for string in all_strings("abc", 6):
+            stream = StreamMatcher(dfa)
+            for position in range(0, len(string), 2):
+                stream.feed(string[position:position + 2])
+            assert stream.finish() == dfa.test(string), string
+
+    def test_rejects_early(self):
+        stream = StreamMatcher(DFA.from_regex("ab"))
+        assert stream.feed("a")
+        assert not stream.feed("bb")
+        assert not stream.feed("b")
+        assert not stream.finish()
+
+    def test_accept_forever(self):
+        stream = StreamMatcher(_complex_dfa().build_min_dfa())
+        assert stream.feed("aab")
+        assert stream.accepting_forever
+        assert stream.feed("ab" * 100)
+        assert stream.finish()
+        assert not stream.feed("c")
+        assert not stream.finish()
@@ -0,0 +1,105 @@
+import gc
+import itertools
+import threading
+import time
+import tracemalloc
+
+from budget import CompilationBudget
+from budget import CompilationCancelled
+from dfa import DFA
+
+# Subset construction is quick, table filling on its 513 states takes many seconds
+SLOW_REGEX = "(a|b)*a" + "(a|b)" * 8
+
+
+def _compile_cancelled(regex: str, budget: CompilationBudget, **options) -> str:
+    # The exception is dropped on return, so are the frames holding the partial tables
+    try:
+        DFA.from_regex(regex, budget=budget, **options)
+    except CompilationCancelled as error:
+        return str(error)
+    raise AssertionError("compilation was not cancelled")
+
+
+class TestCompilationBudget:
+    def test_same_result_within_budget(self):
+        for regex in ["(a|b)*abb", "a+b?c", "(ab|ba)*"]:
+            budget = CompilationBudget(timeout=60, check_interval=1)
+            dfa = DFA.from_regex(regex, budget=budget)
+            expected = DFA.from_regex(regex)
+            # State numbers follow set iteration order, only the automaton itself is comparable
+            strings = ["".join(letters) for length in range(6) for letters in itertools.product("abc", repeat=length)]
+            assert len(dfa.table) == len(expected.table)
+            assert dfa.test_batch(strings) == expected.test_batch(strings)
+            assert budget.counts["subsets"] > 0 and budget.counts["refinements"] > 0
+
+    def test_deadline(self):
+        started = time.monotonic()
+        assert _compile_cancelled(SLOW_REGEX, CompilationBudget(timeout=0.05)) == "compilation deadline exceeded"
+        assert time.monotonic() - started < 2
+
+    def test_cancel_from_another_thread(self):
+        budget = CompilationBudget()
+        timer = threading.Timer(0.05, budget.cancel)
+        timer.start()
+        try:
+            assert _compile_cancelled(SLOW_REGEX, budget) == "compilation cancelled"
+        finally:
+            timer.cancel()
+        assert budget.cancelled
+
+    def test_progress(self):
+        reports = []
+        budget = CompilationBudget(progress=lambda stage, count: reports.append((stage, count)), check_interval=2)
+        DFA.from_regex("(a|b)*a(a|b)(a|b)", budget=budget)
+        stages = [stage for stage, _ in reports]
+        order = ["subsets", "transitions", "pairs", "refinements", "components"]
+        assert stages == sorted(stages, key=order.index)
+        assert set(stages) == set(order)
+        for stage in set(stages):
+            counts = [count for reported, count in reports if reported == stage]
+            assert counts == sorted(counts) and counts[-1] <= budget.counts[stage]
+
+    def test_progress_can_cancel(self):
+        def progress(stage, count):
+            if stage == "pairs":
+                budget.cancel()
+
+        budget = CompilationBudget(progress=progress, check_interval=1)
+        assert _compile_cancelled("(a|b)*abb", budget) == "compilation cancelled"
+        assert budget.counts["refinements"] == 0
+
+    def test_every_minimization_loop_checks(self):
+        for stage in ["transitions", "components"]:
+            def progress(reported, count):
+                if reported == stage:
+                    budget.cancel()
+
+            budget = CompilationBudget(progress=progress, check_interval=1)
+            dfa = DFA.from_regex("(a|b)*abb", minimize=False)
+            try:
+                dfa.build_min_dfa(budget)
+            except CompilationCancelled:
+                pass
+            else:
+                raise AssertionError(f"no check during {stage}")
+            assert budget.counts[stage] > 0
+
+    def test_parallel_subset_construction(self):
+        budget = CompilationBudget(check_interval=1)
+        budget.cancel()
+        assert _compile_cancelled("(a|b)*abb", budget, workers=2) == "compilation cancelled"
+        assert budget.counts["subsets"] == 1
+
+    def test_partial_work_is_freed(self):
+        _compile_cancelled(SLOW_REGEX, CompilationBudget(timeout=0.01))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            _compile_cancelled(SLOW_REGEX, CompilationBudget(timeout=0.2))
+            gc.collect()
+            # The n x n marking table alone is over 2 MB
+            assert tracemalloc.get_traced_memory()[0] - baseline < 100_000
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,137 @@
+import functools
+import itertools
+import re
+
+import pytest
+
+from captures import CaptureMatcher
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import SYMBOL, CONCAT, UNION, OPT, STAR, PLUS, GROUP
+
+
+def _tree(regex: str):
+    stack = []
+    for kind, value in tokens_to_postfix(tokenize(regex), captures=True):
+        if kind == SYMBOL:
+            stack.append(("symbol", value))
+        elif kind == CONCAT:
+            second, first = stack.pop(), stack.pop()
+            stack.append(("concat", (first[1] if first[0] == "concat" else (first,)) + (second,)))
+        elif kind == UNION:
+            second, first = stack.pop(), stack.pop()
+            stack.append(("union", first, second))
+        elif kind == GROUP:
+            stack.append(("group", int(value), stack.pop()))
+        else:
+            stack.append(({OPT: "opt", STAR: "star", PLUS: "plus"}[kind], stack.pop()))
+    return stack.pop()
+
+
+def _pattern(node) -> str:
+    kind = node[0]
+    if kind == "symbol":
+        return node[1]
+    if kind == "concat":
+        return "".join(f"(?:{_pattern(element)})" for element in node[1])
+    if kind == "union":
+        return f"(?:{_pattern(node[1])})|(?:{_pattern(node[2])})"
+    if kind == "group":
+        return _pattern(node[2])
+    return f"(?:{_pattern(node[1])})" + {"opt": "?", "star": "*", "plus": "+"}[kind]
+
+
+def _posix_spans(regex: str, groups: int, text: str):
+    # Brute-force POSIX reference: every split is tried with re, each subpattern from left to right and
+    # each iteration in turn takes the longest string that still lets the rest match. Alternatives tie
+    # to the left, iterations are never empty unless the repeat must match once
+    @functools.lru_cache(maxsize=None)
+    def matches(node, start, end):
+        return re.fullmatch(_pattern(node), text[start:end]) is not None
+
+    def best(node, start, end):
+        kind = node[0]
+        if kind == "symbol":
+            return []
+        if kind == "group":
+            return [(node[1], (start, end))] + best(node[2], start, end)
+        if kind == "union":
+            return best(node[1] if matches(node[1], start, end) else node[2], start, end)
+        if kind == "opt":
+            return best(node[1], start, end) if matches(node[1], start, end) else []
+        if kind == "concat":
+            first, rest = node[1][0], node[1][1:]
+            rest = rest[0] if len(rest) == 1 else ("concat", rest)
+            middle = max(middle for middle in range(start, end + 1)
+                         if matches(first, start, middle) and matches(rest, middle, end))
+            return best(first, start, middle) + best(rest, middle, end)
+        if start == end:
+            return best(node[1], start, end) if kind == "plus" else []
+        star = ("star", node[1])
+        middle = max(middle for middle in range(start + 1, end + 1)
+                     if matches(node[1], start, middle) and matches(star, middle, end))
+        return best(node[1], start, middle) + best(star, middle, end)
+
+    tree = _tree(regex)
+    if not matches(tree, 0, len(text)):
+        return None
+    spans = [(0, len(text))] + [None] * groups
+    for number, span in best(tree, 0, len(text)):
+        spans[number] = span
+    return tuple(spans)
+
+
+class TestCaptureMatcher:
+    @pytest.mark.parametrize("regex, text, expected", [
+        ("(a*)(a*)", "aaa", ((0, 3), (0, 3), (3, 3))),
+        ("(a|ab)(c|bcd)(d*)", "abcd", ((0, 4), (0, 2), (2, 3), (3, 4))),
+        ("(ab)*c", "ababc", ((0, 5), (2, 4))),
+        ("(a)?(a)?", "a", ((0, 1), (0, 1), None)),
+        ("((a)|b)*", "ab", ((0, 2), (1, 2), (0, 1))),
+        ("ab", "ab", ((0, 2),)),
+    ])
+    def test_fullmatch(self, regex, text, expected):
+        assert CaptureMatcher(regex).fullmatch(text) == expected
+
+    def test_no_match(self):
+        matcher = CaptureMatcher("(a)b")
+        assert matcher.fullmatch("ac") is None
+        assert matcher.search("cccc") is None
+
+    def test_search_is_leftmost_longest(self):
+        matcher = CaptureMatcher("x(a+)(b*)")
+        assert matcher.search("zzxaabbxab") == ((2, 7), (3, 5), (5, 7))
+        assert matcher.groups_of("zzxaabbxab", search=True) == ("aa", "bb")
+
+    @pytest.mark.parametrize("regex", ["(ab)*c", "a(b|c)+d", "(a+)(b+)(c?)", "((a|b)c)*"])
+    def test_unambiguous_groups_agree_with_re(self, regex):
+        matcher = CaptureMatcher(regex)
+        for text in ["abababc", "abcbcd", "aabbc", "aabb", "acbcac", "c", "ad"]:
+            expected = re.fullmatch(regex, text)
+            assert matcher.groups_of(text) == (expected.groups() if expected else None), text
+
+    @pytest.mark.parametrize("regex, text, expected", [
+        ("(aa|a)*", "aaa", (2, 3)),
+        ("(aa|a)*", "aaaaa", (4, 5)),
+        ("(a|aa)*", "aaa", (2, 3)),
+        ("(aa|a)+b", "aaab", (2, 3)),
+    ])
+    def test_earlier_iterations_take_the_longest(self, regex, text, expected):
+        assert CaptureMatcher(regex).fullmatch(text)[1] == expected
+        assert re.fullmatch(regex, text).span(1) == expected
+
+    @pytest.mark.parametrize("regex", [
+        "(aa|a)*", "(a|aa)*", "(aa|a)+b", "(a|ab|b)*", "((a|ab)(b|ba)?)*", "(a*)(a|b)*(b*)",
+        "((a)|(b)|(ab))*", "(a|(a)(b))+", "((a|b)*)(b?)(a*)", "(ba|(b)?a*)+", "(a?)((ab)?)(b?)*",
+    ])
+    def test_ambiguous_groups_agree_with_posix(self, regex):
+        matcher = CaptureMatcher(regex)
+        for length in range(7):
+            for letters in itertools.product("ab", repeat=length):
+                text = "".join(letters)
+                assert matcher.fullmatch(text) == _posix_spans(regex, matcher.groups, text), text
+
+    def test_linear_on_long_input(self):
+        matcher = CaptureMatcher("((a|b)*)(b*)c")
+        text = "ab" * 20000 + "c"
+        assert matcher.fullmatch(text) == ((0, 40001), (0, 40000), (39999, 40000), (40000, 40000))
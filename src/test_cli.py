@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+from cli import build_parser
+from cli import run
+
+LINES = b"abb\nab\naabb\nbbb\n\nbabb\n"
+
+
+def _run(argv: list[str], stdin: bytes = b"") -> tuple[int, bytes, str]:
+    out = io.BytesIO()
+    err = io.StringIO()
+    status = run(build_parser().parse_args(argv), io.BytesIO(stdin), out, err)
+    return status, out.getvalue(), err.getvalue()
+
+
+class TestCli:
+    def test_matching_lines_from_stdin(self):
+        status, out, err = _run(["-e", "(a|b)*abb"], LINES)
+
+        assert status == 0
+        assert out == b"abb\naabb\nbabb\n"
+        assert "6 lines, 3 matched" in err
+        assert "lines/s" in err and "MB/s" in err
+
+    def test_count_and_verdicts(self):
+        assert _run(["-e", "(a|b)*abb", "-c", "-q"], LINES)[1] == b"3\n"
+        assert _run(["-e", "(a|b)*abb", "--verdicts", "-q"], LINES)[1] == b"1\n0\n1\n0\n0\n1\n"
+
+    def test_search_and_invert(self):
+        assert _run(["-e", "bb", "-s", "-q"], LINES)[1] == b"abb\naabb\nbbb\nbabb\n"
+        assert _run(["-e", "bb", "-s", "-v", "-q"], LINES)[1] == b"ab\n\n"
+
+    def test_no_match_status(self):
+        assert _run(["-e", "c", "-q"], LINES)[0] == 1
+
+    def test_bad_regex(self):
+        status, out, err = _run(["-e", "(ab"], LINES)
+
+        assert status == 2
+        assert "missing ')'" in err
+
+    def test_pattern_too_deep(self, monkeypatch):
+        def too_deep(*args, **kwargs):
+            raise RecursionError("maximum recursion depth exceeded")
+
+        monkeypatch.setattr("cli.LineMatcher", too_deep)
+        status, out, err = _run(["-e", "ab"], LINES)
+
+        assert status == 2
+        assert err == "error: pattern too long or too deeply nested to compile\n"
+
+    def test_pattern_file(self, tmp_path):
+        patterns = tmp_path / "patterns.txt"
+        patterns.write_text("ab\nbbb\n")
+
+        assert _run(["-f", str(patterns), "-q"], LINES)[1] == b"ab\nbbb\n"
+
+    @pytest.mark.parametrize("jobs", ["1", "3"])
+    def test_files(self, tmp_path, jobs):
+        data = tmp_path / "data.txt"
+        data.write_bytes(LINES * 50 + b"abb")
+        empty = tmp_path / "empty.txt"
+        empty.write_bytes(b"")
+
+        status, out, err = _run(["-e", "(a|b)*abb", "-j", jobs, str(data), str(empty)])
+
+        assert out == b"abb\naabb\nbabb\n" * 50 + b"abb\n"
+        assert "301 lines, 151 matched" in err
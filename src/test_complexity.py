@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from converter import RegexToNFAConverter
+from nfa import nfa_to_dfa
+
+from complexity import DFA_STATE_LIMIT
+from complexity import check_complexity
+from complexity import estimate
+
+from fuzz import random_regex
+from fuzz import render
+
+
+def _subset_states(regex):
+    table, _ = nfa_to_dfa(RegexToNFAConverter(regex).parse())
+    return len(table)
+
+
+class TestEstimate:
+    @pytest.mark.parametrize("regex", ["a", "ab|c", "(a|b)*abb", "a+b?c*", "((ab)*|c)+d?", "<1>(<2>|<3>)*"])
+    def test_nfa_states_are_exact(self, regex):
+        nfa = RegexToNFAConverter(regex).parse()
+        assert estimate(regex).nfa_states == len(nfa.get_full_transition_table())
+
+    def test_sliding_window_family(self):
+        for size in range(1, 9):
+            regex = "(a|b)*a" + "(a|b)" * size
+            actual = _subset_states(regex)
+            predicted = estimate(regex).dfa_estimate
+            assert actual / 2 <= predicted <= actual * 2, (size, predicted, actual)
+
+    def test_no_blowup_without_overlap(self):
+        result = estimate("(a|b)*a" + "(c|d)" * 20)
+        assert result.dfa_estimate < 100
+        assert result.engine == "dfa"
+
+    def test_random_regexes(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            regex = render(random_regex(rng, 5))
+            result = estimate(regex)
+            actual = _subset_states(regex)
+            assert actual <= result.dfa_upper_bound, regex
+            assert actual / 4 <= result.dfa_estimate <= actual * 4, regex
+
+    def test_engine_choice(self):
+        assert estimate("(a|b)*a" + "(a|b)" * 5).engine == "dfa"
+        assert estimate("(a|b)*a" + "(a|b)" * 14).engine == "lazy_dfa"
+        assert estimate("(a|b)*a" + "(a|b)" * 30).engine == "nfa"
+        words = "|".join(f"w{i:04d}".translate(str.maketrans("0123456789", "abcdefghij")) for i in range(300))
+        assert estimate(words).engine == "dfa"
+
+    def test_check_complexity(self):
+        assert check_complexity("(a|b)*abb").dfa_estimate <= DFA_STATE_LIMIT
+        with pytest.raises(ValueError, match="pattern too complex"):
+            check_complexity("(a|b)*a" + "(a|b)" * 20)
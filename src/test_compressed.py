@@ -0,0 +1,51 @@
+import random
+
+from compressed import CompressedDFA
+from compressed import NO_STATE
+
+from converter import ALPHABET
+
+from dfa import DFA
+
+from testing import all_strings
+
+from word_dfa import build_word_dfa
+
+
+class TestCompressedDFA:
+    def test_same_language(self):
+        for regex in ["(a|b)*abb", "a+b?c", "(ab|ba)*", "a|bc|cab"]:
+            dfa = DFA.from_regex(regex)
+            compressed = CompressedDFA.from_dfa(dfa)
+            for string in all_strings("abcd", 5):
+                assert compressed.test(string) == dfa.test(string), (regex, string)
+
+    def test_step(self):
+        dfa = DFA(table={0: {"a": 1}, 1: {"b": 0}}, accepts={1})
+        compressed = CompressedDFA.from_dfa(dfa)
+
+        state = compressed.step(compressed.initial_state, "a")
+        assert compressed.accepting[state]
+        assert compressed.step(state, "a") == NO_STATE
+        assert compressed.step(state, "z") == NO_STATE
+        assert compressed.step(state, "b") == compressed.initial_state
+
+    def test_identical_rows_are_shared(self):
+        dfa = DFA(table={0: {"a": 2, "b": 1}, 1: {"a": 2}, 2: {"a": 2}, 3: {}}, accepts={2})
+        compressed = CompressedDFA.from_dfa(dfa)
+
+        assert compressed.state_count == 4
+        assert compressed.rows == 3
+        assert compressed.transition_count == 3
+
+    def test_word_list_is_smaller_than_dense(self):
+        rng = random.Random(3)
+        words = sorted({"".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 8))) for _ in range(300)})
+        dfa = build_word_dfa(words)
+        compressed = CompressedDFA.from_dfa(dfa)
+        report = compressed.memory_report()
+
+        assert report["compressed_bytes"] < report["dense_bytes"]
+        assert report["compressed_bytes_per_state"] < report["dense_bytes_per_state"]
+        for word in words[:50] + ["bax", "zuz", "aaa", "ab"]:
+            assert compressed.test(word) == dfa.test(word)
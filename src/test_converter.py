@@ -1,3 +1,5 @@
+import pytest
+
 from converter import RegexToNFAConverter
 
 from nfa import concat
@@ -6,6 +8,8 @@ from nfa import union
 from nfa import plus
 from nfa import rep
 
+from shunting_yard import RegexSyntaxError
+
 from deepdiff import DeepDiff
 
 
@@ -319,3 +323,9 @@ class TestComplex:
         assert nfa.test("bbbcccc")
         assert nfa.test("cccccccc")
         assert nfa.test("aaabbc")
+
+
+def test_unsupported_symbol():
+    with pytest.raises(RegexSyntaxError) as error:
+        RegexToNFAConverter("ab1").parse()
+    assert error.value.position == 2
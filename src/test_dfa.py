@@ -354,3 +354,12 @@ def _build_dfa(table, accepts):
     dfa.table = table
     dfa.accepts = accepts
     return dfa
+
+
+class TestBatch:
+    def test_batch(self):
+        dfa = DFA.from_nfa(concat(rep(union(char("a"), char("b"))), char("c")))
+        strings = ["c", "abc", "ab", "", "abca", "bbbbc", "x"]
+
+        assert dfa.test_batch(strings) == [dfa.test(string) for string in strings]
+        assert dfa.test_batch([]) == []
@@ -0,0 +1,125 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from budget import CompilationCancelled
+
+from dfa import DFA
+
+from engines import AutoMatcher
+from engines import LazyDFA
+from engines import NFASimulation
+from engines import TIERS
+from engines import TieredMatcher
+
+from testing import all_strings
+
+# Subset construction is quick, table filling on its 513 states takes many seconds
+SLOW_REGEX = "(a|b)*a" + "(a|b)" * 8
+
+
+class TestEngines:
+    @pytest.mark.parametrize("regex", ["(a|b)*abb", "a+b?c*", "((ab)*|c)+", "(a|b)*a(a|b)(a|b)"])
+    def test_agree_with_dfa(self, regex):
+        dfa = DFA.from_regex(regex)
+        simulation = NFASimulation.from_regex(regex)
+        lazy = LazyDFA.from_regex(regex)
+        strings = list(all_strings("abcd", 6))
+        expected = dfa.test_batch(strings)
+        assert simulation.test_batch(strings) == expected
+        assert lazy.test_batch(strings) == expected
+
+    def test_lazy_cache_is_bounded(self):
+        regex = "(a|b)*a" + "(a|b)" * 12
+        lazy = LazyDFA.from_regex(regex, cache_limit=100)
+        simulation = NFASimulation.from_regex(regex)
+        rng = random.Random(0)
+        text = "".join(rng.choice("ab") for _ in range(2000))
+        for end in range(20, 2000, 97):
+            assert lazy.test(text[:end]) == simulation.test(text[:end])
+        assert lazy.cached_states <= 100
+        assert lazy.flushes > 0
+
+    def test_integer_codes(self):
+        simulation = NFASimulation.from_regex("<1>(<2>|<300>)*")
+        assert simulation.test([1, 300, 2])
+        assert not simulation.test([1, 3])
+
+
+class TestAutoMatcher:
+    def test_picks_engine(self):
+        assert AutoMatcher("(a|b)*abb").engine == "dfa"
+        assert AutoMatcher("(a|b)*a" + "(a|b)" * 14).engine == "lazy_dfa"
+        assert AutoMatcher("(a|b)*a" + "(a|b)" * 30).engine == "nfa"
+
+    def test_blowup_still_matches(self):
+        matcher = AutoMatcher("(a|b)*a" + "(a|b)" * 30)
+        assert matcher.test("b" * 50 + "a" + "b" * 30)
+        assert not matcher.test("a" * 50 + "b" * 31)
+
+    def test_forced_engine(self):
+        for engine in ("dfa", "lazy_dfa", "nfa"):
+            matcher = AutoMatcher("(a|b)*abb", engine=engine)
+            assert matcher.test_batch(["abb", "aabb", "ab"]) == [True, True, False]
+        with pytest.raises(ValueError):
+            AutoMatcher("a", engine="backtracking")
+
+
+class TestTieredMatcher:
+    def test_reaches_min_dfa(self):
+        matcher = TieredMatcher("(a|b)*abb")
+        assert matcher.test_batch(["abb", "ab"]) == [True, False]
+        assert matcher.wait(10)
+        assert matcher.tier == "min_dfa" and matcher.error is None
+        assert list(matcher.timings) == list(TIERS)
+        strings = list(all_strings("ab", 6))
+        assert matcher.test_batch(strings) == DFA.from_regex("(a|b)*abb").test_batch(strings)
+
+    def test_serves_before_compiled(self):
+        matcher = TieredMatcher(SLOW_REGEX)
+        try:
+            assert matcher.tier in ("lazy_dfa", "dfa")
+            assert matcher.test("b" * 20 + "a" + "b" * 8)
+            assert not matcher.test("a" * 20 + "b" * 9)
+        finally:
+            matcher.cancel()
+        assert matcher.wait(5)
+        assert isinstance(matcher.error, CompilationCancelled)
+        assert matcher.tier != "min_dfa"
+        assert matcher.test("ba" + "b" * 8)
+
+    def test_timeout_keeps_last_tier(self):
+        matcher = TieredMatcher(SLOW_REGEX, timeout=0.2)
+        assert matcher.wait(5)
+        assert str(matcher.error) == "compilation deadline exceeded"
+        assert matcher.tier in ("lazy_dfa", "dfa")
+        assert matcher.test("a" + "b" * 8) and not matcher.test("b" * 9)
+
+    def test_unexpected_error_keeps_last_tier(self, monkeypatch):
+        def fail(self, budget=None):
+            raise ValueError("broken table")
+
+        monkeypatch.setattr(DFA, "build_min_dfa", fail)
+        matcher = TieredMatcher("a+b?c")
+        assert matcher.wait(5)
+        assert isinstance(matcher.error, ValueError)
+        assert matcher.tier == "dfa"
+        assert matcher.test("abc") and not matcher.test("ab")
+
+    @pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+    def test_executor(self, executor_class):
+        with executor_class(max_workers=1) as executor:
+            matcher = TieredMatcher("a+b?c", executor=executor)
+            assert matcher.wait(30)
+        assert matcher.tier == "min_dfa" and matcher.error is None
+        assert matcher.test_batch(["ac", "aabc", "abb"]) == [True, True, False]
+
+    def test_executor_cancel(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            matcher = TieredMatcher(SLOW_REGEX, executor=executor, timeout=2)
+            matcher.cancel()
+            assert matcher.wait(5)
+        assert isinstance(matcher.error, CompilationCancelled)
+        assert matcher.tier != "min_dfa"
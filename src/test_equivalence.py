@@ -0,0 +1,78 @@
+import pytest
+
+from dfa import DFA
+
+from equivalence import are_equivalent
+from equivalence import canonical_form
+from equivalence import fingerprint
+from equivalence import group_equivalent
+from equivalence import is_subset
+
+from word_dfa import build_word_dfa
+
+
+class TestAreEquivalent:
+    @pytest.mark.parametrize("first, second", [
+        ("(a|b)*", "(a*b*)*"),
+        ("a+", "aa*"),
+        ("a?b", "b|ab"),
+        ("(ab)*a", "a(ba)*"),
+        ("(a|b)*abb", "(a|b)*abb"),
+    ])
+    def test_equivalent(self, first, second):
+        assert are_equivalent(DFA.from_regex(first), DFA.from_regex(second))
+        assert are_equivalent(DFA.from_regex(first, minimize=False), DFA.from_regex(second))
+
+    @pytest.mark.parametrize("first, second", [
+        ("a*", "a+"),
+        ("(a|b)*", "(ab)*"),
+        ("ab", "ba"),
+        ("a", "b"),
+    ])
+    def test_not_equivalent(self, first, second):
+        assert not are_equivalent(DFA.from_regex(first), DFA.from_regex(second))
+
+    def test_word_list(self):
+        assert are_equivalent(build_word_dfa(["ab", "abc", "b"]), DFA.from_regex("abc?|b"))
+
+
+class TestIsSubset:
+    def test_subset(self):
+        assert is_subset(DFA.from_regex("a+"), DFA.from_regex("a*"))
+        assert is_subset(DFA.from_regex("(ab)*"), DFA.from_regex("(a|b)*"))
+        assert is_subset(DFA.from_regex("abb"), DFA.from_regex("(a|b)*abb"))
+
+    def test_not_subset(self):
+        assert not is_subset(DFA.from_regex("a*"), DFA.from_regex("a+"))
+        assert not is_subset(DFA.from_regex("(a|b)*"), DFA.from_regex("(ab)*"))
+        assert not is_subset(DFA.from_regex("a|c"), DFA.from_regex("a|b"))
+
+
+class TestFingerprint:
+    def test_same_language(self):
+        assert fingerprint(DFA.from_regex("(a|b)*")) == fingerprint(DFA.from_regex("(b|a)*a*"))
+        assert fingerprint(DFA.from_regex("a(ba)*")) == fingerprint(DFA.from_regex("(ab)*a"))
+
+    def test_different_language(self):
+        assert fingerprint(DFA.from_regex("a*")) != fingerprint(DFA.from_regex("a+"))
+
+    def test_unminimized_input(self):
+        assert fingerprint(DFA.from_regex("a(b|c)", minimize=False)) == fingerprint(DFA.from_regex("ab|ac"))
+
+    def test_canonical_form(self):
+        assert canonical_form(DFA.from_regex("ab")) == (
+            (False, (("a", 1),)),
+            (False, (("b", 2),)),
+            (True, ()),
+        )
+
+    def test_group_equivalent(self):
+        rules = {
+            "r1": DFA.from_regex("a+"),
+            "r2": DFA.from_regex("b"),
+            "r3": DFA.from_regex("aa*"),
+            "r4": DFA.from_regex("a*a"),
+        }
+        groups = sorted(group_equivalent(rules))
+
+        assert groups == [["r1", "r3", "r4"], ["r2"]]
@@ -0,0 +1,69 @@
+import array
+import itertools
+import random
+
+import pytest
+
+from dfa import DFA
+
+from events import DENSE_LIMIT
+from events import EventMatcher
+
+
+class TestEventMatcher:
+    def test_small_codes(self):
+        dfa = DFA.from_regex("<1>(<2>|<3>)*<4>")
+        matcher = EventMatcher(dfa)
+        assert matcher.columns is None
+        for length in range(6):
+            for events in itertools.product(range(6), repeat=length):
+                assert matcher.test(list(events)) == dfa.test(events), events
+
+    def test_sparse_codes(self):
+        matcher = EventMatcher.from_regex("<100000>(<7>|<70000>)+")
+        assert matcher.columns is not None
+        assert matcher.test([100000, 7, 70000, 7])
+        assert not matcher.test([100000])
+        assert not matcher.test([100000, 8])
+        assert not matcher.test([100000, DENSE_LIMIT])
+
+    def test_out_of_range_codes(self):
+        matcher = EventMatcher.from_regex("<1>*")
+        assert matcher.test([])
+        assert not matcher.test([1, -1])
+        assert not matcher.test([1, 2])
+
+    def test_array_input(self):
+        matcher = EventMatcher.from_regex("(<0>|<255>)*<9>")
+        assert matcher.test(array.array("i", [0, 255, 0, 9]))
+        assert not matcher.test(array.array("H", [0, 9, 9]))
+        assert matcher.test_batch([[9], (255, 9), array.array("q", [1])]) == [True, True, False]
+
+    def test_long_sequence(self):
+        matcher = EventMatcher.from_regex("<5>(<1>|<2>)*<5>")
+        events = [5] + [1, 2] * 10000 + [5]
+        assert matcher.test(events)
+        events[3] = 3
+        assert not matcher.test(events)
+
+    def test_rejects_character_dfa(self):
+        with pytest.raises(ValueError):
+            EventMatcher(DFA.from_regex("ab"))
+
+
+class TestNumpy:
+    def test_array(self):
+        np = pytest.importorskip("numpy")
+        matcher = EventMatcher.from_regex("<1>(<2>|<300>)*<4>")
+        assert matcher.test(np.array([1, 2, 300, 4], dtype=np.int32))
+        assert not matcher.test(np.array([1, 2, 3, 4], dtype=np.int64))
+
+    def test_matrix(self):
+        np = pytest.importorskip("numpy")
+        matcher = EventMatcher.from_regex("<1>(<2>|<300>)*<4>")
+        rng = random.Random(0)
+        rows = [[rng.choice([1, 2, 4, 300, 5000, -1]) for _ in range(6)] for _ in range(500)]
+        rows += [[1, 2, 300, 2, 2, 4]]
+        verdicts = matcher.test_matrix(np.array(rows))
+        assert verdicts.tolist() == [matcher.test(row) for row in rows]
+        assert verdicts[-1]
@@ -0,0 +1,109 @@
+import io
+import json
+import subprocess
+import sys
+
+from dfa import DFA
+
+from export import write_dot
+from export import write_json
+
+from nfa import char
+from nfa import concat
+from nfa import union
+
+
+class TestWriteDot:
+    def test_dfa(self):
+        stream = io.StringIO()
+        truncated = write_dot(DFA.from_regex("ab"), stream)
+
+        assert not truncated
+        assert stream.getvalue() == (
+            'digraph dfa {\n'
+            '  rankdir=LR;\n'
+            '  start [label="", shape=none];\n'
+            '  0 [shape=circle];\n'
+            '  1 [shape=circle];\n'
+            '  2 [shape=doublecircle];\n'
+            '  start -> 0;\n'
+            '  0 -> 1 [label="a"];\n'
+            '  1 -> 2 [label="b"];\n'
+            '}\n'
+        )
+
+    def test_nfa(self):
+        stream = io.StringIO()
+        write_dot(union(char("a"), char("b")), stream)
+
+        text = stream.getvalue()
+        assert text.startswith("digraph nfa {")
+        assert '1 -> 2 [label="ε"];' in text
+        assert "4 [shape=doublecircle];" in text
+
+    def test_truncated(self, tmp_path):
+        path = tmp_path / "graph.dot"
+        truncated = write_dot(DFA.from_regex("abcdef"), str(path), max_states=3)
+
+        text = path.read_text(encoding="utf-8")
+        assert truncated
+        assert "2 -> truncated" in text
+        assert "4 more states" in text
+        assert "3 [shape" not in text
+
+    def test_unreachable_states_are_not_truncation(self):
+        dfa = DFA(table={0: {"a": 1}, 1: {}, 2: {"a": 0}}, accepts={1})
+        stream = io.StringIO()
+        assert not write_dot(dfa, stream)
+        assert "truncated" not in stream.getvalue()
+
+        stream = io.StringIO()
+        assert write_dot(dfa, stream, max_states=1)
+        assert "1 more states" in stream.getvalue()
+
+
+class TestWriteJson:
+    def test_dfa(self):
+        stream = io.StringIO()
+        write_json(DFA.from_regex("a|b"), stream)
+
+        document = json.loads(stream.getvalue())
+        document["transitions"].sort()
+        assert document == {
+            "type": "dfa",
+            "initial": 0,
+            "states": [0, 1],
+            "accepting": [1],
+            "transitions": [[0, "a", 1], [0, "b", 1]],
+            "truncated": False,
+            "total_states": 2,
+        }
+
+    def test_truncated(self):
+        stream = io.StringIO()
+        write_json(concat(char("a"), char("b")), stream, max_states=2)
+
+        document = json.loads(stream.getvalue())
+        assert document["truncated"]
+        assert document["states"] == [1, 2]
+        assert document["transitions"] == [[1, "a", 2]]
+
+    def test_unreachable_states_are_not_truncation(self):
+        stream = io.StringIO()
+        assert not write_json(DFA(table={0: {"a": 1}, 1: {}, 2: {"a": 0}}, accepts={1}), stream)
+        document = json.loads(stream.getvalue())
+        assert not document["truncated"]
+        assert document["states"] == [0, 1] and document["total_states"] == 3
+
+
+def test_matching_does_not_import_graphviz():
+    # graphviz is blocked entirely, the core modules must still import and match
+    code = (
+        "import sys; sys.modules['graphviz'] = None\n"
+        "import dfa, search, cli, server, export\n"
+        "assert dfa.DFA.from_regex('(a|b)*abb').test('babb')\n"
+        "assert 'graphviz' not in {name for name, module in sys.modules.items() if module is not None}\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=__file__.rsplit("/", 1)[0])
+    assert result.returncode == 0, result.stderr
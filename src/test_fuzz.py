@@ -0,0 +1,69 @@
+import random
+import re
+
+from converter import RegexToNFAConverter
+
+from fuzz import Fuzzer
+from fuzz import random_regex
+from fuzz import render
+from fuzz import repeat_nesting
+
+from shunting_yard import SYMBOL, CONCAT, UNION, STAR, PLUS
+
+
+def _fullmatch(regex):
+    pattern = re.compile(regex)
+    return lambda text: pattern.fullmatch(text) is not None
+
+
+def _broken(regex):
+    # Rejects every input with two b's in a row
+    pattern = re.compile(regex)
+    return lambda text: pattern.fullmatch(text) is not None and "bb" not in text
+
+
+class TestRegexGeneration:
+    def test_render(self):
+        node = (STAR, (CONCAT, (UNION, (SYMBOL, "a"), (SYMBOL, "b")), (PLUS, (SYMBOL, "c"))))
+        assert render(node) == "((a|b)c+)*"
+        assert render((PLUS, (STAR, (SYMBOL, "a")))) == "(a*)+"
+        assert render((UNION, (CONCAT, (SYMBOL, "a"), (SYMBOL, "b")), (SYMBOL, "c"))) == "ab|c"
+
+    def test_random_regexes_are_valid(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            regex = render(random_regex(rng, 5))
+            re.compile(regex)
+            RegexToNFAConverter(regex).parse()
+
+    def test_repeat_nesting(self):
+        assert repeat_nesting("ab|c") == 0
+        assert repeat_nesting("a*b+") == 1
+        assert repeat_nesting("((a|b*)c)+") == 2
+
+
+class TestFuzzer:
+    def test_engines_agree(self):
+        report = Fuzzer(seed=0).run(seconds=5, max_regexes=40)
+        assert report.regexes == 40
+        assert report.checks > 40
+        assert not report.failures, str(report)
+
+    def test_failures_are_shrunk(self):
+        fuzzer = Fuzzer(seed=3, engines={"re": _fullmatch, "broken": _broken}, search_engines={})
+        report = fuzzer.run(seconds=30)
+
+        assert len(report.failures) == 1
+        failure = report.failures[0]
+        assert failure.text == "bb"
+        assert len(failure.regex) <= 3
+        assert failure.results == {"re": True, "broken": False}
+
+    def test_engine_errors_are_failures(self):
+        def crashing(regex):
+            raise RuntimeError("boom")
+
+        fuzzer = Fuzzer(seed=1, engines={"re": _fullmatch, "crashing": crashing}, search_engines={})
+        failure = fuzzer.run(seconds=30).failures[0]
+        assert failure.results["crashing"] == "error: RuntimeError: boom"
+        assert failure.regex == "a"
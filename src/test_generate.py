@@ -0,0 +1,62 @@
+import itertools
+from collections import Counter
+
+import pytest
+
+from dfa import DFA
+
+from generate import StringGenerator
+
+
+class TestStringGenerator:
+    def test_count(self):
+        dfa = DFA.from_regex("(a|b)*abb")
+        generator = StringGenerator(dfa)
+        for length in range(8):
+            expected = sum(dfa.test("".join(letters)) for letters in itertools.product("ab", repeat=length))
+            assert generator.count(length) == expected
+
+    def test_samples_are_accepted_and_uniform(self):
+        generator = StringGenerator(DFA.from_regex("(a|b)*abb"), seed=1)
+        counts = Counter(generator.accepted(5, 4000))
+
+        assert set(counts) == {"aaabb", "ababb", "baabb", "bbabb"}
+        assert all(800 < count < 1200 for count in counts.values())
+
+    def test_seed_is_reproducible(self):
+        dfa = DFA.from_regex("(a|b|c)*a(b|c)+")
+        assert list(dfa.generate(10, 5, seed=7)) == list(dfa.generate(10, 5, seed=7))
+
+    def test_near_misses(self):
+        dfa = DFA.from_regex("(a|b)*abb")
+        for string in dfa.generate(9, 200, accepted=False, seed=3):
+            assert len(string) == 9
+            assert not dfa.test(string)
+
+    def test_impossible_lengths(self):
+        generator = StringGenerator(DFA.from_regex("ab(c|d)"))
+        with pytest.raises(ValueError):
+            generator.sample(2)
+        with pytest.raises(ValueError):
+            StringGenerator(DFA.from_regex("(a|b)*")).near_miss(4)
+
+    def test_streams_lazily(self):
+        generator = StringGenerator(DFA.from_regex("(a|b)*c"), seed=0)
+        stream = generator.accepted(1000)
+        assert next(stream).endswith("c")
+        assert len(list(itertools.islice(stream, 100))) == 100
+
+    def test_mixed(self):
+        dfa = DFA.from_regex("a(b|c)*d")
+        pairs = list(StringGenerator(dfa, seed=5).mixed(6, 0.3, 500))
+        assert all(dfa.test(string) == expected for string, expected in pairs)
+        assert 100 < sum(expected for _, expected in pairs) < 200
+
+    def test_int_alphabets_give_tuples(self):
+        dfa = DFA.from_regex("<1>(<2>|<300>)*")
+        generator = StringGenerator(dfa, seed=2)
+        samples = list(generator.accepted(4, 20))
+        assert all(isinstance(sample, tuple) and sample[0] == 1 and dfa.test(sample) for sample in samples)
+        assert not dfa.test(generator.near_miss(4))
+        with pytest.raises(ValueError):
+            StringGenerator(dfa, alphabet="ab")
@@ -0,0 +1,87 @@
+from dfa import DFA
+from layout import DenseDFA
+from layout import TransitionProfile
+from layout import relayout
+from testing import all_strings
+from word_dfa import build_word_dfa
+
+
+class TestTransitionProfile:
+    def test_counts(self):
+        dfa = DFA(table={0: {"a": 1}, 1: {"b": 0}}, accepts={1})
+        profile = TransitionProfile(dfa)
+        assert profile.test_batch(["a", "aba", "ac", ""]) == [True, True, False, False]
+        assert profile.samples == 4
+        assert profile.state_hits == {0: 5, 1: 4}
+        assert profile.symbol_hits == {"a": 4, "b": 1}
+
+    def test_orders(self):
+        dfa = DFA.from_regex("(a|b|c)*c")
+        profile = TransitionProfile(dfa)
+        profile.test_batch(["bbbc", "bc", "ab"])
+        assert profile.symbol_order() == ["b", "c", "a"]
+        order = profile.state_order()
+        assert sorted(order) == sorted(dfa.table)
+        hits = [profile.state_hits[state] for state in order]
+        assert hits == sorted(hits, reverse=True)
+
+
+class TestRelayout:
+    def test_same_language(self):
+        for regex in ["(a|b)*abb", "a+b?c", "(ab|ba)*", "a|bc|cab"]:
+            dfa = DFA.from_regex(regex)
+            profile = TransitionProfile(dfa)
+            profile.test_batch(["ab", "abb", "ba", "bab", "c"])
+            relaid = relayout(dfa, profile)
+            assert relaid.analysis is not None
+            for string in all_strings("abcd", 5):
+                assert relaid.test(string) == dfa.test(string), (regex, string)
+
+    def test_hot_states_first(self):
+        dfa = build_word_dfa(sorted(["apple", "banana", "cherry", "date", "zebra"]))
+        profile = TransitionProfile(dfa)
+        profile.test_batch(["zebra"] * 10 + ["date"])
+        relaid = relayout(dfa, profile)
+        # The path of the hot word takes the lowest ids, the final state shared by all words is hottest
+        state = relaid.initial_state
+        assert state == 0
+        ids = []
+        for symbol in "zebra":
+            state = relaid.table[state][symbol]
+            ids.append(state)
+        assert ids == [2, 3, 4, 5, 1]
+        assert list(relaid.table[0])[0] == "a"
+        assert relaid.test("cherry") and not relaid.test("cherr")
+
+    def test_unvisited_states_kept(self):
+        dfa = DFA.from_regex("abc|d")
+        relaid = relayout(dfa, TransitionProfile(dfa))
+        assert len(relaid.table) == len(dfa.table)
+        assert relaid.test("abc") and relaid.test("d") and not relaid.test("ab")
+
+
+class TestDenseDFA:
+    def test_same_language(self):
+        for regex in ["(a|b)*abb", "a+b?c", "(ab|ba)*", "a|bc|cab"]:
+            dfa = DFA.from_regex(regex)
+            profile = TransitionProfile(dfa)
+            profile.test_batch(["abb", "aabb", "bc"])
+            for dense in [DenseDFA(dfa), DenseDFA.from_profile(dfa, profile)]:
+                for string in all_strings("abcd", 5):
+                    assert dense.test(string) == dfa.test(string), (regex, string)
+
+    def test_columns_follow_frequency(self):
+        dfa = DFA.from_regex("(a|b|c)*")
+        profile = TransitionProfile(dfa)
+        profile.test("ccccb")
+        dense = DenseDFA.from_profile(dfa, profile)
+        assert list(dense.columns) == ["c", "b", "a"]
+
+    def test_dead_state_and_long_input(self):
+        dfa = DFA.from_regex("ab*")
+        dense = DenseDFA(dfa)
+        assert dense.state_count == len(dfa.table) + 1
+        assert dense.test("a" + "b" * 1000)
+        assert not dense.test("a" + "b" * 1000 + "a" + "b" * 100)
+        assert not dense.test("ax")
+        assert dense.test_batch(["a", "", "abb"]) == [True, False, True]
@@ -0,0 +1,53 @@
+import pytest
+
+from literals import Prefilter
+from literals import required_literals
+
+
+class TestRequiredLiterals:
+    @pytest.mark.parametrize("regex, expected", [
+        ("abc", {"abc"}),
+        ("(a|b)*errorc+", {"errorc"}),
+        ("(ab|cd)x", {"abx", "cdx"}),
+        ("a|b", {"a", "b"}),
+        ("(x|y)*(foo|bar)(x|y)*", {"foo", "bar"}),
+        ("a?bc", {"bc", "abc"}),
+        ("a+b+", {"ab"}),
+        ("(abc)+", {"abc"}),
+        ("a(b|c)*d", {"a"}),
+    ])
+    def test_literals(self, regex, expected):
+        assert required_literals(regex) == expected
+
+    @pytest.mark.parametrize("regex", ["a*", "a?", "(a|b)*", "a|b*"])
+    def test_no_literals(self, regex):
+        assert required_literals(regex) is None
+
+    def test_large_alternation_is_shortened(self):
+        words = [first + second + "xyz" for first in "abcdef" for second in "ghijkl"]
+        literals = required_literals("|".join(words))
+
+        assert len(literals) <= 16
+        assert all(any(literal in word for literal in literals) for word in words)
+
+
+class TestPrefilter:
+    def test_find_leftmost(self):
+        prefilter = Prefilter(frozenset({"bar", "foo"}))
+
+        assert prefilter.find("xxbarxxfoo") == 2
+        assert prefilter.find("xxfooxxbar") == 2
+        assert prefilter.find("xxbarxxfoo", 3) == 7
+        assert prefilter.find("xxxx") == -1
+
+    def test_find_overlapping_lengths(self):
+        prefilter = Prefilter(frozenset({"abcdef", "cd"}))
+
+        assert prefilter.find("xabcdef") == 1
+
+    def test_bytes(self):
+        prefilter = Prefilter(frozenset({"error"}))
+
+        assert prefilter.may_match(b"an error here")
+        assert not prefilter.may_match(b"all fine")
+        assert prefilter.find(b"an error here") == 3
@@ -0,0 +1,73 @@
+import pytest
+
+from converter import RegexToNFAConverter
+from dfa import DFA
+from nfa import EPSILON
+from nfa import Tag
+from nfa import char
+from nfa import group
+from nfa import nfa_to_dfa
+from nfa_reduction import epsilon_components
+from nfa_reduction import nfa_size
+from nfa_reduction import reduce_nfa
+from testing import all_strings
+
+
+def _keyword(i: int) -> str:
+    return "kw" + "".join(chr(ord("a") + int(d)) for d in str(i))
+
+
+class TestReduceNFA:
+    @pytest.mark.parametrize("regex", ["(a|b)*abb", "a+b?c*", "((ab)*|c)+", "(a*)*b", "(a?)+|b", "(a|b)*a(a|b)(a|b)",
+                                       "a|ab|abc", "(a|a)(b|b)*", "((a|b)?c)*(a|b)"])
+    def test_same_language(self, regex):
+        expected = DFA.from_regex(regex)
+        nfa = RegexToNFAConverter(regex).parse()
+        reduced = reduce_nfa(nfa)
+        assert nfa_size(reduced) <= nfa_size(nfa)
+        dfa = DFA.from_nfa(reduced)
+        for string in all_strings("abc", 5):
+            assert dfa.test(string) == expected.test(string), (regex, string)
+
+    def test_sizes(self):
+        nfa = RegexToNFAConverter("(a*)*b").parse()
+        assert nfa_size(nfa) == (8, 11, 9)
+        assert nfa_size(reduce_nfa(nfa)) == (2, 2, 0)
+        assert nfa_size(reduce_nfa(RegexToNFAConverter("(a|b)*abb").parse())) == (6, 8, 3)
+
+    def test_keywords_collapse(self):
+        regex = "|".join(_keyword(i) for i in range(100))
+        reduced = reduce_nfa(RegexToNFAConverter(regex).parse())
+        assert nfa_size(reduced)[0] == 5
+        table, _ = nfa_to_dfa(reduced)
+        assert len(table) == 5
+        dfa = DFA.from_nfa(reduced)
+        assert dfa.test("kwa") and dfa.test("kwjj") and not dfa.test("kwab") and not dfa.test("kw")
+
+    def test_input_is_untouched(self):
+        nfa = RegexToNFAConverter("(a|b)*abb").parse()
+        before = nfa_size(nfa)
+        reduce_nfa(nfa)
+        assert nfa_size(nfa) == before
+        assert DFA.from_nfa(nfa).test("aabb")
+
+    def test_tags_are_kept(self):
+        reduced = reduce_nfa(group(char("a"), 1))
+        labels = {label for state in [reduced.in_state] for label in state.transition_map}
+        assert labels == {Tag(2)}
+        assert nfa_size(reduced) == (4, 3, 0)
+
+    def test_from_regex(self):
+        for regex in ["(a|b)*abb", "a+b?c*"]:
+            reduced = DFA.from_regex(regex, reduce=True)
+            expected = DFA.from_regex(regex)
+            assert len(reduced.table) == len(expected.table)
+            assert reduced.test_batch(list(all_strings("abc", 4))) == expected.test_batch(list(all_strings("abc", 4)))
+
+
+class TestEpsilonComponents:
+    def test_cycles(self):
+        graph = {1: {EPSILON: {2}}, 2: {EPSILON: {3}, "a": {4}}, 3: {EPSILON: {1}}, 4: {EPSILON: {5}}, 5: {}}
+        representative = epsilon_components(graph, 1, 5)
+        assert representative[1] == representative[2] == representative[3]
+        assert len({representative[1], representative[4], representative[5]}) == 3
@@ -0,0 +1,34 @@
+import pytest
+
+import parallel_dfa
+
+from converter import RegexToNFAConverter
+
+from dfa import DFA
+
+from equivalence import are_equivalent
+
+from nfa import nfa_to_dfa
+
+from parallel_dfa import nfa_to_dfa_parallel
+
+REGEXES = ["(a|b)*abb", "a+b?c", "(ab|ba)*", "(a|b)*a(a|b)(a|b)(a|b)", "a"]
+
+
+class TestParallelSubsetConstruction:
+    @pytest.mark.parametrize("regex", REGEXES)
+    def test_same_as_sequential(self, regex):
+        expected = nfa_to_dfa(RegexToNFAConverter(regex).parse())
+        assert nfa_to_dfa_parallel(RegexToNFAConverter(regex).parse(), workers=1) == expected
+
+    def test_worker_pool(self, monkeypatch):
+        # Every level goes through the pool, not just the wide ones
+        monkeypatch.setattr(parallel_dfa, "MIN_PARALLEL_FRONTIER", 1)
+        regex = "(a|b)*a(a|b)(a|b)(a|b)"
+        expected = nfa_to_dfa(RegexToNFAConverter(regex).parse())
+        assert nfa_to_dfa_parallel(RegexToNFAConverter(regex).parse(), workers=2) == expected
+
+    def test_from_regex_workers(self):
+        dfa = DFA.from_regex("(a|b)*abb", workers=2)
+        assert are_equivalent(dfa, DFA.from_regex("(a|b)*abb"))
+        assert dfa.test("babb")
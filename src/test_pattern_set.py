@@ -0,0 +1,108 @@
+import itertools
+import threading
+
+import pytest
+
+from dfa import DFA
+from pattern_set import PatternSet
+from testing import all_strings
+
+RULES = ["(a|b)*abb", "a+b?c*", "((ab)*|c)+", "abc", "(a|b|c)*c", "b*"]
+
+
+def _expected(rules: dict[int, str], string: str) -> set[int]:
+    return {pattern_id for pattern_id, regex in rules.items() if DFA.from_regex(regex).test(string)}
+
+
+class TestPatternSet:
+    @pytest.mark.parametrize("shard_size", [1, 2, 16])
+    def test_matches_every_pattern(self, shard_size):
+        patterns = PatternSet(RULES, shard_size=shard_size)
+        dfas = [DFA.from_regex(regex) for regex in RULES]
+        strings = list(all_strings("abc", 5))
+        expected = [{i for i, dfa in enumerate(dfas) if dfa.test(string)} for string in strings]
+        assert patterns.match_batch(strings) == expected
+        assert [patterns.match(string) for string in strings] == expected
+        assert patterns.shards == -(-len(RULES) // shard_size)
+
+    def test_add_and_remove(self):
+        patterns = PatternSet(shard_size=2)
+        ids = [patterns.add(regex) for regex in RULES]
+        assert ids == list(range(len(RULES)))
+        patterns.remove(1)
+        patterns.remove(4)
+        assert 1 not in patterns and len(patterns) == len(RULES) - 2
+        assert patterns.add("ab") == len(RULES)
+        assert patterns.regexes[len(RULES)] == "ab"
+        for string in all_strings("abc", 4):
+            assert patterns.match(string) == _expected(patterns.regexes, string), string
+        with pytest.raises(KeyError):
+            patterns.remove(1)
+
+    def test_empty_shards_are_dropped(self):
+        patterns = PatternSet(["a", "b", "c"], shard_size=1)
+        patterns.remove(1)
+        assert patterns.shards == 2
+        assert patterns.match("b") == set() and patterns.match("c") == {2}
+
+    def test_changes_keep_other_caches(self):
+        patterns = PatternSet(["(a|b)*abb", "a+b?c*"], shard_size=2)
+        patterns.match_batch(list(all_strings("abc", 4)))
+        warm = patterns._shards[0]
+        assert warm.cached_states > 0
+        pattern_id = patterns.add("abc")
+        assert patterns._shards[0] is warm and warm.cached_states > 0
+        assert patterns._shards[1].cached_states == 0
+        patterns.remove(pattern_id)
+        assert patterns._shards == (warm,)
+
+    def test_cache_limit(self):
+        patterns = PatternSet(["(a|b)*a(a|b)(a|b)(a|b)"], cache_limit=4)
+        strings = list(all_strings("ab", 8))
+        dfa = DFA.from_regex("(a|b)*a(a|b)(a|b)(a|b)")
+        assert [bool(matched) for matched in patterns.match_batch(strings)] == dfa.test_batch(strings)
+        shard = patterns._shards[0]
+        assert shard.flushes > 0
+
+    def test_cache_limit_within_one_input(self):
+        patterns = PatternSet(["(a|b)*a(a|b)(a|b)(a|b)"], cache_limit=4)
+        shard = patterns._shards[0]
+        assert patterns.match("ab" * 50 + "aaaa") == {0}
+        assert shard.flushes > 0
+        assert shard.cached_states <= 4
+
+    def test_churn_keeps_shards_packed(self):
+        patterns = PatternSet(["a" * (i % 5 + 1) + "b" for i in range(64)], shard_size=16)
+        assert patterns.shards == 4
+        for i in range(300):
+            patterns.remove(sorted(patterns.regexes)[(i * 7) % len(patterns)])
+            patterns.add("c" * (i % 7 + 1))
+            assert patterns.shards <= 5
+        for pattern_id in sorted(patterns.regexes)[:40]:
+            patterns.remove(pattern_id)
+        # 24 patterns left: no two shards could be merged into one
+        sizes = sorted(len(shard.patterns) for shard in patterns._shards)
+        assert sum(sizes) == 24
+        assert all(a + b > 16 for a, b in itertools.combinations(sizes, 2) if a < 8)
+
+    def test_readers_during_changes(self):
+        patterns = PatternSet(["abc", "(a|b)*abb"], shard_size=2)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                matched = patterns.match("aabb")
+                # The first two rules never change, the added ones never match aabb
+                if matched != {1}:
+                    errors.append(matched)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for i in range(30):
+                patterns.remove(patterns.add("c" * (i + 1)))
+        finally:
+            done.set()
+            reader.join()
+        assert errors == []
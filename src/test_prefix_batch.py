@@ -0,0 +1,60 @@
+import itertools
+import random
+
+from dfa import DFA
+
+from prefix_batch import common_prefix_length
+from prefix_batch import match_shared_prefixes
+
+
+class _CountingRow(dict):
+    steps = 0
+
+    def get(self, symbol, default=None):
+        _CountingRow.steps += 1
+        return super().get(symbol, default)
+
+
+def _trie_edges(strings):
+    return len({string[:end] for string in strings for end in range(1, len(string) + 1)})
+
+
+class TestCommonPrefixLength:
+    def test_lengths(self):
+        assert common_prefix_length("", "abc") == 0
+        assert common_prefix_length("abc", "abd") == 2
+        assert common_prefix_length("abc", "abcde") == 3
+        assert common_prefix_length("abc", "abc") == 3
+        assert common_prefix_length("xbc", "abc") == 0
+
+
+class TestSharedPrefixes:
+    def test_same_as_test_batch(self):
+        for regex in ["(a|b)*abb", "ab(c|d)*", "a+b?c*", "(a|b|c|d)*", "ab|abc|abcd"]:
+            dfa = DFA.from_regex(regex)
+            strings = ["".join(letters) for length in range(6) for letters in itertools.product("abcde", repeat=length)]
+            random.Random(0).shuffle(strings)
+            assert dfa.test_prefix_batch(strings) == dfa.test_batch(strings), regex
+
+    def test_unminimized_dfa(self):
+        dfa = DFA.from_regex("(a|b)*abb", minimize=False)
+        strings = ["abb", "babb", "ab", "abbx", "", "aabb"]
+        assert match_shared_prefixes(dfa, strings) == [dfa.test(string) for string in strings]
+
+    def test_work_follows_trie_edges(self):
+        dfa = DFA.from_regex("(a|b|c)*c", minimize=False)
+        dfa.table = {state: _CountingRow(row) for state, row in dfa.table.items()}
+        rng = random.Random(1)
+        prefix = "abcabcabcabcabcabcab"
+        strings = [prefix + "".join(rng.choice("abc") for _ in range(3)) for _ in range(200)]
+
+        _CountingRow.steps = 0
+        results = match_shared_prefixes(dfa, strings)
+        assert _CountingRow.steps == _trie_edges(strings)
+        assert _CountingRow.steps < sum(len(string) for string in strings) // 5
+        assert results == [string.endswith("c") for string in strings]
+
+    def test_duplicates_and_empty(self):
+        dfa = DFA.from_regex("a*")
+        assert dfa.test_prefix_batch(["aa", "", "aa", "ab", "a"]) == [True, True, True, False, True]
+        assert dfa.test_prefix_batch([]) == []
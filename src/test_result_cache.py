@@ -0,0 +1,108 @@
+import sys
+
+from dfa import DFA
+from result_cache import ENTRY_OVERHEAD
+from result_cache import CachedMatcher
+from utf8 import ByteDFA
+
+
+class _CountingMatcher:
+    def __init__(self, dfa: DFA):
+        self.dfa = dfa
+        self.calls = 0
+
+    def test(self, string) -> bool:
+        self.calls += 1
+        return self.dfa.test(string)
+
+    def test_batch(self, strings) -> list[bool]:
+        strings = list(strings)
+        self.calls += len(strings)
+        return self.dfa.test_batch(strings)
+
+
+class _PairMatcher:
+    # Accepts any pair, whatever the items are
+    def test(self, items) -> bool:
+        return len(items) == 2
+
+    def test_batch(self, batch) -> list[bool]:
+        return [self.test(items) for items in batch]
+
+
+class TestCachedMatcher:
+    def test_hits_skip_the_matcher(self):
+        counting = _CountingMatcher(DFA.from_regex("(a|b)*abb"))
+        cache = CachedMatcher(counting)
+        assert [cache.test(string) for string in ["abb", "ab", "abb", "abb", "ab"]] == [True, False, True, True, False]
+        assert counting.calls == 2
+        assert (cache.hits, cache.misses, cache.bypassed) == (3, 2, 0)
+        assert cache.hit_rate == 0.6
+        assert len(cache) == 2
+
+    def test_batch(self):
+        counting = _CountingMatcher(DFA.from_regex("(a|b)*abb"))
+        cache = CachedMatcher(counting)
+        cache.test("abb")
+        assert cache.test_batch(["abb", "ba", "aabb", "ba"]) == [True, False, True, False]
+        # One batch call for the distinct misses, the repeated one is answered with them
+        assert counting.calls == 3
+        assert cache.test_batch(["ba", "aabb"]) == [False, True]
+        assert counting.calls == 3
+        assert cache.stats()["hits"] == 4
+
+    def test_lru_eviction_by_bytes(self):
+        cost = sys.getsizeof("aa") + ENTRY_OVERHEAD
+        cache = CachedMatcher(DFA.from_regex("a*"), max_bytes=2 * cost)
+        cache.test("aa")
+        cache.test("ab")
+        cache.test("aa")
+        cache.test("ba")
+        assert cache.evictions == 1
+        assert "ab" not in cache._entries and "aa" in cache._entries
+        assert cache.size == 2 * cost
+
+    def test_long_inputs_are_not_cached(self):
+        cache = CachedMatcher(DFA.from_regex("a*"), max_length=4)
+        assert cache.test("a" * 5) and cache.test("a" * 5)
+        assert cache.test_batch(["a" * 10, "aa"]) == [True, True]
+        assert cache.bypassed == 3 and len(cache) == 1
+
+    def test_unhashable_inputs(self):
+        from events import EventMatcher
+
+        cache = CachedMatcher(EventMatcher.from_regex("<1><2>*"))
+        assert cache.test([1, 2, 2]) and cache.test((1, 2))
+        assert cache.test_batch([[1], (1, 2)]) == [True, True]
+        assert cache.bypassed == 2 and cache.hits == 1
+
+    def test_inputs_that_cannot_be_keys(self):
+        cache = CachedMatcher(DFA.from_regex("(a|b)*abb", minimize=False))
+        assert cache.test(iter("abb"))
+        assert cache.test_batch([iter("aabb"), "abb", iter("ab")]) == [True, True, False]
+        assert cache.bypassed == 3 and len(cache) == 1
+
+        # Hashable by type, unhashable by content
+        cache = CachedMatcher(_PairMatcher())
+        assert cache.test((1, [2]))
+        assert cache.test_batch([(1, [2]), (1, 2, 3)]) == [True, False]
+        assert cache.bypassed == 2 and len(cache) == 1
+
+    def test_memoryviews_are_not_cached(self):
+        cache = CachedMatcher(ByteDFA.from_regex("ab*"))
+        assert cache.test(memoryview(bytearray(b"abb")))
+        assert cache.test(memoryview(b"abb"))
+        assert cache.test_batch([memoryview(bytearray(b"ab")), memoryview(b"ba"), b"ab"]) == [True, False, True]
+        assert cache.bypassed == 4 and len(cache) == 1
+
+    def test_bytes(self):
+        cache = CachedMatcher(ByteDFA.from_regex("ab*"))
+        assert cache.test(b"abb") and cache.test(b"abb") and not cache.test(b"ba")
+        assert cache.hits == 1
+
+    def test_dfa_cached(self):
+        cache = DFA.from_regex("ab").cached(max_length=8)
+        assert cache.max_length == 8
+        assert cache.test_batch(["ab", "ab", "a"]) == [True, True, False]
+        cache.clear()
+        assert len(cache) == 0 and cache.size == 0
@@ -0,0 +1,73 @@
+from analysis import longest_match_length
+
+from dfa import DFA
+
+from search import Searcher
+
+
+class TestLongestMatchLength:
+    def test_finite(self):
+        assert longest_match_length(DFA.from_regex("ab(c|de)")) == 4
+        assert longest_match_length(DFA.from_regex("a?")) == 1
+
+    def test_unbounded(self):
+        assert longest_match_length(DFA.from_regex("ab*c")) is None
+
+
+class TestSearcher:
+    def test_fullmatch(self):
+        searcher = Searcher("(a|b)*errorc+")
+
+        assert searcher.fullmatch("abaerrorcc")
+        assert not searcher.fullmatch("abaerrorc" + "d")
+        assert not searcher.fullmatch("abab")
+
+        assert searcher.stats.checked == 3
+        assert searcher.stats.skipped == 1
+        assert searcher.stats.matches == 1
+
+    def test_search_leftmost_longest(self):
+        searcher = Searcher("(a|b)*errorc+")
+
+        assert searcher.search("xxaberrorccx errorc") == (2, 11)
+        assert searcher.search("xx errorx") is None
+        assert searcher.search("errorc") == (0, 6)
+
+    def test_search_bounded_window(self):
+        searcher = Searcher("ab(c|d)")
+
+        assert searcher.search("zzzzzzabzzabd") == (10, 13)
+        assert searcher.search("abzabzab") is None
+
+    def test_search_matches_brute_force(self):
+        regex = "(a|b)*a(a|b)"
+        searcher = Searcher(regex)
+        plain = Searcher(regex, use_prefilter=False)
+
+        assert searcher.prefilter is not None
+        assert plain.prefilter is None
+        for text in ["", "a", "ab", "bbb", "xbbaax", "bxab", "aaa", "xxbabx"]:
+            assert searcher.search(text) == plain.search(text)
+
+    def test_empty_match(self):
+        assert Searcher("a*").search("bbb") == (0, 0)
+
+    def test_bytes_spans_are_byte_offsets(self):
+        for use_prefilter in (True, False):
+            searcher = Searcher("ab(c|d)?", use_prefilter=use_prefilter)
+            text = "é€ab".encode() + b"\xffabd"
+            assert searcher.search("é€ab".encode()) == (5, 7)
+            assert searcher.search(b"\xc3\xa9ab") == (2, 4)
+            assert searcher.search(b"\xff\xfeab") == (2, 4)
+            start, end = searcher.search(text[7:])
+            assert text[7:][start:end] == b"abd"
+            assert searcher.search("éa".encode()) is None
+
+    def test_filter_lines(self):
+        searcher = Searcher("warn(ing)?")
+        lines = [b"all good\n", b"warning: disk\n", b"ok\n", b"warn: cpu\n"]
+
+        assert list(searcher.filter_lines(lines)) == [b"warning: disk\n", b"warn: cpu\n"]
+        assert searcher.stats.checked == 4
+        assert searcher.stats.candidates == 2
+        assert searcher.stats.hit_rate == 0.5
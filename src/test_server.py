@@ -0,0 +1,187 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from loadgen import run_load
+
+from server import MatchServer
+from server import PatternRegistry
+from server import ServerStats
+from server import _PatternBatcher
+
+
+async def _request(reader, writer, line: str) -> str:
+    writer.write(f"{line}\n".encode())
+    await writer.drain()
+    return (await reader.readline()).decode().rstrip("\n")
+
+
+class _FailingExecutor(ThreadPoolExecutor):
+    # Compiles like the real pool, except that "a*b" raises inside the worker
+    def submit(self, fn, *args, **kwargs):
+        if args[:1] == ("a*b",):
+            return super().submit(_fail_in_worker)
+        return super().submit(fn, *args, **kwargs)
+
+
+def _fail_in_worker():
+    raise RecursionError("maximum recursion depth exceeded")
+
+
+def _run_with_server(scenario, batch_window: float = 0.001, executor_class=ThreadPoolExecutor, max_line=None,
+                     **options):
+    async def run():
+        executor = executor_class(max_workers=2)
+        registry = PatternRegistry(executor=executor, batch_window=batch_window, **options)
+        server = MatchServer(registry) if max_line is None else MatchServer(registry, max_line=max_line)
+        host, port = await server.start_tcp()
+        try:
+            return await scenario(server, host, port)
+        finally:
+            await server.close()
+            executor.shutdown()
+
+    return asyncio.run(run())
+
+
+class TestMatchServer:
+    def test_compile_and_match(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE (a|b)*abb"),
+                await _request(reader, writer, "COMPILE (a|b)*abb"),
+                await _request(reader, writer, "MATCH 0 aabb"),
+                await _request(reader, writer, "MATCH 0 ab"),
+                await _request(reader, writer, "MATCH 0 "),
+            ]
+            writer.close()
+            return responses
+
+        assert _run_with_server(scenario) == ["OK 0", "OK 0", "1", "0", "0"]
+
+    def test_errors(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE a|"),
+                await _request(reader, writer, "MATCH 7 a"),
+                await _request(reader, writer, "MATCH x a"),
+                await _request(reader, writer, "HELLO"),
+            ]
+            writer.close()
+            return responses
+
+        responses = _run_with_server(scenario)
+        assert responses[0] == "ERR missing operand at the end at position 2"
+        assert all(response.startswith("ERR") for response in responses)
+
+    def test_blowups_are_refused(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE (a|b)*a" + "(a|b)" * 30),
+                await _request(reader, writer, "STATS"),
+            ]
+            writer.close()
+            return responses
+
+        responses = _run_with_server(scenario)
+        assert responses[0].startswith("ERR pattern too complex")
+        assert responses[1].endswith("patterns=0")
+
+    def test_worker_failures_are_answered(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE a*b"),
+                await _request(reader, writer, "STATS"),
+                await _request(reader, writer, "COMPILE ab"),
+                await _request(reader, writer, "MATCH 0 ab"),
+            ]
+            writer.close()
+            return responses
+
+        responses = _run_with_server(scenario, executor_class=_FailingExecutor)
+        assert responses[0] == "ERR RecursionError: maximum recursion depth exceeded"
+        assert responses[1].startswith("OK requests=0")
+        assert responses[2:] == ["OK 0", "1"]
+
+    def test_oversized_lines_are_refused(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE " + "a" * 5000),
+                await _request(reader, writer, "COMPILE ab"),
+                await _request(reader, writer, "MATCH 0 " + "ab" * 1000),
+                await _request(reader, writer, "MATCH 0 ab"),
+            ]
+            writer.close()
+            return responses
+
+        assert _run_with_server(scenario, max_line=1024) == ["ERR line too long", "OK 0", "ERR line too long", "1"]
+
+    def test_failing_batches_are_answered(self):
+        class Broken:
+            def test_batch(self, strings):
+                raise RuntimeError("matcher failed")
+
+        async def run():
+            batcher = _PatternBatcher(Broken(), 0.001, 16, ServerStats())
+            futures = [batcher.submit("a"), batcher.submit("b")]
+            return await asyncio.gather(*futures, return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert [str(result) for result in results] == ["matcher failed", "matcher failed"]
+
+    def test_result_cache(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [await _request(reader, writer, "COMPILE (a|b)*abb")]
+            for string in ["abb", "ab", "abb", "abb"]:
+                responses.append(await _request(reader, writer, f"MATCH 0 {string}"))
+            responses.append(await _request(reader, writer, "STATS"))
+            writer.close()
+            return responses
+
+        responses = _run_with_server(scenario, result_cache_bytes=1 << 16)
+        assert responses[:5] == ["OK 0", "1", "0", "1", "1"]
+        assert responses[5] == "OK requests=4 batches=4 cache_hit_rate=0.500 patterns=1"
+
+    def test_slow_compilations_time_out(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [
+                await _request(reader, writer, "COMPILE (a|b)*a" + "(a|b)" * 8),
+                await _request(reader, writer, "COMPILE ab"),
+            ]
+            writer.close()
+            return responses
+
+        responses = _run_with_server(scenario, max_dfa_states=None, compile_timeout=0.05)
+        assert responses == ["ERR compilation deadline exceeded", "OK 0"]
+
+    def test_pipelined_requests_are_batched(self):
+        async def scenario(server, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            assert await _request(reader, writer, "COMPILE a+b") == "OK 0"
+
+            strings = ["ab", "b", "aaab", "ba"] * 50
+            writer.write("".join(f"MATCH 0 {string}\n" for string in strings).encode())
+            await writer.drain()
+            responses = [(await reader.readline()).decode().strip() for _ in strings]
+            writer.close()
+            return strings, responses, server.stats
+
+        strings, responses, stats = _run_with_server(scenario, batch_window=0.01)
+        assert responses == ["1", "0", "1", "0"] * 50
+        assert stats.requests == len(strings)
+        assert stats.batches < len(strings)
+
+    def test_load_generator(self):
+        async def scenario(server, host, port):
+            return await run_load("(a|b)*abb", connections=4, requests=50, depth=8, host=host, port=port)
+
+        report = _run_with_server(scenario)
+        assert report.requests == 200
+        assert report.errors == 0
+        assert 0 < report.percentile(0.5) <= report.percentile(0.99)
@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from dfa import DFA
+
+from shared_tables import SharedDFA
+from shared_tables import SharedTableRegistry
+from shared_tables import _open_untracked
+
+STRINGS = ["abb", "ab", "babb", "aabb", "", "c"]
+
+
+def _segment_exists(name: str) -> bool:
+    try:
+        _open_untracked(name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _match_in_worker(view: SharedDFA, strings: list[str]) -> tuple[int, list[bool]]:
+    return os.getpid(), [view.test(string) for string in strings]
+
+
+@pytest.fixture
+def registry():
+    registry = SharedTableRegistry()
+    yield registry
+    registry.close()
+
+
+class TestSharedTables:
+    def test_view_matches_like_the_dfa(self, registry):
+        dfa = DFA.from_regex("(a|b)*abb")
+        view = registry.attach(registry.publish(dfa))
+
+        assert [view.test(string) for string in STRINGS] == [dfa.test(string) for string in STRINGS]
+        assert view.accepting.readonly
+
+    def test_same_table_is_published_once(self, registry):
+        name = registry.publish(DFA.from_regex("a(b|c)"))
+        assert registry.publish(DFA.from_regex("ab|ac")) == name
+        assert registry.references(name) == 2
+        assert len(registry) == 1
+
+    def test_release_unlinks_the_last_reference(self, registry):
+        name = registry.publish(DFA.from_regex("ab+"))
+        view = registry.attach(name)
+        assert view.test("abbb")
+
+        registry.release(name)
+        assert _segment_exists(name)
+        registry.release(name)
+        assert not _segment_exists(name)
+
+    def test_close_cleans_up(self):
+        registry = SharedTableRegistry()
+        name = registry.publish(DFA.from_regex("abc"))
+        registry.close()
+        assert not _segment_exists(name)
+
+    def test_worker_processes_attach_by_name(self, registry):
+        dfa = DFA.from_regex("(a|b)*abb")
+        view = registry.attach(registry.publish(dfa))
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            pid, results = executor.submit(_match_in_worker, view, STRINGS).result()
+
+        assert pid != os.getpid()
+        assert results == [dfa.test(string) for string in STRINGS]
+        # The worker exiting must not take the segment with it
+        assert _segment_exists(view.name)
+
+    @pytest.mark.skipif(sys.version_info >= (3, 13), reason="attaching is untracked")
+    def test_only_borrowed_segments_are_unregistered(self, registry, monkeypatch):
+        unregistered = []
+        unregister = resource_tracker.unregister
+        monkeypatch.setattr(resource_tracker, "unregister",
+                            lambda name, rtype: (unregistered.append(name), unregister(name, rtype)))
+
+        registry.attach(registry.publish(DFA.from_regex("ab")))
+        assert unregistered == []
+
+        borrowed = SharedMemory(create=True, size=16)
+        try:
+            _open_untracked(borrowed.name).close()
+            assert unregistered == [borrowed._name]
+        finally:
+            # This process created it outside the registry, the creator's tracker entry went with the view
+            resource_tracker.register(borrowed._name, "shared_memory")
+            borrowed.close()
+            borrowed.unlink()
@@ -0,0 +1,62 @@
+import pytest
+
+from dfa import DFA
+
+from equivalence import are_equivalent
+
+from sharing import CompilationSession
+
+from shunting_yard import RegexSyntaxError
+
+DATE = "(a|b|c)(a|b|c)x(a|b|c)(a|b|c)"
+
+
+class TestCompilationSession:
+    def test_identical_subtrees_are_interned(self):
+        session = CompilationSession()
+        first = session.intern(f"k{DATE}")
+        second = session.intern(f"m{DATE}")
+
+        assert first != second
+        assert session.intern(f"k{DATE}") == first
+        assert session.stats.unique < session.stats.occurrences
+        assert 0 < session.stats.sharing_ratio < 1
+
+    def test_same_languages(self):
+        rules = [f"k{DATE}", f"m({DATE})*", f"{DATE}|ab", f"(ab|{DATE})+z", "ab"]
+        session = CompilationSession()
+        dfas = session.compile_many(rules)
+
+        for rule, dfa in zip(rules, dfas):
+            assert are_equivalent(dfa, DFA.from_regex(rule)), rule
+        assert session.stats.fragments_built >= 1
+        assert session.stats.fragment_hits >= len(rules) - 2
+        assert session.stats.states_saved > 0
+
+    def test_larger_sub_dfas_save_nothing(self):
+        # The minimal DFA of this subtree has 64 states, more than its Thompson fragment
+        subtree = "((a|b)*a(a|b)(a|b)(a|b)(a|b)(a|b))"
+        session = CompilationSession()
+        session.compile_many([f"k{subtree}", f"m{subtree}"])
+        assert session.stats.fragment_hits == 1
+        assert session.stats.states_saved == 0
+
+    def test_fragments_are_not_modified(self):
+        session = CompilationSession()
+        session.compile(f"k{DATE}")
+        session.compile(f"m{DATE}")
+        # Reusing the shared sub-DFA must leave it intact for the next pattern
+        dfa = session.compile(f"({DATE})+")
+        assert dfa.test("abxcaabxca")
+        assert not dfa.test("abxca" + "ab")
+
+    def test_repeated_pattern_is_a_copy(self):
+        session = CompilationSession()
+        first, second = session.compile_many([DATE, DATE])
+        first.table.clear()
+        assert second.test("abxca")
+        assert session.compile(DATE).test("abxca")
+
+    def test_unsupported_symbol(self):
+        with pytest.raises(RegexSyntaxError):
+            CompilationSession().compile("a1")
@@ -1,5 +1,12 @@
+import pytest
+
 from shunting_yard import format_regex
 from shunting_yard import infix_to_postfix
+from shunting_yard import parse_symbol
+from shunting_yard import tokenize
+from shunting_yard import tokens_to_postfix
+from shunting_yard import RegexSyntaxError
+from shunting_yard import SYMBOL, CONCAT, LPAREN, GROUP
 
 
 class TestFormatRegex:
@@ -52,3 +59,75 @@ class TestInfixToPostfix:
 
     def test_9(self):
         assert infix_to_postfix("a*b*c*") == "a*b*.c*."
+
+
+class TestTokenize:
+    def test_explicit_concatenation(self):
+        tokens = tokenize("a(b|c)*d")
+        assert tokens.values == list("a.(b|c)*.d")
+        assert list(tokens.kinds[:3]) == [SYMBOL, CONCAT, LPAREN]
+
+    def test_positions(self):
+        tokens = tokenize("ab|c")
+        assert [(value, tokens.position(i)) for i, (_, value) in enumerate(tokens)] == [
+            ("a", 0), (".", 1), ("b", 1), ("|", 2), ("c", 3)
+        ]
+
+    def test_postfix_tokens(self):
+        postfix = tokens_to_postfix(tokenize("(a|b)*abb"))
+        assert postfix.text() == "ab|*a.b.b."
+        assert [postfix.position(i) for i in range(len(postfix))] == [1, 3, 2, 5, 6, 6, 7, 7, 8, 8]
+
+    def test_postfix_groups(self):
+        postfix = tokens_to_postfix(tokenize("(a(b))|(c)*"), captures=True)
+        assert postfix.values == ["a", "b", "2", ".", "1", "c", "3", "*", "|"]
+        assert [kind == GROUP for kind in postfix.kinds] == [False, False, True, False, True, False, True, False, False]
+        assert postfix.position(4) == 5
+
+    def test_event_codes(self):
+        tokens = tokenize("a<12>(b|<7>)*")
+        assert [(value, tokens.position(i)) for i, (_, value) in enumerate(tokens)] == [
+            ("a", 0), (".", 1), ("<12>", 1), (".", 5), ("(", 5), ("b", 6), ("|", 7), ("<7>", 8), (")", 11), ("*", 12)
+        ]
+        assert parse_symbol("<12>") == 12
+        assert parse_symbol("a") == "a"
+
+    @pytest.mark.parametrize("regex, position", [
+        ("a<12", 1),
+        ("<x>", 0),
+        ("b|<>", 2),
+    ])
+    def test_malformed_event_codes(self, regex, position):
+        with pytest.raises(RegexSyntaxError) as error:
+            tokenize(regex)
+        assert error.value.position == position
+
+    @pytest.mark.parametrize("regex, position", [
+        ("", 0),
+        ("a)", 1),
+        ("(a", 0),
+        ("a(b", 1),
+        ("()", 1),
+        ("a|", 2),
+        ("|a", 0),
+        ("a||b", 2),
+        ("*a", 0),
+        ("a|*", 2),
+        ("(|a)", 1),
+        ("(a|)", 3),
+    ])
+    def test_malformed(self, regex, position):
+        with pytest.raises(RegexSyntaxError) as error:
+            infix_to_postfix(regex)
+        assert error.value.position == position
+
+    def test_large_alternation(self):
+        words = ["kw" + "".join(chr(ord("a") + int(d)) for d in str(i)) for i in range(20000)]
+        regex = "|".join(words)
+        postfix = infix_to_postfix(regex)
+        assert len(postfix) == len(regex) + sum(len(w) - 1 for w in words)
+        assert postfix.endswith("|")
+
+    def test_deep_nesting(self):
+        regex = "(" * 5000 + "a" + ")" * 5000
+        assert infix_to_postfix(regex) == "a"
@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import pytest
+
+from dfa import DFA
+
+from utf8 import ByteDFA
+from utf8 import to_utf8_dfa
+from utf8 import utf8_ranges
+
+from word_dfa import build_word_dfa
+
+
+def _encodings(sequences):
+    return {bytes(values) for sequence in sequences
+            for values in itertools.product(*(range(low, high + 1) for low, high in sequence))}
+
+
+class TestUtf8Ranges:
+    def test_full_range(self):
+        assert utf8_ranges(0, 0x10FFFF) == [
+            ((0x00, 0x7F),),
+            ((0xC2, 0xDF), (0x80, 0xBF)),
+            ((0xE0, 0xE0), (0xA0, 0xBF), (0x80, 0xBF)),
+            ((0xE1, 0xEC), (0x80, 0xBF), (0x80, 0xBF)),
+            ((0xED, 0xED), (0x80, 0x9F), (0x80, 0xBF)),
+            ((0xEE, 0xEF), (0x80, 0xBF), (0x80, 0xBF)),
+            ((0xF0, 0xF0), (0x90, 0xBF), (0x80, 0xBF), (0x80, 0xBF)),
+            ((0xF1, 0xF3), (0x80, 0xBF), (0x80, 0xBF), (0x80, 0xBF)),
+            ((0xF4, 0xF4), (0x80, 0x8F), (0x80, 0xBF), (0x80, 0xBF)),
+        ]
+
+    def test_random_ranges(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            low = rng.randrange(0x11000)
+            high = low + rng.randrange(2000)
+            expected = {chr(code).encode() for code in range(low, high + 1) if not 0xD800 <= code <= 0xDFFF}
+            assert _encodings(utf8_ranges(low, high)) == expected, (low, high)
+
+
+class TestByteDFA:
+    def test_regex(self):
+        dfa = DFA.from_regex("(a|b)*abb")
+        byte_dfa = ByteDFA(dfa)
+        for length in range(6):
+            for letters in itertools.product("abc", repeat=length):
+                string = "".join(letters)
+                assert byte_dfa.test(string.encode()) == dfa.test(string)
+
+    def test_unicode_words(self):
+        words = sorted(["hello", "héllo", "naïve", "日本", "日本語", "über", "😀x"])
+        dfa = build_word_dfa(words)
+        byte_dfa = ByteDFA(dfa)
+
+        for word in words + ["hell", "日", "😀", "x", ""]:
+            assert byte_dfa.test(word.encode()) == dfa.test(word), word
+        assert byte_dfa.test(memoryview("日本語".encode()))
+        assert byte_dfa.test(bytearray("über".encode()))
+        assert not byte_dfa.test("日本語".encode()[:-1])
+        assert not byte_dfa.test(b"\xff")
+
+    def test_large_ranges_stay_small(self):
+        table = {0: {chr(code): 1 for code in range(0x20, 0x20000) if not 0xD800 <= code <= 0xDFFF}, 1: {"a": 0}}
+        byte_dfa = ByteDFA(DFA(table, {1}))
+
+        assert byte_dfa.state_count < 16
+        assert byte_dfa.test("日a𝄞".encode())
+        assert not byte_dfa.test("日a".encode())
+
+    def test_lowered_dfa_has_byte_symbols(self):
+        lowered = to_utf8_dfa(DFA.from_regex("ab"))
+        assert all(isinstance(symbol, int) and 0 <= symbol < 256 for symbol in lowered.terms)
+        assert lowered.test(b"ab")
+
+    def test_rejects_multi_character_symbols(self):
+        with pytest.raises(ValueError):
+            to_utf8_dfa(DFA({0: {"ab": 1}, 1: {}}, {1}))
+
+    def test_byte_codes_pass_through(self):
+        byte_dfa = ByteDFA.from_regex("<200><0>*")
+        assert byte_dfa.test(bytes([200, 0, 0]))
+        assert not byte_dfa.test(bytes([0]))
+
+    def test_rejects_codes_past_a_byte(self):
+        with pytest.raises(ValueError):
+            ByteDFA.from_regex("<1>|<300>")
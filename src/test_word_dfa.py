@@ -0,0 +1,74 @@
+import pytest
+
+from converter import RegexToNFAConverter
+
+from dfa import DFA
+
+from word_dfa import build_word_dfa
+
+
+def _min_dfa(regex: str) -> DFA:
+    return DFA.from_nfa(RegexToNFAConverter(regex).parse()).build_min_dfa()
+
+
+class TestBuildWordDFA:
+    def test_shared_suffixes(self):
+        dfa = build_word_dfa(["tap", "taps", "top", "tops"])
+
+        assert dfa.table == {
+            0: {'t': 1},
+            1: {'a': 2, 'o': 2},
+            2: {'p': 3},
+            3: {'s': 4},
+            4: {},
+        }
+        assert dfa.accepts == {3, 4}
+        assert dfa.initial_state == 0
+
+    def test_accepts_only_words(self):
+        words = ["abc", "abd", "b", "bcd", "cd", "cdd"]
+        dfa = build_word_dfa(words)
+
+        for word in words:
+            assert dfa.test(word)
+
+        assert not dfa.test("")
+        assert not dfa.test("ab")
+        assert not dfa.test("bc")
+        assert not dfa.test("abcd")
+
+    def test_same_size_as_minimized(self):
+        words = ["ab", "abab", "ba", "baba", "bb", "bbb"]
+        dfa = build_word_dfa(words)
+        min_dfa = _min_dfa("|".join(words))
+
+        assert len(dfa.table) == len(min_dfa.table)
+        for word in ["", "a", "ab", "aba", "abab", "b", "ba", "bab", "baba", "bb", "bbb", "bbbb"]:
+            assert dfa.test(word) == min_dfa.test(word)
+
+    def test_empty_word_and_duplicates(self):
+        dfa = build_word_dfa(["", "a", "a", "aa"])
+
+        assert dfa.test("")
+        assert dfa.test("a")
+        assert dfa.test("aa")
+        assert not dfa.test("aaa")
+        assert len(dfa.table) == 3
+
+    def test_no_words(self):
+        dfa = build_word_dfa([])
+
+        assert dfa.table == {0: {}}
+        assert dfa.accepts == set()
+
+    def test_unsorted(self):
+        with pytest.raises(ValueError):
+            build_word_dfa(["b", "a"])
+
+    def test_generator_input(self):
+        dfa = build_word_dfa(f"{i:05d}" for i in range(0, 100000, 7))
+
+        assert dfa.test("00007")
+        assert dfa.test("99995")
+        assert not dfa.test("00008")
+        assert len(dfa.table) < 2000
@@ -0,0 +1,9 @@
+import itertools
+from typing import Iterator
+
+
+def all_strings(alphabet: str, max_length: int) -> Iterator[str]:
+    # Every string over the alphabet up to max_length, shortest first, for exhaustive comparisons
+    for length in range(max_length + 1):
+        for letters in itertools.product(alphabet, repeat=length):
+            yield "".join(letters)
@@ -0,0 +1,183 @@
+from typing import Iterable, Union
+
+from dfa import DFA
+
+Bytes = Union[bytes, bytearray, memoryview]
+
+# Last code point encoded with 1, 2, 3 and 4 bytes
+_LENGTH_LIMITS = (0x7F, 0x7FF, 0xFFFF, 0x10FFFF)
+_SURROGATES = (0xD800, 0xDFFF)
+
+# Inputs are read in chunks so a dead state stops the scan without a check per byte
+_CHUNK = 4096
+
+
+def utf8_ranges(low: int, high: int) -> list[tuple[tuple[int, int], ...]]:
+    # Splits a code point range into sequences of byte ranges whose products are exactly its UTF-8
+    # encodings, e.g. U+0080..U+07FF is [C2-DF][80-BF]. Surrogates have no UTF-8 encoding and are skipped
+    sequences = []
+    stack = [(low, high)]
+    while stack:
+        low, high = stack.pop()
+        if low > high:
+            continue
+        if low <= _SURROGATES[1] and high >= _SURROGATES[0]:
+            stack.append((_SURROGATES[1] + 1, high))
+            stack.append((low, _SURROGATES[0] - 1))
+            continue
+        split = next(limit for limit in _LENGTH_LIMITS if low <= limit)
+        if high > split:
+            stack.append((split + 1, high))
+            stack.append((low, split))
+            continue
+        if high <= 0x7F:
+            sequences.append(((low, high),))
+            continue
+
+        # Split until every continuation byte spans either one value or its whole 80-BF range
+        for shift in range(6, 24, 6):
+            mask = (1 << shift) - 1
+            if low & ~mask != high & ~mask:
+                if low & mask:
+                    stack.append(((low | mask) + 1, high))
+                    stack.append((low, low | mask))
+                    break
+                if high & mask != mask:
+                    stack.append((high & ~mask, high))
+                    stack.append((low, (high & ~mask) - 1))
+                    break
+        else:
+            first = chr(low).encode()
+            last = chr(high).encode()
+            sequences.append(tuple(zip(first, last)))
+    sequences.sort()
+    return sequences
+
+
+def _code_point_ranges(symbols: Iterable[str]) -> list[tuple[int, int]]:
+    code_points = sorted(ord(symbol) for symbol in symbols)
+    ranges = []
+    for code_point in code_points:
+        if ranges and ranges[-1][1] == code_point - 1:
+            ranges[-1] = (ranges[-1][0], code_point)
+        else:
+            ranges.append((code_point, code_point))
+    return ranges
+
+
+class _Lowering:
+    # Intermediate states are hash-consed by their transitions, so the continuation byte suffixes
+    # shared by many characters and many states exist once
+
+    def __init__(self, first_state: int):
+        self.rows: dict[int, dict[int, int]] = {}
+        self._ids: dict[tuple, int] = {}
+        self._merged: dict[tuple[int, int], int] = {}
+        self._next_state = first_state
+
+    def intern(self, row: dict[int, int]) -> int:
+        key = tuple(sorted(row.items()))
+        state = self._ids.get(key)
+        if state is None:
+            state = self._ids[key] = self._next_state
+            self._next_state += 1
+            self.rows[state] = row
+        return state
+
+    def suffix(self, ranges: tuple[tuple[int, int], ...], target: int) -> int:
+        # State that reads the byte ranges and ends in target
+        state = target
+        for low, high in reversed(ranges):
+            state = self.intern(dict.fromkeys(range(low, high + 1), state))
+        return state
+
+    def merge(self, first: int, second: int) -> int:
+        # Two sequences from one state can share leading bytes, their continuations are merged
+        if first == second:
+            return first
+        key = (min(first, second), max(first, second))
+        merged = self._merged.get(key)
+        if merged is None:
+            row = dict(self.rows[first])
+            for byte, next_state in self.rows[second].items():
+                row[byte] = self.merge(row[byte], next_state) if byte in row else next_state
+            merged = self._merged[key] = self.intern(row)
+        return merged
+
+    def add(self, row: dict[int, int], ranges: tuple[tuple[int, int], ...], target: int):
+        (low, high), rest = ranges[0], ranges[1:]
+        next_state = self.suffix(rest, target)
+        for byte in range(low, high + 1):
+            row[byte] = self.merge(row[byte], next_state) if byte in row else next_state
+
+
+def to_utf8_dfa(dfa: DFA) -> DFA:
+    # Same language over UTF-8 bytes: every character transition becomes a path of byte transitions,
+    # consecutive code points with the same target are lowered together as a range
+    lowering = _Lowering(max(set(dfa.table) | {s for row in dfa.table.values() for s in row.values()}) + 1)
+    table = {}
+    for state, transitions in dfa.table.items():
+        by_target: dict[int, list[str]] = {}
+        for symbol, next_state in transitions.items():
+            if not isinstance(symbol, str) or len(symbol) != 1:
+                raise ValueError(f"symbol {symbol!r} is not a single character")
+            by_target.setdefault(next_state, []).append(symbol)
+
+        row: dict[int, int] = {}
+        for next_state, symbols in by_target.items():
+            for low, high in _code_point_ranges(symbols):
+                for ranges in utf8_ranges(low, high):
+                    lowering.add(row, ranges, next_state)
+        table[state] = row
+    table.update(lowering.rows)
+
+    return DFA(table=table, accepts=set(dfa.accepts), initial_state=dfa.initial_state)
+
+
+class ByteDFA:
+    # Dense 256-column transition rows over the UTF-8 lowering of a DFA, matches bytes-like input as is.
+    # The last row is a dead state that every missing transition leads to
+
+    def __init__(self, dfa: DFA):
+        if all(isinstance(symbol, int) for symbol in dfa.terms):
+            # An int alphabet is taken as already byte-level, event codes past 255 have no byte to match
+            wide = sorted(symbol for symbol in dfa.terms if not 0 <= symbol <= 255)
+            if wide:
+                raise ValueError(f"symbol {wide[0]!r} is not a byte")
+            self.dfa = dfa
+        else:
+            self.dfa = to_utf8_dfa(dfa)
+        states = sorted(set(self.dfa.table) | {s for row in self.dfa.table.values() for s in row.values()})
+        index = {state: i for i, state in enumerate(states)}
+        self.dead = len(states)
+        self.rows = [[self.dead] * 256 for _ in range(len(states) + 1)]
+        for state, transitions in self.dfa.table.items():
+            row = self.rows[index[state]]
+            for byte, next_state in transitions.items():
+                row[byte] = index[next_state]
+        self.accepting = [state in self.dfa.accepts for state in states] + [False]
+        self.initial_state = index[self.dfa.initial_state]
+
+    @classmethod
+    def from_regex(cls, regex: str) -> "ByteDFA":
+        return cls(DFA.from_regex(regex))
+
+    @property
+    def state_count(self) -> int:
+        return len(self.rows)
+
+    def test(self, data: Bytes) -> bool:
+        if isinstance(data, memoryview) and data.format != "B":
+            data = data.cast("B")
+        rows = self.rows
+        dead = self.dead
+        state = self.initial_state
+        for start in range(0, len(data), _CHUNK):
+            for byte in data[start:start + _CHUNK]:
+                state = rows[state][byte]
+            if state == dead:
+                return False
+        return self.accepting[state]
+
+    def test_batch(self, items: Iterable[Bytes]) -> list[bool]:
+        return [self.test(data) for data in items]
@@ -0,0 +1,59 @@
+# Rendering through graphviz. It is imported on first use, so the matching modules
+# load without graphviz installed; see export.py for dependency-free DOT/JSON output.
+
+
+def _digraph():
+    try:
+        from graphviz import Digraph
+    except ImportError as error:
+        raise ImportError("drawing graphs requires the graphviz package, "
+                          "use export.write_dot to write DOT files without it") from error
+    return Digraph()
+
+
+def draw_nfa(nfa, filename: str = "nfa_output", view: bool = True):
+    dot = _digraph()
+    dot.attr(rankdir='LR')
+
+    graph = nfa.build_graph()
+
+    for state in graph:
+        if not graph[state] or nfa.out_state.id == state:
+            dot.node(str(state), str(state), shape='doublecircle')
+        else:
+            dot.node(str(state), str(state), shape='circle')
+
+    dot.node('start', '', shape='none')  # invisible node
+    dot.edge('start', '1', '')
+
+    for state, paths in graph.items():
+        for symbol, next_states in paths.items():
+            for next_state in next_states:
+                label = str(symbol)
+                dot.edge(str(state), str(next_state), label=label)
+
+    dot.render(filename, format="png", view=view)
+
+
+def draw_dfa(dfa, minimized: bool = False, view: bool = True):
+    dot = _digraph()
+    dot.attr(rankdir='LR')
+
+    for state in dfa.table:
+        if state in dfa.accepts:
+            dot.node(str(state), str(state), shape='doublecircle')
+        else:
+            dot.node(str(state), str(state), shape='circle')
+
+    dot.node('start', '', shape='none')  # invisible node
+    dot.edge('start', str(dfa.initial_state), '')
+
+    for state, paths in dfa.table.items():
+        for symbol, next_state in paths.items():
+            label = str(symbol)
+            dot.edge(str(state), str(next_state), label=label)
+
+    if minimized:
+        dot.render("min_dfa_output", format="png", view=view)
+    else:
+        dot.render("dfa_output", format="png", view=view)
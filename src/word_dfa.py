@@ -0,0 +1,100 @@
+from collections import deque
+from typing import Iterable
+
+from dfa import DFA
+
+
+# Incremental construction of the minimal acyclic DFA for a sorted word list (Daciuk et al., 2000).
+# Only the path of the last inserted word is kept unminimized, every other state is in the register.
+class WordDFABuilder:
+
+    def __init__(self):
+        self._transitions: list[dict[str, int]] = [{}]
+        self._accepting: list[bool] = [False]
+        self._free: list[int] = []
+        self._register: dict[tuple, int] = {}
+        self._path: list[int] = [0]
+        self._previous = ""
+        self._empty = True
+
+    def _new_state(self) -> int:
+        if self._free:
+            state = self._free.pop()
+            self._transitions[state] = {}
+            self._accepting[state] = False
+            return state
+        self._transitions.append({})
+        self._accepting.append(False)
+        return len(self._transitions) - 1
+
+    def _replace_or_register(self, depth: int):
+        # Minimize the path of the previous word below the given depth, deepest state first
+        path = self._path
+        previous = self._previous
+        for d in range(len(path) - 1, depth, -1):
+            state = path[d]
+            # Children are added in increasing symbol order, so the items are already sorted
+            signature = (self._accepting[state], tuple(self._transitions[state].items()))
+            registered = self._register.get(signature)
+            if registered is None:
+                self._register[signature] = state
+            else:
+                self._transitions[path[d - 1]][previous[d - 1]] = registered
+                self._transitions[state] = {}
+                self._free.append(state)
+        del path[depth + 1:]
+
+    def add(self, word: str):
+        previous = self._previous
+        if not self._empty:
+            if word < previous:
+                raise ValueError(f"words must be sorted: {word!r} after {previous!r}")
+            if word == previous:
+                return
+        self._empty = False
+
+        prefix_length = 0
+        limit = min(len(word), len(previous))
+        while prefix_length < limit and word[prefix_length] == previous[prefix_length]:
+            prefix_length += 1
+
+        self._replace_or_register(prefix_length)
+
+        path = self._path
+        state = path[-1]
+        for symbol in word[prefix_length:]:
+            next_state = self._new_state()
+            self._transitions[state][symbol] = next_state
+            path.append(next_state)
+            state = next_state
+        self._accepting[state] = True
+        self._previous = word
+
+    def build(self) -> DFA:
+        self._replace_or_register(0)
+
+        # Drop the ids freed during construction and number the states in BFS order from the root
+        table = {}
+        accepts = set()
+        numbering = {0: 0}
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            transitions = {}
+            for symbol, next_state in self._transitions[state].items():
+                if next_state not in numbering:
+                    numbering[next_state] = len(numbering)
+                    queue.append(next_state)
+                transitions[symbol] = numbering[next_state]
+            table[numbering[state]] = transitions
+            if self._accepting[state]:
+                accepts.add(numbering[state])
+
+        return DFA(table=table, accepts=accepts, initial_state=0)
+
+
+def build_word_dfa(words: Iterable[str]) -> DFA:
+    builder = WordDFABuilder()
+    for word in words:
+        builder.add(word)
+    return builder.build()